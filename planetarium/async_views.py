@@ -0,0 +1,186 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import APIException, AuthenticationFailed, \
+    NotAuthenticated, NotFound, Throttled, ValidationError
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from planetarium.db_routers import achoose_read_alias, read_from
+from planetarium.fieldsets import parse_field_tree
+from planetarium.holds import get_seat_hold_store
+from planetarium.models import ShowSession
+from planetarium.pagination import KeysetPagination
+from planetarium.readers import ShowSessionReader
+from planetarium.renderers import FastJSONRenderer
+from planetarium.seat_map import aget_seat_map, encode_seat_map, \
+    mark_held_seats
+from planetarium.throttling import CatalogReadThrottle, scoped_throttles
+from planetarium.views import filter_show_sessions
+from user.authentication import STAFF_CLAIM, get_claims_user
+
+OCTET_STREAM = "application/octet-stream"
+
+
+async def _aauthenticate(request):
+    """Async counterpart of ``JWTAuthentication.authenticate``."""
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    if header is None:
+        raise NotAuthenticated()
+    raw_token = authentication.get_raw_token(header)
+    if raw_token is None:
+        raise NotAuthenticated()
+
+    token = authentication.get_validated_token(raw_token)
+    if STAFF_CLAIM in token:
+        return get_claims_user(token)
+
+    try:
+        user_id = token[jwt_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise AuthenticationFailed(
+            "Token contained no recognizable user identification"
+        )
+
+    try:
+        user = await get_user_model().objects.aget(
+            **{jwt_settings.USER_ID_FIELD: user_id}
+        )
+    except get_user_model().DoesNotExist:
+        raise AuthenticationFailed("User not found")
+    if not user.is_active:
+        raise AuthenticationFailed("User is inactive")
+    return user
+
+
+def _check_throttles(request):
+    """Apply the session viewset's throttles, as ``APIView`` does."""
+    durations = [
+        throttle.wait()
+        for throttle in scoped_throttles(CatalogReadThrottle)
+        if not throttle.allow_request(request, None)
+    ]
+    if durations:
+        raise Throttled(max(
+            (duration for duration in durations if duration is not None),
+            default=None,
+        ))
+
+
+def _render(data, status=200, headers=None):
+    return HttpResponse(
+        FastJSONRenderer().render(data),
+        status=status,
+        headers=headers,
+        content_type="application/json",
+    )
+
+
+def async_read_view(view):
+    """Authenticate with JWT, read from a replica and render DRF-style JSON.
+
+    Requests are throttled like the sync session viewset. ``view`` gets a
+    DRF ``Request`` wrapper for ``query_params`` and returns either plain
+    data or a ready ``HttpResponse``.
+    """
+    @require_GET
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            request.user = await _aauthenticate(request)
+            drf_request = Request(request)
+            drf_request.user = request.user
+            await sync_to_async(_check_throttles)(drf_request)
+            with read_from(await achoose_read_alias(request.user)):
+                result = await view(drf_request, *args, **kwargs)
+        except APIException as exc:
+            data = exc.detail
+            if not isinstance(data, (list, dict)):
+                data = {"detail": data}
+            headers = {}
+            if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+                headers["WWW-Authenticate"] = \
+                    JWTAuthentication().authenticate_header(request)
+            if getattr(exc, "wait", None):
+                headers["Retry-After"] = "%d" % exc.wait
+            return _render(data, status=exc.status_code, headers=headers)
+
+        if isinstance(result, HttpResponse):
+            return result
+        return _render(result)
+
+    return wrapper
+
+
+def _show_session_reader(request):
+    if "expand" in request.query_params:
+        raise ValidationError(
+            {"expand": "Not supported by the async session views."}
+        )
+    return ShowSessionReader(
+        parse_field_tree(request.query_params.get("fields"))
+    )
+
+
+async def _aget_show_session(queryset, pk):
+    try:
+        return await queryset.aget(pk=pk)
+    except ShowSession.DoesNotExist:
+        raise NotFound("No ShowSession matches the given query.")
+
+
+@async_read_view
+async def show_session_list(request):
+    reader = _show_session_reader(request)
+    queryset = reader.shape(
+        filter_show_sessions(ShowSession.objects.all(), request.query_params)
+    )
+
+    paginator = KeysetPagination()
+    rows = await paginator.apaginate_queryset(queryset, request)
+    await sync_to_async(reader.prepare)(rows)
+    return paginator.get_paginated_data(
+        [reader.to_representation(row) for row in rows]
+    )
+
+
+@async_read_view
+async def show_session_detail(request, pk):
+    reader = _show_session_reader(request)
+    queryset = reader.shape(
+        filter_show_sessions(ShowSession.objects.all(), request.query_params)
+    )
+    row = await _aget_show_session(queryset, pk)
+    await sync_to_async(reader.prepare)([row])
+    return reader.to_representation(row)
+
+
+@async_read_view
+async def show_session_seat_map(request, pk):
+    show_session = await _aget_show_session(
+        ShowSession.objects.select_related("planetarium_dome"), pk
+    )
+    held_seats = await sync_to_async(get_seat_hold_store().get_holds)(
+        show_session.id
+    )
+    seat_map = mark_held_seats(
+        await aget_seat_map(show_session), held_seats
+    )
+
+    if OCTET_STREAM in request.headers.get("Accept", ""):
+        rows, seats_in_row, bitmap = seat_map
+        return HttpResponse(
+            bitmap,
+            content_type=OCTET_STREAM,
+            headers={
+                "X-Seat-Map-Rows": rows,
+                "X-Seat-Map-Seats-In-Row": seats_in_row,
+            },
+        )
+
+    return encode_seat_map(show_session, seat_map, len(held_seats))
@@ -0,0 +1,86 @@
+from django.conf import settings
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connections
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Upper
+
+from planetarium.lru import LRUCache
+from planetarium.models import AstronomyShow, PlanetariumDome, ShowTheme
+from planetarium.response_cache import get_versions
+
+SOURCES = (
+    ("dome", PlanetariumDome, "name"),
+    ("theme", ShowTheme, "name"),
+    ("show", AstronomyShow, "title"),
+)
+# Trigram matching needs at least one full trigram to be selective;
+# shorter input is matched by prefix only.
+MIN_FUZZY_LENGTH = 3
+
+
+hot_prefixes = LRUCache(
+    maxsize=getattr(settings, "AUTOCOMPLETE_CACHE_SIZE", 1024),
+    ttl=getattr(settings, "AUTOCOMPLETE_CACHE_TTL", 60),
+)
+
+
+def _candidates(kind, model, field, text, postgres):
+    prefix = Q(**{f"{field}__istartswith": text})
+    queryset = model.objects.order_by()
+
+    if postgres and len(text) >= MIN_FUZZY_LENGTH:
+        queryset = queryset.alias(upper_label=Upper(field)).filter(
+            prefix | Q(upper_label__trigram_word_similar=text)
+        )
+        score = (
+            Case(When(prefix, then=Value(1.0)), default=Value(0.0))
+            + TrigramWordSimilarity(text, field)
+        )
+    elif postgres:
+        queryset = queryset.filter(prefix)
+        score = Value(1.0)
+    else:
+        queryset = queryset.filter(**{f"{field}__icontains": text})
+        score = Case(When(prefix, then=Value(1.0)), default=Value(0.5))
+
+    return queryset.annotate(
+        kind=Value(kind),
+        label=F(field),
+        score=score,
+    ).values("kind", "id", "label", "score")
+
+
+def _search(text, limit):
+    postgres = connections["default"].vendor == "postgresql"
+    parts = []
+    for kind, model, field in SOURCES:
+        candidates = _candidates(kind, model, field, text, postgres)
+        if postgres:
+            candidates = candidates.order_by("-score", "label")[:limit]
+        parts.append(candidates)
+
+    queryset = parts[0].union(*parts[1:], all=True)
+    rows = queryset.order_by("-score", "label")[:limit]
+    return [
+        {"type": row["kind"], "id": row["id"], "label": row["label"]}
+        for row in rows
+    ]
+
+
+def autocomplete(text, limit=10):
+    """Top ``limit`` domes, themes and shows matching ``text``.
+
+    Results are kept in an in-process LRU keyed by the catalog versions,
+    so an edit to any of the three models makes old entries unreachable.
+    """
+    text = " ".join(text.split())
+    if not text:
+        return []
+
+    versions = tuple(get_versions([model for _, model, _ in SOURCES]))
+    key = (text.casefold(), limit, versions)
+    results = hot_prefixes.get(key)
+    if results is None:
+        results = _search(text, limit)
+        hot_prefixes.set(key, results)
+    return results
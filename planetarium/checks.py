@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.module_loading import import_string
+
+from planetarium.holds import DEFAULT_SEAT_HOLD_STORE, CacheSeatHoldStore
+
+
+@checks.register(checks.Tags.caches)
+def check_seat_hold_cache(app_configs, **kwargs):
+    """Cache-backed seat holds need a cache that all workers share."""
+    store_class = import_string(
+        getattr(settings, "SEAT_HOLD_STORE", DEFAULT_SEAT_HOLD_STORE)
+    )
+    if (
+        settings.DEBUG
+        or not issubclass(store_class, CacheSeatHoldStore)
+        or not isinstance(caches["default"], LocMemCache)
+    ):
+        return []
+    return [checks.Warning(
+        "CacheSeatHoldStore is using a local-memory cache, so seat holds "
+        "are not shared between worker processes.",
+        hint="Set REDIS_URL, or configure another shared default cache.",
+        id="planetarium.W001",
+    )]
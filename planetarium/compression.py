@@ -0,0 +1,161 @@
+import gzip
+import re
+import time
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+# Brotli's default quality 11 is meant for static assets and costs far
+# more CPU per response than it saves in bytes.
+BROTLI_QUALITY = 5
+
+_ACCEPT_ENCODING = re.compile(r"\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([\d.]+))?")
+
+
+def accepted_encodings(header):
+    """Content codings from an Accept-Encoding header, best first."""
+    weights = {}
+    for part in header.split(","):
+        match = _ACCEPT_ENCODING.match(part)
+        if not match:
+            continue
+        try:
+            weight = float(match.group(2) or 1)
+        except ValueError:
+            continue
+        weights[match.group(1).lower()] = weight
+    wildcard = weights.pop("*", 0)
+    return sorted(
+        (coding for coding in available_encodings()
+         if weights.get(coding, wildcard) > 0),
+        key=lambda coding: -weights.get(coding, wildcard),
+    )
+
+
+def available_encodings():
+    """Supported codings in server preference order."""
+    return ("br", "gzip") if brotli is not None else ("gzip", )
+
+
+def compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _stream_compressor(encoding):
+    """``(process, finish)`` callables of an incremental compressor."""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        return compressor.process, compressor.finish
+    compressor = zlib.compressobj(
+        GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+    )
+    return compressor.compress, compressor.flush
+
+
+def compress_stream(chunks, encoding):
+    process, finish = _stream_compressor(encoding)
+    for chunk in chunks:
+        data = process(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+async def acompress_stream(chunks, encoding):
+    process, finish = _stream_compressor(encoding)
+    async for chunk in chunks:
+        data = process(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+class CompressionMiddleware:
+    """Compress responses with brotli or gzip, as the client accepts.
+
+    Bodies under ``RESPONSE_COMPRESSION_MIN_SIZE`` bytes (default 1024) go
+    out as they are: the savings don't pay for the CPU and headers. Brotli
+    is used when the ``brotli`` package is installed and preferred by the
+    client. Compression time is added to the ``Server-Timing`` header.
+
+    Like Django's GZipMiddleware this is open to BREACH when a response
+    mixes secrets with reflected input; the size threshold keeps token
+    responses uncompressed.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        if response.has_header("Content-Encoding"):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding", ))
+
+        encodings = accepted_encodings(
+            request.META.get("HTTP_ACCEPT_ENCODING", "")
+        )
+        if not encodings:
+            return response
+        encoding = encodings[0]
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_stream(
+                    response.streaming_content, encoding
+                )
+            else:
+                response.streaming_content = compress_stream(
+                    response.streaming_content, encoding
+                )
+            del response.headers["Content-Length"]
+        else:
+            min_size = getattr(
+                settings, "RESPONSE_COMPRESSION_MIN_SIZE", DEFAULT_MIN_SIZE
+            )
+            if len(response.content) < min_size:
+                return response
+
+            started = time.perf_counter()
+            compressed = compress(response.content, encoding)
+            elapsed = time.perf_counter() - started
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response["Content-Length"] = str(len(compressed))
+            timing = f"compress;dur={elapsed * 1000:.1f}"
+            response["Server-Timing"] = (
+                f"{response['Server-Timing']}, {timing}"
+                if response.has_header("Server-Timing") else timing
+            )
+
+        # The representation changed, so a strong ETag no longer holds.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = encoding
+        return response
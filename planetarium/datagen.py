@@ -0,0 +1,311 @@
+import csv
+import io
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from planetarium.models import AstronomyShow, PlanetariumDome, Reservation, \
+    ShowSession, ShowTheme, Ticket
+from planetarium.pg_copy import copy_from
+from planetarium.response_cache import bump_version
+from planetarium.seat_map import invalidate_seat_maps
+
+USER_EMAIL = "user{}@example.com"
+USER_EMAIL_PATTERN = r"^user[0-9]+@example\.com$"
+
+# A dome runs a show every SESSION_SLOT; shows are shorter than that, so
+# sessions in the same dome never overlap.
+SESSION_SLOT = timedelta(hours=2)
+BOOKED_DAYS_BEFORE = (0, 1, 2, 3, 7, 14, 30)
+
+WORDS = (
+    "Andromeda", "Aurora", "Black", "Comet", "Cosmic", "Dark", "Dawn",
+    "Eclipse", "Galaxy", "Giant", "Horizon", "Journey", "Light", "Lunar",
+    "Milky", "Nebula", "Orbit", "Planet", "Pulsar", "Quasar", "Red", "Ring",
+    "Solar", "Star", "Stellar", "Storm", "Titan", "Universe", "Void", "Way",
+)
+
+
+class TableWriter:
+    """Buffer rows for one table and insert them in batches.
+
+    Rows are plain tuples in ``columns`` order, so no model instances are
+    built. Batches go through PostgreSQL ``COPY`` when ``copy`` is set and
+    through a single ``executemany`` INSERT otherwise.
+    """
+
+    def __init__(self, model, columns, copy, batch_size):
+        self.table = connection.ops.quote_name(model._meta.db_table)
+        self.columns = ", ".join(
+            connection.ops.quote_name(column) for column in columns
+        )
+        self.copy = copy
+        self.batch_size = batch_size
+        self.rows = []
+        self.written = 0
+
+    def add(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def extend(self, rows):
+        self.rows.extend(rows)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        with connection.cursor() as cursor:
+            if self.copy:
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(self.rows)
+                buffer.seek(0)
+                copy_from(
+                    cursor,
+                    f"COPY {self.table} ({self.columns}) FROM STDIN "
+                    f"WITH (FORMAT csv, NULL '\\N')",
+                    buffer,
+                )
+            else:
+                placeholders = ", ".join(["%s"] * len(self.rows[0]))
+                cursor.executemany(
+                    f"INSERT INTO {self.table} ({self.columns}) "
+                    f"VALUES ({placeholders})",
+                    self.rows,
+                )
+        self.written += len(self.rows)
+        self.rows = []
+
+
+def _next_id(model):
+    return (model.objects.aggregate(last=Max("pk"))["last"] or 0) + 1
+
+
+def _names(rng, count, words):
+    return [
+        " ".join(rng.sample(WORDS, words)) + f" {number}"
+        for number in range(1, count + 1)
+    ]
+
+
+def _ticket_counts(rng, capacities, tickets):
+    """Tickets per session: skewed occupancy scaled to ``tickets`` total."""
+    demand = [rng.betavariate(2, 3) * capacity for capacity in capacities]
+    scale = tickets / (sum(demand) or 1)
+    return [
+        min(capacity, round(wanted * scale))
+        for wanted, capacity in zip(demand, capacities)
+    ]
+
+
+def generate_dataset(
+    domes=5,
+    themes=20,
+    shows=50,
+    sessions=500,
+    users=100,
+    tickets=20_000,
+    seed=0,
+    start=None,
+    batch_size=10_000,
+    method="auto",
+    password=None,
+    log=None,
+):
+    """Insert a coherent, production-shaped dataset and return row counts.
+
+    The same arguments, seed and ``start`` always produce the same rows.
+    Sessions fill the domes' schedules from ``start`` (default: centred on
+    now) one SESSION_SLOT apart, tickets are unique per seat and grouped
+    into reservations of one to six, and ``ShowSession.tickets_sold``,
+    seat maps and catalog cache versions are updated directly since raw
+    inserts send no signals.
+
+    Users get unusable passwords unless ``password`` is given, in which
+    case they all share it (hashed once).
+
+    Primary keys are assigned here, continuing from each table's highest
+    id, so rows can reference each other without reading ids back. Run it
+    while nothing else writes to these tables.
+    """
+    if method == "auto":
+        method = "copy" if connection.vendor == "postgresql" else "bulk"
+    copy = method == "copy"
+    rng = random.Random(seed)
+    uniform = rng.random
+    log = log or (lambda message: None)
+    adapt_datetime = connection.ops.adapt_datetimefield_value
+    User = get_user_model()
+
+    def writer(model, *columns):
+        return TableWriter(model, columns, copy, batch_size)
+
+    with transaction.atomic():
+        first = {
+            model: _next_id(model)
+            for model in (
+                PlanetariumDome, ShowTheme, AstronomyShow, User,
+                ShowSession, Reservation,
+            )
+        }
+
+        dome_sizes = []
+        dome_rows = writer(PlanetariumDome, "id", "name", "rows",
+                           "seats_in_row")
+        for number, name in enumerate(_names(rng, domes, 1)):
+            size = (rng.randint(10, 30), rng.randint(15, 40))
+            dome_sizes.append(size)
+            dome_rows.add((first[PlanetariumDome] + number, name, *size))
+        dome_rows.flush()
+
+        theme_rows = writer(ShowTheme, "id", "name")
+        theme_rows.extend(
+            (first[ShowTheme] + number, name)
+            for number, name in enumerate(_names(rng, themes, 1))
+        )
+        theme_rows.flush()
+
+        show_rows = writer(AstronomyShow, "id", "title", "description")
+        show_themes = writer(
+            AstronomyShow.themes.through, "astronomyshow_id", "showtheme_id"
+        )
+        theme_ids = range(first[ShowTheme], first[ShowTheme] + themes)
+        for number, title in enumerate(_names(rng, shows, 2)):
+            show_id = first[AstronomyShow] + number
+            show_rows.add(
+                (show_id, title, " ".join(rng.choices(WORDS, k=30)))
+            )
+            show_themes.extend(
+                (show_id, theme_id)
+                for theme_id in rng.sample(
+                    theme_ids, min(themes, rng.randint(1, 3))
+                )
+            )
+        show_rows.flush()
+        show_themes.flush()
+        AstronomyShow.objects.filter(
+            pk__gte=first[AstronomyShow]
+        ).update_search_vector()
+
+        hashed = make_password(password) if password else None
+        joined = adapt_datetime(timezone.now())
+        user_rows = writer(
+            User, "id", "email", "password", "first_name", "last_name",
+            "is_superuser", "is_staff", "is_active", "date_joined",
+        )
+        user_rows.extend(
+            (user_id, USER_EMAIL.format(user_id),
+             hashed or make_password(None), "", "",
+             False, False, True, joined)
+            for user_id in range(first[User], first[User] + users)
+        )
+        user_rows.flush()
+    log(f"Created {domes} domes, {themes} themes, {shows} shows, "
+        f"{users} users.")
+
+    if start is None:
+        start = timezone.now().replace(
+            minute=0, second=0, microsecond=0
+        ) - SESSION_SLOT * (sessions // max(domes, 1) // 2)
+    schedule = [
+        (number % domes, start + SESSION_SLOT * (number // domes))
+        for number in range(sessions)
+    ] if domes and shows else []
+    capacities = [
+        rows * seats_in_row
+        for rows, seats_in_row in (dome_sizes[dome] for dome, _ in schedule)
+    ]
+    counts = _ticket_counts(rng, capacities, tickets) if users \
+        else [0] * len(schedule)
+
+    session_rows = writer(
+        ShowSession, "id", "astronomy_show_id", "planetarium_dome_id",
+        "show_time", "tickets_sold",
+    )
+    reservation_rows = writer(Reservation, "id", "created_at", "user_id")
+    ticket_rows = writer(
+        Ticket, "row", "seat", "show_session_id", "reservation_id"
+    )
+    reservation_id = first[Reservation]
+    session_ids = range(
+        first[ShowSession], first[ShowSession] + len(schedule)
+    )
+
+    for offset in range(0, len(schedule), batch_size):
+        with transaction.atomic():
+            for number in range(
+                offset, min(offset + batch_size, len(schedule))
+            ):
+                dome, show_time = schedule[number]
+                rows, seats_in_row = dome_sizes[dome]
+                session_id = session_ids[number]
+                session_rows.add((
+                    session_id,
+                    first[AstronomyShow] + rng.randrange(shows),
+                    first[PlanetariumDome] + dome,
+                    adapt_datetime(show_time),
+                    counts[number],
+                ))
+
+                booked = [
+                    adapt_datetime(show_time - timedelta(days=days))
+                    for days in BOOKED_DAYS_BEFORE
+                ]
+                sold = rng.sample(range(rows * seats_in_row), counts[number])
+                while sold:
+                    # random() is much cheaper than randint() in this loop.
+                    group = sold[:1 + int(uniform() * 6)]
+                    del sold[:len(group)]
+                    reservation_rows.add((
+                        reservation_id,
+                        booked[int(uniform() * len(booked))],
+                        first[User] + int(uniform() * users),
+                    ))
+                    ticket_rows.extend(
+                        (position // seats_in_row + 1,
+                         position % seats_in_row + 1,
+                         session_id,
+                         reservation_id)
+                        for position in group
+                    )
+                    reservation_id += 1
+            # Foreign keys are checked when the transaction commits.
+            session_rows.flush()
+            reservation_rows.flush()
+            ticket_rows.flush()
+
+        invalidate_seat_maps(
+            session_ids[offset:offset + batch_size]
+        )
+        log(f"Created {session_rows.written} sessions, "
+            f"{ticket_rows.written} tickets.")
+
+    # Both methods write explicit ids, which don't advance PostgreSQL's
+    # sequences; backends without sequences return no statements here.
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), [
+            PlanetariumDome, ShowTheme, AstronomyShow, User,
+            ShowSession, Reservation,
+        ]):
+            cursor.execute(sql)
+    for model in (PlanetariumDome, ShowTheme, AstronomyShow):
+        bump_version(model)
+
+    return {
+        "domes": dome_rows.written,
+        "themes": theme_rows.written,
+        "shows": show_rows.written,
+        "show_themes": show_themes.written,
+        "users": user_rows.written,
+        "sessions": session_rows.written,
+        "reservations": reservation_rows.written,
+        "tickets": ticket_rows.written,
+    }
@@ -0,0 +1,115 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+PIN_KEY = "planetarium:primary-pin:{user_id}"
+DEFAULT_STICKY_WINDOW = 10
+
+# Alias that reads go to for the current request; None means the primary.
+_read_alias = ContextVar("planetarium_read_alias", default=None)
+
+
+def get_replicas():
+    return getattr(settings, "DATABASE_REPLICAS", ())
+
+
+def _pin_key(user):
+    return PIN_KEY.format(user_id=user.pk)
+
+
+def pin_to_primary(user):
+    """Send ``user``'s reads to the primary for the sticky window."""
+    if user and user.is_authenticated:
+        cache.set(
+            _pin_key(user),
+            1,
+            timeout=getattr(
+                settings, "REPLICA_STICKY_WINDOW", DEFAULT_STICKY_WINDOW
+            ),
+        )
+
+
+def choose_read_alias(user):
+    replicas = get_replicas()
+    if not replicas:
+        return None
+    if user and user.is_authenticated and cache.get(_pin_key(user)):
+        return None
+    return random.choice(replicas)
+
+
+async def achoose_read_alias(user):
+    replicas = get_replicas()
+    if not replicas:
+        return None
+    if user and user.is_authenticated and await cache.aget(_pin_key(user)):
+        return None
+    return random.choice(replicas)
+
+
+@contextmanager
+def read_from(alias):
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def use_primary():
+    """Read from the primary, e.g. when the result is about to be cached."""
+    return read_from(None)
+
+
+class ReplicaRouter:
+    """Route reads to the replica chosen for the current request.
+
+    Outside of ``read_from`` every query goes to the primary, so only code
+    that opted in (see ReplicaReadMixin) can ever see replication lag.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in get_replicas():
+            return False
+        return None
+
+
+class ReplicaReadMixin:
+    """Serve safe-method requests from a replica.
+
+    A user who sends a write is pinned to the primary for
+    ``REPLICA_STICKY_WINDOW`` seconds, so they read their own writes.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS:
+            self._read_alias_token = _read_alias.set(
+                choose_read_alias(request.user)
+            )
+        else:
+            pin_to_primary(request.user)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, "_read_alias_token", None)
+        if token is not None:
+            _read_alias.reset(token)
+            self._read_alias_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
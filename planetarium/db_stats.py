@@ -0,0 +1,50 @@
+import threading
+from collections import Counter
+
+from django.db import connections
+
+_opened = Counter()
+_lock = threading.Lock()
+
+# psycopg_pool.ConnectionPool.get_stats() keys, by the name we report.
+POOL_STATS = {
+    "checkouts": "requests_num",
+    "waits": "requests_queued",
+    "wait_ms": "requests_wait_ms",
+    "timeouts": "requests_errors",
+    "size": "pool_size",
+    "available": "pool_available",
+    "max_size": "pool_max",
+}
+
+
+def record_connection(alias):
+    with _lock:
+        _opened[alias] += 1
+
+
+def get_connection_stats():
+    """Per-alias connection reuse settings and counters for this process.
+
+    ``connections_opened`` counts new database connections; it should stay
+    flat under load when connections are persistent or pooled.
+    """
+    stats = {}
+    for alias in connections:
+        connection = connections[alias]
+        settings_dict = connection.settings_dict
+        entry = {
+            "vendor": connection.vendor,
+            "conn_max_age": settings_dict["CONN_MAX_AGE"],
+            "conn_health_checks": settings_dict["CONN_HEALTH_CHECKS"],
+            "connections_opened": _opened[alias],
+            "pool": None,
+        }
+        pool = getattr(connection, "pool", None)
+        if pool is not None:
+            raw = pool.get_stats()
+            entry["pool"] = {
+                name: raw.get(key, 0) for name, key in POOL_STATS.items()
+            }
+        stats[alias] = entry
+    return stats
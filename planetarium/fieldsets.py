@@ -0,0 +1,212 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from django.utils.module_loading import import_string
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+FIELD_PARAMETERS = [
+    OpenApiParameter(
+        "fields",
+        type=str,
+        description=(
+            "Comma-separated fields to return; dotted paths select fields "
+            "of nested objects, e.g. `id,show_session.show_time`"
+        ),
+        required=False,
+    ),
+    OpenApiParameter(
+        "expand",
+        type=str,
+        description=(
+            "Comma-separated related objects to embed in place of their "
+            "ids, e.g. `astronomy_show,planetarium_dome`"
+        ),
+        required=False,
+    ),
+]
+
+
+def parse_field_tree(value):
+    """Parse ``"id,ticket.row"`` into ``{"id": {}, "ticket": {"row": {}}}``.
+
+    Returns None when the parameter is missing, which means "everything".
+    An empty node means the whole field, without narrowing its children.
+    """
+    if value is None:
+        return None
+    tree = {}
+    for path in value.split(","):
+        node = tree
+        for name in path.strip().split("."):
+            if name:
+                node = node.setdefault(name, {})
+    return tree
+
+
+class SparseFieldsMixin:
+    """Serializer that renders only the ``fields`` tree and embeds ``expand``.
+
+    ``expandable_fields`` maps a field name to the serializer (class or
+    dotted path) that replaces its id when the field is expanded.
+    ``field_columns`` lists the model lookups a non-model field reads, so
+    ``shape_queryset`` can load just those columns.
+    """
+
+    expandable_fields = {}
+    field_columns = {}
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        self.sparse_fields = fields
+        self.expand = expand or {}
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.sparse_fields is not None:
+            fields = {
+                name: field for name, field in fields.items()
+                if name in self.sparse_fields
+            }
+
+        for name, field in fields.items():
+            subfields = (self.sparse_fields or {}).get(name) or None
+            subexpand = self.expand.get(name, {})
+            if name in self.expand and name in self.expandable_fields:
+                serializer_class = self.expandable_fields[name]
+                if isinstance(serializer_class, str):
+                    serializer_class = import_string(serializer_class)
+                fields[name] = serializer_class(
+                    read_only=True, fields=subfields, expand=subexpand
+                )
+                continue
+            nested = getattr(field, "child", field)
+            if isinstance(nested, SparseFieldsMixin):
+                nested.sparse_fields = subfields
+                nested.expand = subexpand
+        return fields
+
+
+class SparseFieldsViewMixin:
+    """Pass ``?fields=`` and ``?expand=`` to the serializer on safe methods."""
+
+    def get_field_trees(self):
+        request = getattr(self, "request", None)
+        if request is None or request.method not in SAFE_METHODS:
+            return None, {}
+        return (
+            parse_field_tree(request.query_params.get("fields")),
+            parse_field_tree(request.query_params.get("expand")) or {},
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        fields, expand = self.get_field_trees()
+        serializer_class = self.get_serializer_class()
+        if issubclass(serializer_class, SparseFieldsMixin):
+            kwargs.setdefault("fields", fields)
+            kwargs.setdefault("expand", expand)
+        return super().get_serializer(*args, **kwargs)
+
+    def shape_queryset(self, queryset):
+        return shape_queryset(queryset, self.get_serializer())
+
+
+class _QueryPlan:
+    def __init__(self):
+        self.only = []
+        self.select = []
+        self.prefetch = []
+        # False once a field reads something we can't name a column for;
+        # the rows are then loaded whole.
+        self.complete = True
+
+
+def _plan(serializer, model, prefix, plan):
+    columns = [model._meta.pk.name]
+    field_columns = getattr(serializer, "field_columns", {})
+
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if field.source == "*":
+            plan.complete = False
+            continue
+
+        nested = getattr(field, "child", field)
+        if isinstance(nested, serializers.BaseSerializer):
+            relation = model._meta.get_field(field.source)
+            if relation.many_to_many or relation.one_to_many:
+                extra = (relation.field.name, ) if relation.one_to_many \
+                    else ()
+                plan.prefetch.append(Prefetch(
+                    prefix + field.source,
+                    queryset=shape_queryset(
+                        relation.related_model._default_manager.all(),
+                        nested,
+                        extra,
+                    ),
+                ))
+            else:
+                columns.append(field.source)
+                plan.select.append(prefix + field.source)
+                _plan(nested, relation.related_model,
+                      f"{prefix}{field.source}__", plan)
+            continue
+
+        lookups = field_columns.get(name)
+        if lookups is None:
+            try:
+                model_field = model._meta.get_field(
+                    field.source.split(".")[0]
+                )
+            except FieldDoesNotExist:
+                plan.complete = False
+                continue
+            if model_field.many_to_many or model_field.one_to_many:
+                plan.prefetch.append(prefix + model_field.name)
+                continue
+            lookups = (model_field.name, )
+
+        for lookup in lookups:
+            related = lookup.rpartition("__")[0]
+            if related:
+                columns.append(related.split("__")[0])
+                plan.select.append(prefix + related)
+            columns.append(lookup)
+
+    plan.only.extend(prefix + column for column in columns)
+
+
+def _ordering_columns(queryset):
+    model = queryset.model
+    columns = []
+    for field in queryset.query.order_by or model._meta.ordering:
+        if not isinstance(field, str):
+            continue
+        try:
+            model._meta.get_field(field.lstrip("-"))
+        except FieldDoesNotExist:
+            continue
+        columns.append(field.lstrip("-"))
+    return columns
+
+
+def shape_queryset(queryset, serializer, extra=()):
+    """Load only what ``serializer`` will render from ``queryset``.
+
+    Columns of unrendered fields are deferred, and relations are joined or
+    prefetched only when a rendered field reads them. ``extra`` columns and
+    the ordering columns (for pagination cursors) are always loaded.
+    """
+    plan = _QueryPlan()
+    _plan(getattr(serializer, "child", serializer), queryset.model, "", plan)
+
+    if plan.select:
+        queryset = queryset.select_related(*dict.fromkeys(plan.select))
+    if plan.prefetch:
+        queryset = queryset.prefetch_related(*plan.prefetch)
+    if plan.complete:
+        queryset = queryset.only(*dict.fromkeys([
+            *plan.only, *extra, *_ordering_columns(queryset)
+        ]))
+    return queryset
@@ -0,0 +1,299 @@
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+DEFAULT_SEAT_HOLD_STORE = "planetarium.holds.CacheSeatHoldStore"
+DEFAULT_SEAT_HOLD_TTL = 600
+
+
+class SeatHoldConflict(Exception):
+    def __init__(self, seats):
+        super().__init__(f"Seats are held by someone else: {sorted(seats)}")
+        self.seats = seats
+
+
+class SeatHoldBusy(Exception):
+    """The session's holds could not be updated in time; nothing is held."""
+
+
+class BaseSeatHoldStore(ABC):
+    """Temporary seat holds keyed by (show_session, row, seat).
+
+    A hold belongs to an owner (the user id) and disappears after ``ttl``
+    seconds. Expired holds are dropped lazily when a session is read, so
+    there is no background sweep.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl or getattr(
+            settings, "SEAT_HOLD_TTL", DEFAULT_SEAT_HOLD_TTL
+        )
+
+    @abstractmethod
+    def hold(self, show_session_id, seats, owner):
+        """Hold all ``seats`` for ``owner`` or none of them.
+
+        Holding a seat the owner already holds extends it. Raises
+        SeatHoldConflict listing the seats held by other owners.
+        """
+
+    @abstractmethod
+    def release(self, show_session_id, seats, owner):
+        """Drop the holds ``owner`` has on ``seats``."""
+
+    @abstractmethod
+    def owners(self, show_session_id, seats):
+        """Return {(row, seat): owner} for the held seats among ``seats``."""
+
+    @abstractmethod
+    def get_holds(self, show_session_id):
+        """Return {(row, seat): owner} for every live hold of a session."""
+
+    def held_counts(self, show_session_ids):
+        """Return {show_session_id: live holds} for sessions with any."""
+        counts = {
+            show_session_id: len(self.get_holds(show_session_id))
+            for show_session_id in set(show_session_ids)
+        }
+        return {
+            show_session_id: count
+            for show_session_id, count in counts.items() if count
+        }
+
+    def conflicts(self, show_session_id, seats, owner):
+        return {
+            seat for seat, seat_owner in self.owners(
+                show_session_id, seats
+            ).items()
+            if seat_owner != owner
+        }
+
+
+class LocMemSeatHoldStore(BaseSeatHoldStore):
+    """Process-local store, meant for tests and single-process setups."""
+
+    def __init__(self, ttl=None):
+        super().__init__(ttl)
+        self._holds = {}
+        self._lock = threading.Lock()
+
+    def _live(self, show_session_id):
+        now = time.monotonic()
+        holds = self._holds.get(show_session_id, {})
+        expired = [
+            seat for seat, (_, expires_at) in holds.items()
+            if expires_at <= now
+        ]
+        for seat in expired:
+            del holds[seat]
+        return holds
+
+    def hold(self, show_session_id, seats, owner):
+        seats = [tuple(seat) for seat in seats]
+        with self._lock:
+            holds = self._live(show_session_id)
+            taken = {
+                seat for seat in seats
+                if seat in holds and holds[seat][0] != owner
+            }
+            if taken:
+                raise SeatHoldConflict(taken)
+
+            expires_at = time.monotonic() + self.ttl
+            session_holds = self._holds.setdefault(show_session_id, holds)
+            for seat in seats:
+                session_holds[seat] = (owner, expires_at)
+
+    def release(self, show_session_id, seats, owner):
+        with self._lock:
+            holds = self._live(show_session_id)
+            for seat in map(tuple, seats):
+                if seat in holds and holds[seat][0] == owner:
+                    del holds[seat]
+
+    def owners(self, show_session_id, seats):
+        with self._lock:
+            holds = self._live(show_session_id)
+            return {
+                seat: holds[seat][0]
+                for seat in map(tuple, seats) if seat in holds
+            }
+
+    def get_holds(self, show_session_id):
+        with self._lock:
+            return {
+                seat: owner
+                for seat, (owner, _) in self._live(show_session_id).items()
+            }
+
+    def clear(self):
+        with self._lock:
+            self._holds.clear()
+
+
+class CacheSeatHoldStore(BaseSeatHoldStore):
+    """Store backed by a shared Django cache (Redis, Memcached, ...).
+
+    Every held seat is its own cache key, claimed with ``cache.add`` so two
+    workers cannot take the same seat, and expired by the cache itself.
+    A per-session index lists the seats that may be held. The cache API has
+    no atomic set update, so the index is only rewritten under a short
+    per-session lock (another ``cache.add`` key); readers prune it only
+    when that lock is free, and never from a stale copy.
+    """
+
+    SEAT_KEY = "planetarium:hold:{show_session_id}:{row}:{seat}"
+    INDEX_KEY = "planetarium:holds:{show_session_id}"
+    LOCK_KEY = "planetarium:holds-lock:{show_session_id}"
+    # Index updates take two cache round trips; the lock expires on its own
+    # if a worker dies while holding it.
+    LOCK_TIMEOUT = 5
+    LOCK_WAIT = 2
+
+    def __init__(self, ttl=None, alias="default"):
+        super().__init__(ttl)
+        self.cache = caches[alias]
+
+    def _seat_key(self, show_session_id, seat):
+        row, seat = seat
+        return self.SEAT_KEY.format(
+            show_session_id=show_session_id, row=row, seat=seat
+        )
+
+    def _index_key(self, show_session_id):
+        return self.INDEX_KEY.format(show_session_id=show_session_id)
+
+    @contextmanager
+    def _index_lock(self, show_session_id, wait):
+        """Yield whether the session's index lock was acquired."""
+        key = self.LOCK_KEY.format(show_session_id=show_session_id)
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + wait
+        delay = 0.001
+        while not self.cache.add(key, token, timeout=self.LOCK_TIMEOUT):
+            if time.monotonic() >= deadline:
+                yield False
+                return
+            time.sleep(delay)
+            delay = min(delay * 2, 0.05)
+        try:
+            yield True
+        finally:
+            # Only drop our own lock, not one taken after ours expired.
+            if self.cache.get(key) == token:
+                self.cache.delete(key)
+
+    def hold(self, show_session_id, seats, owner):
+        seats = [tuple(seat) for seat in seats]
+        acquired = []
+        taken = set()
+        for seat in seats:
+            key = self._seat_key(show_session_id, seat)
+            if self.cache.add(key, owner, timeout=self.ttl):
+                acquired.append(seat)
+            elif self.cache.get(key) == owner:
+                self.cache.touch(key, timeout=self.ttl)
+            else:
+                taken.add(seat)
+
+        if taken:
+            self._drop(show_session_id, acquired)
+            raise SeatHoldConflict(taken)
+
+        with self._index_lock(show_session_id, self.LOCK_WAIT) as locked:
+            if not locked:
+                self._drop(show_session_id, acquired)
+                raise SeatHoldBusy()
+            index_key = self._index_key(show_session_id)
+            index = set(self.cache.get(index_key, ()))
+            index.update(seats)
+            self.cache.set(index_key, index, timeout=self.ttl)
+
+    def _drop(self, show_session_id, seats):
+        self.cache.delete_many([
+            self._seat_key(show_session_id, seat) for seat in seats
+        ])
+
+    def release(self, show_session_id, seats, owner):
+        held = self.owners(show_session_id, seats)
+        self.cache.delete_many([
+            self._seat_key(show_session_id, seat)
+            for seat, seat_owner in held.items() if seat_owner == owner
+        ])
+
+    def owners(self, show_session_id, seats):
+        keys = {
+            self._seat_key(show_session_id, seat): tuple(seat)
+            for seat in seats
+        }
+        return {
+            keys[key]: owner
+            for key, owner in self.cache.get_many(list(keys)).items()
+        }
+
+    def get_holds(self, show_session_id):
+        index_key = self._index_key(show_session_id)
+        index = self.cache.get(index_key)
+        if not index:
+            return {}
+
+        holds = self.owners(show_session_id, index)
+        if len(holds) < len(index):
+            self._prune(show_session_id)
+        return holds
+
+    def _prune(self, show_session_id):
+        with self._index_lock(show_session_id, wait=0) as locked:
+            if not locked:
+                return
+            # Re-read under the lock: seats added since our read must stay.
+            index_key = self._index_key(show_session_id)
+            index = self.cache.get(index_key, ())
+            live = set(self.owners(show_session_id, index))
+            if live:
+                self.cache.set(index_key, live, timeout=self.ttl)
+            else:
+                self.cache.delete(index_key)
+
+    def held_counts(self, show_session_ids):
+        index_keys = {
+            self._index_key(show_session_id): show_session_id
+            for show_session_id in show_session_ids
+        }
+        seat_keys = {}
+        for key, index in self.cache.get_many(list(index_keys)).items():
+            for seat in index:
+                seat_keys[self._seat_key(index_keys[key], seat)] = \
+                    index_keys[key]
+        return dict(Counter(
+            seat_keys[key] for key in self.cache.get_many(list(seat_keys))
+        ))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_seat_hold_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store_class = import_string(getattr(
+                    settings, "SEAT_HOLD_STORE", DEFAULT_SEAT_HOLD_STORE
+                ))
+                _store = store_class()
+    return _store
+
+
+def reset_seat_hold_store(**kwargs):
+    global _store
+    if kwargs.get("setting") in (None, "SEAT_HOLD_STORE", "SEAT_HOLD_TTL"):
+        _store = None
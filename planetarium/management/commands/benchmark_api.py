@@ -0,0 +1,545 @@
+import json
+import re
+import secrets
+import time
+import uuid
+from contextlib import ExitStack
+from unittest import mock
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.views import APIView
+
+from planetarium import async_views
+from planetarium.datagen import USER_EMAIL_PATTERN, generate_dataset
+from planetarium.models import AstronomyShow, PlanetariumDome, Reservation, \
+    ShowSession, ShowTheme, Ticket
+from planetarium.profiling import latency_summary
+
+BENCHMARK_DOME = "Benchmark dome"
+REGISTERED_PREFIX = "benchmark-"
+# Exports stream whole tables; a few requests over one session's rows
+# are enough to see their per-row cost.
+EXPORT_REQUESTS = 5
+# Bytes of each response body kept for parsing; the rest is discarded.
+MAX_KEPT_BODY = 1 << 20
+
+SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+def _drain(chunks):
+    """Consume a response body, keeping at most MAX_KEPT_BODY bytes."""
+    kept = bytearray()
+    for chunk in chunks:
+        if len(kept) < MAX_KEPT_BODY:
+            kept += chunk[:MAX_KEPT_BODY - len(kept)]
+    return bytes(kept)
+
+
+class InProcessTransport:
+    """Requests through Django's test client; SQL counted per request."""
+
+    def __init__(self):
+        self.client = Client(HTTP_HOST="localhost")
+
+    def request(self, method, path, data, headers):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.generic(
+                method,
+                path,
+                json.dumps(data) if data is not None else "",
+                content_type="application/json",
+                headers=headers,
+            )
+            body = _drain(
+                response.streaming_content
+                if response.streaming else (response.content, )
+            )
+            response.close()
+        return response.status_code, body, len(queries)
+
+
+class HttpTransport:
+    """Requests against a running server; SQL read from Server-Timing."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    def request(self, method, path, data, headers):
+        request = Request(
+            self.base_url + path,
+            data=json.dumps(data).encode() if data is not None else None,
+            headers={"Content-Type": "application/json", **headers},
+            method=method,
+        )
+        try:
+            with urlopen(request) as response:
+                return self._result(response, response.status)
+        except HTTPError as exc:
+            return self._result(exc, exc.code)
+
+    def _result(self, response, status):
+        body = _drain(iter(lambda: response.read(64 * 1024), b""))
+        match = SERVER_TIMING_QUERIES.search(
+            response.headers.get("Server-Timing", "")
+        )
+        return status, body, int(match.group(1)) if match else None
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every planetarium and user API endpoint: throughput, "
+        "p50/p95/p99 latency and SQL queries per request. Runs in-process "
+        "through the test client, or against --base-url. Optionally seeds "
+        "a generated dataset first and saves results as JSON. Write "
+        "endpoints change data, so it refuses to run on a database with "
+        "accounts that generate_data did not create."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--generate", action="store_true",
+            help="Generate a dataset before benchmarking (see sizes below, "
+                 "or use manage.py generate_data for more control).",
+        )
+        parser.add_argument("--domes", type=int, default=50)
+        parser.add_argument("--themes", type=int, default=40)
+        parser.add_argument("--shows", type=int, default=5000)
+        parser.add_argument("--sessions", type=int, default=200_000)
+        parser.add_argument("--users", type=int, default=10_000)
+        parser.add_argument("--tickets", type=int, default=20_000_000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--requests", type=int, default=100,
+            help="Measured requests per endpoint.",
+        )
+        parser.add_argument(
+            "--warmup", type=int, default=5,
+            help="Unmeasured requests per endpoint before measuring.",
+        )
+        parser.add_argument(
+            "--endpoint", action="append", dest="endpoints",
+            help="Only run endpoints with this name (repeatable).",
+        )
+        parser.add_argument(
+            "--base-url",
+            help="Benchmark a running server instead of the test client.",
+        )
+        parser.add_argument(
+            "--email", help="Staff account to benchmark as.",
+        )
+        parser.add_argument("--password")
+        parser.add_argument(
+            "--create-user", action="store_true",
+            help="Benchmark as a temporary staff account created for this "
+                 "run and deleted afterwards, instead of --email.",
+        )
+        parser.add_argument(
+            "--exports", action="store_true",
+            help=f"Include the CSV exports, limited to one session's rows "
+                 f"and at most {EXPORT_REQUESTS} requests each.",
+        )
+        parser.add_argument(
+            "--throttle", action="store_true",
+            help="Keep DRF throttling enabled for in-process runs.",
+        )
+        parser.add_argument("--output", help="Write results to this file.")
+        parser.add_argument(
+            "--compare", help="Earlier results file to print changes against."
+        )
+        parser.add_argument("--label", default="", help="Stored in results.")
+
+    def handle(self, *args, **options):
+        if options["create_user"] == bool(options["email"]):
+            raise CommandError(
+                "Pass --email and --password of a staff account, or "
+                "--create-user."
+            )
+        if options["email"] and not options["password"]:
+            raise CommandError("--email needs --password.")
+
+        if options["generate"]:
+            created = generate_dataset(
+                domes=options["domes"],
+                themes=options["themes"],
+                shows=options["shows"],
+                sessions=options["sessions"],
+                users=options["users"],
+                tickets=options["tickets"],
+                seed=options["seed"],
+                log=self.stdout.write,
+            )
+            self.stdout.write(f"Generated {created}")
+
+        self.check_dataset(options["email"])
+        if options["create_user"]:
+            self.email = f"{REGISTERED_PREFIX}{uuid.uuid4().hex}@example.com"
+            self.password = secrets.token_urlsafe()
+            get_user_model().objects.create_user(
+                email=self.email, password=self.password, is_staff=True
+            )
+        else:
+            self.email, self.password = options["email"], options["password"]
+        try:
+            self.benchmark(options)
+        finally:
+            get_user_model().objects.filter(
+                email__startswith=REGISTERED_PREFIX
+            ).delete()
+
+    def benchmark(self, options):
+        fixtures = self.prepare_fixtures()
+        self.tokens = {}
+        if options["base_url"]:
+            transport = HttpTransport(options["base_url"])
+        else:
+            transport = InProcessTransport()
+
+        endpoints = self.endpoints(fixtures, options["exports"])
+        if options["endpoints"]:
+            endpoints = [
+                endpoint for endpoint in endpoints
+                if endpoint[0] in options["endpoints"]
+            ]
+
+        throttles = ExitStack()
+        if not (options["base_url"] or options["throttle"]):
+            throttles.enter_context(mock.patch.object(
+                APIView, "check_throttles", lambda self, request: None
+            ))
+            throttles.enter_context(mock.patch.object(
+                async_views, "_check_throttles", lambda request: None
+            ))
+
+        results = []
+        self.stdout.write(
+            f"{'endpoint':<24}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}"
+            f"{'p99 ms':>9}{'queries':>9}{'errors':>8}"
+        )
+        with throttles:
+            for name, method, path, data, expected in endpoints:
+                # A fresh token per endpoint outlives ACCESS_TOKEN_LIFETIME
+                # on long runs.
+                headers = {
+                    "Authorization":
+                        f"Bearer {self.token(transport)['access']}"
+                }
+                requests = options["requests"]
+                if name.endswith("-export"):
+                    requests = min(requests, EXPORT_REQUESTS)
+                result = self.run_endpoint(
+                    transport, method, path, data, expected, headers,
+                    options["warmup"], requests,
+                )
+                result.update(name=name, method=method, path=path)
+                results.append(result)
+                self.stdout.write(
+                    f"{name:<24}{result['rps']:>9.1f}{result['p50_ms']:>9.1f}"
+                    f"{result['p95_ms']:>9.1f}{result['p99_ms']:>9.1f}"
+                    f"{self.format_queries(result):>9}{result['errors']:>8}"
+                )
+                if result["errors"]:
+                    self.stderr.write(
+                        f"{name}: {result['errors']} of {requests} "
+                        f"responses were not {expected} (got "
+                        f"{', '.join(map(str, result['statuses']))}); "
+                        f"its timings are not comparable."
+                    )
+
+        report = {
+            "label": options["label"],
+            "started_at": timezone.now().isoformat(),
+            "mode": "http" if options["base_url"] else "in-process",
+            "base_url": options["base_url"],
+            "requests": options["requests"],
+            "dataset": self.dataset_size(),
+            "endpoints": results,
+        }
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+        if options["compare"]:
+            self.compare(report, options["compare"])
+
+        failed = [result["name"] for result in results if result["errors"]]
+        if failed:
+            raise CommandError(
+                f"Unexpected status codes from: {', '.join(failed)}."
+            )
+
+    def run_endpoint(
+        self, transport, method, path, data, expected, headers, warmup,
+        requests,
+    ):
+        for _ in range(warmup):
+            transport.request(method, path, data(), headers)
+
+        latencies, errors, queries = [], [], []
+        for _ in range(requests):
+            payload = data()
+            started = time.perf_counter()
+            status, body, count = transport.request(
+                method, path, payload, headers
+            )
+            latencies.append(time.perf_counter() - started)
+            if status != expected:
+                errors.append(status)
+            if count is not None:
+                queries.append(count)
+
+        result = latency_summary(latencies, errors, sum(latencies))
+        result["queries"] = max(queries) if queries else None
+        result["queries_min"] = min(queries) if queries else None
+        result["statuses"] = sorted(set(errors))
+        return result
+
+    @staticmethod
+    def format_queries(result):
+        if result["queries"] is None:
+            return "-"
+        if result["queries"] == result["queries_min"]:
+            return str(result["queries"])
+        return f"{result['queries_min']}-{result['queries']}"
+
+    def check_dataset(self, email):
+        """Refuse to write to a database that holds real accounts."""
+        others = get_user_model().objects.exclude(
+            email__regex=USER_EMAIL_PATTERN
+        ).exclude(email__startswith=REGISTERED_PREFIX)
+        if email:
+            others = others.exclude(email=email)
+        found = list(others.values_list("email", flat=True)[:3])
+        if found:
+            raise CommandError(
+                "The benchmark deletes tickets and updates domes and "
+                "themes, so it only runs on data from generate_data. "
+                f"Found other accounts: {', '.join(found)}."
+            )
+
+    def prepare_fixtures(self):
+        show = AstronomyShow.objects.order_by("pk").first()
+        theme = ShowTheme.objects.order_by("pk").first()
+        if show is None or theme is None:
+            raise CommandError(
+                "No shows or themes to benchmark; run with --generate."
+            )
+
+        # A dedicated session for reservation and hold writes, emptied on
+        # every run so there are always free seats.
+        dome, _ = PlanetariumDome.objects.get_or_create(
+            name=BENCHMARK_DOME, defaults={"rows": 100, "seats_in_row": 100}
+        )
+        write_session, _ = ShowSession.objects.get_or_create(
+            planetarium_dome=dome,
+            defaults={"astronomy_show": show, "show_time": timezone.now()},
+        )
+        write_session.tickets.all().delete()
+
+        session = (
+            ShowSession.objects.exclude(pk=write_session.pk)
+            .order_by("-tickets_sold", "pk").first()
+        ) or write_session
+        reservation = Reservation.objects.order_by("pk").first()
+        return {
+            "reservation_user": reservation.user_id if reservation else None,
+            "dome": dome.pk,
+            "theme": theme,
+            "show": show.pk,
+            "show_title": show.title.split()[0],
+            "session": session.pk,
+            "write_session": write_session.pk,
+            "write_dome": dome,
+            "reservation": reservation.pk if reservation else None,
+        }
+
+    def endpoints(self, fixtures, exports=False):
+        """``(name, method, path, data factory, expected status)`` tuples."""
+        seats = (
+            {"row": row, "seat": seat}
+            for row in range(1, fixtures["write_dome"].rows + 1)
+            for seat in range(1, fixtures["write_dome"].seats_in_row + 1)
+        )
+
+        def reservation():
+            return {"tickets": [
+                {"show_session": fixtures["write_session"], **next(seats)}
+            ]}
+
+        def dome_update():
+            return {
+                "name": BENCHMARK_DOME,
+                "rows": fixtures["write_dome"].rows,
+                "seats_in_row": fixtures["write_dome"].seats_in_row,
+            }
+
+        def theme_update():
+            return {"name": fixtures["theme"].name}
+
+        def hold():
+            # The last seat, which reservation-create does not reach.
+            return {"seats": [{
+                "row": fixtures["write_dome"].rows,
+                "seat": fixtures["write_dome"].seats_in_row,
+            }]}
+
+        def register():
+            return {
+                "email": f"{REGISTERED_PREFIX}{uuid.uuid4().hex}@example.com",
+                "password": secrets.token_urlsafe(),
+            }
+
+        def credentials():
+            return {"email": self.email, "password": self.password}
+
+        def none():
+            return None
+
+        def refresh():
+            return {"refresh": self.tokens["refresh"]}
+
+        def verify():
+            return {"token": self.tokens["access"]}
+
+        def url(name, *args, query=""):
+            return reverse(name, args=args) + query
+
+        endpoints = [
+            ("dome-list", "GET", url("planetarium:planetariumdome-list")),
+            ("theme-list", "GET", url("planetarium:showtheme-list")),
+            ("show-list", "GET", url("planetarium:astronomyshow-list")),
+            ("show-search", "GET", url(
+                "planetarium:astronomyshow-list",
+                query=f"?search={fixtures['show_title']}",
+            )),
+            ("show-detail", "GET",
+             url("planetarium:astronomyshow-detail", fixtures["show"])),
+            ("session-list", "GET", url("planetarium:showsession-list")),
+            ("session-detail", "GET",
+             url("planetarium:showsession-detail", fixtures["session"])),
+            ("session-seat-map", "GET",
+             url("planetarium:showsession-seat-map", fixtures["session"])),
+            ("async-session-list", "GET",
+             url("planetarium:async-showsession-list")),
+            ("async-session-detail", "GET",
+             url("planetarium:async-showsession-detail", fixtures["session"])),
+            ("async-seat-map", "GET", url(
+                "planetarium:async-showsession-seat-map", fixtures["session"]
+            )),
+            ("reservation-list", "GET", url("planetarium:reservation-list")),
+            ("ticket-list", "GET", url("planetarium:ticket-list")),
+            ("autocomplete", "GET", url(
+                "planetarium:autocomplete",
+                query=f"?q={fixtures['show_title'][:3]}",
+            )),
+            ("stats", "GET", url("planetarium:stats")),
+            ("user-me", "GET", url("user:manage")),
+        ]
+        endpoints = [(*endpoint, none, 200) for endpoint in endpoints]
+        if fixtures["reservation"]:
+            endpoints.append((
+                "reservation-detail", "GET",
+                url("planetarium:reservation-detail",
+                    fixtures["reservation"]),
+                none, 200,
+            ))
+        endpoints += [
+            ("dome-update", "PUT", url(
+                "planetarium:planetariumdome-detail", fixtures["dome"]
+            ), dome_update, 200),
+            ("theme-update", "PUT", url(
+                "planetarium:showtheme-detail", fixtures["theme"].pk
+            ), theme_update, 200),
+            ("reservation-create", "POST", url("planetarium:reservation-list"),
+             reservation, 201),
+            ("session-hold", "POST", url(
+                "planetarium:showsession-holds", fixtures["write_session"]
+            ), hold, 201),
+            ("session-release", "DELETE", url(
+                "planetarium:showsession-holds", fixtures["write_session"]
+            ), none, 204),
+            ("user-register", "POST", url("user:create"), register, 201),
+            ("token-obtain", "POST", url("user:token_obtain_pair"),
+             credentials, 200),
+            ("token-refresh", "POST", url("user:token_refresh"),
+             refresh, 200),
+            ("token-verify", "POST", url("user:token_verify"), verify, 200),
+        ]
+        if exports:
+            endpoints.append((
+                "ticket-export", "GET", url(
+                    "planetarium:ticket-export",
+                    query=f"?show_sessions={fixtures['session']}",
+                ), none, 200,
+            ))
+            if fixtures["reservation_user"]:
+                endpoints.append((
+                    "reservation-export", "GET", url(
+                        "planetarium:reservation-export",
+                        query=f"?user={fixtures['reservation_user']}",
+                    ), none, 200,
+                ))
+        return endpoints
+
+    def token(self, transport):
+        status, body, _ = transport.request(
+            "POST",
+            reverse("user:token_obtain_pair"),
+            {"email": self.email, "password": self.password},
+            {},
+        )
+        if status != 200:
+            raise CommandError(f"Could not obtain a token ({status}).")
+        self.tokens.update(json.loads(body))
+        return self.tokens
+
+    def dataset_size(self):
+        return {
+            "domes": PlanetariumDome.objects.count(),
+            "themes": ShowTheme.objects.count(),
+            "shows": AstronomyShow.objects.count(),
+            "sessions": ShowSession.objects.count(),
+            "users": get_user_model().objects.count(),
+            "reservations": Reservation.objects.count(),
+            "tickets": Ticket.objects.count(),
+        }
+
+    def compare(self, report, path):
+        with open(path) as previous_file:
+            previous = {
+                result["name"]: result
+                for result in json.load(previous_file)["endpoints"]
+            }
+        self.stdout.write(
+            f"\nChanges against {path}:\n"
+            f"{'endpoint':<24}{'req/s':>9}{'p95':>9}{'queries':>9}"
+        )
+        for result in report["endpoints"]:
+            before = previous.get(result["name"])
+            if before is None:
+                continue
+            self.stdout.write(
+                f"{result['name']:<24}"
+                f"{self.change(before['rps'], result['rps']):>9}"
+                f"{self.change(before['p95_ms'], result['p95_ms']):>9}"
+                f"{self.query_change(before, result):>9}"
+            )
+
+    @staticmethod
+    def change(before, after):
+        if not before:
+            return "-"
+        return f"{(after - before) / before:+.0%}"
+
+    @staticmethod
+    def query_change(before, after):
+        if before["queries"] is None or after["queries"] is None:
+            return "-"
+        return f"{after['queries'] - before['queries']:+d}"
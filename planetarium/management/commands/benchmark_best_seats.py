@@ -0,0 +1,104 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from planetarium.seat_map import find_best_seats, mark_held_seats
+
+
+def scan_best_seats(seat_map, count):
+    """Per-seat reference search the bitmask version is measured against."""
+    rows, seats_in_row, bitmap = seat_map
+    best = None
+    for row in range(1, rows + 1):
+        run = 0
+        for seat in range(1, seats_in_row + 1):
+            index = (row - 1) * seats_in_row + seat - 1
+            if bitmap[index >> 3] & (0x80 >> (index & 7)):
+                run = 0
+                continue
+            run += 1
+            if run >= count:
+                first = seat - count + 1
+                score = (
+                    (2 * row - rows - 1) ** 2
+                    + (2 * first + count - seats_in_row - 2) ** 2
+                )
+                if best is None or score < best[0]:
+                    best = (score, row, first)
+    if best is None:
+        return None
+    score, row, first = best
+    return row, first, score ** 0.5 / 2
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark the bitmask best-seats search against a per-seat "
+        "scan on random seat maps."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=40)
+        parser.add_argument("--seats-in-row", type=int, default=50)
+        parser.add_argument(
+            "--occupancy",
+            default="0,0.5,0.9,0.98",
+            help="Comma-separated fractions of seats taken.",
+        )
+        parser.add_argument("--count", type=int, default=4)
+        parser.add_argument(
+            "--maps", type=int, default=50,
+            help="Random seat maps per occupancy.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rows, seats_in_row = options["rows"], options["seats_in_row"]
+        count = options["count"]
+        if not 1 <= count <= seats_in_row:
+            raise CommandError("--count must fit in one row.")
+        try:
+            occupancies = [
+                float(value) for value in options["occupancy"].split(",")
+            ]
+        except ValueError:
+            raise CommandError("--occupancy takes comma-separated numbers.")
+
+        rng = random.Random(options["seed"])
+        empty = (rows, seats_in_row, bytes((rows * seats_in_row + 7) // 8))
+        self.stdout.write(
+            f"{rows} x {seats_in_row} seats, blocks of {count}\n"
+            f"{'occupancy':>10}{'bitmask us':>12}{'scan us':>12}"
+            f"{'speedup':>9}"
+        )
+        for occupancy in occupancies:
+            seat_maps = [
+                mark_held_seats(empty, [
+                    (row, seat)
+                    for row in range(1, rows + 1)
+                    for seat in range(1, seats_in_row + 1)
+                    if rng.random() < occupancy
+                ])
+                for _ in range(options["maps"])
+            ]
+
+            timings = []
+            for search in (find_best_seats, scan_best_seats):
+                started = time.perf_counter()
+                results = [search(seat_map, count) for seat_map in seat_maps]
+                timings.append(
+                    (time.perf_counter() - started) / len(seat_maps) * 1e6
+                )
+                if search is find_best_seats:
+                    expected = results
+                elif results != expected:
+                    raise CommandError(
+                        "Bitmask and scan searches disagree."
+                    )
+
+            bitmask, scan = timings
+            self.stdout.write(
+                f"{occupancy:>10.2f}{bitmask:>12.1f}{scan:>12.1f}"
+                f"{scan / bitmask:>8.1f}x"
+            )
@@ -0,0 +1,152 @@
+import json
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import AccessToken
+
+from planetarium.compression import BROTLI_QUALITY, GZIP_LEVEL, brotli, \
+    compress
+from planetarium.datagen import generate_dataset
+from planetarium.renderers import FastJSONRenderer, orjson
+
+BENCHMARK_EMAIL = "benchmark@example.com"
+
+ENDPOINTS = {
+    "session-list": "planetarium:showsession-list",
+    "ticket-list": "planetarium:ticket-list",
+    "show-list": "planetarium:astronomyshow-list",
+    "reservation-list": "planetarium:reservation-list",
+}
+
+
+def _time_per_call(function, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return result, (time.perf_counter() - started) / repeat * 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare response size on the wire (identity, gzip, brotli) and "
+        "JSON render time (stdlib vs orjson) for the large list endpoints."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--generate", action="store_true",
+            help="Generate a dataset first (see manage.py generate_data).",
+        )
+        parser.add_argument("--sessions", type=int, default=2000)
+        parser.add_argument("--tickets", type=int, default=100_000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--page-size", type=int, default=100,
+            help="Rows per response (the API allows at most 100).",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=50,
+            help="Renders and compressions timed per endpoint.",
+        )
+        parser.add_argument(
+            "--endpoint", action="append", dest="endpoints",
+            choices=list(ENDPOINTS),
+            help="Only run this endpoint (repeatable).",
+        )
+        parser.add_argument("--output", help="Write results to this file.")
+
+    def handle(self, *args, **options):
+        if options["generate"]:
+            created = generate_dataset(
+                sessions=options["sessions"],
+                tickets=options["tickets"],
+                seed=options["seed"],
+                log=self.stdout.write,
+            )
+            self.stdout.write(f"Generated {created}")
+
+        user, _ = get_user_model().objects.get_or_create(
+            email=BENCHMARK_EMAIL, defaults={"is_staff": True}
+        )
+        client = Client(
+            HTTP_HOST="localhost",
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}",
+        )
+        repeat = options["repeat"]
+        encodings = ["gzip", *(["br"] if brotli is not None else [])]
+        self.stdout.write(
+            f"JSON renderer: {'orjson' if orjson else 'stdlib (no orjson)'}"
+            f"; gzip level {GZIP_LEVEL}"
+            + (f", brotli quality {BROTLI_QUALITY}" if brotli else
+               "; brotli not installed")
+        )
+        self.stdout.write(
+            f"{'endpoint':<18}{'rows':>6}{'json B':>9}"
+            + "".join(f"{encoding + ' B':>9}" for encoding in encodings)
+            + f"{'stdlib ms':>11}{'fast ms':>9}{'speedup':>9}"
+            + "".join(f"{encoding + ' ms':>9}" for encoding in encodings)
+        )
+
+        results = []
+        for name in options["endpoints"] or ENDPOINTS:
+            # Throttling is not what is measured here.
+            with mock.patch.object(
+                APIView, "check_throttles", lambda self, request: None
+            ):
+                response = client.get(
+                    reverse(ENDPOINTS[name]),
+                    {"page_size": options["page_size"]},
+                )
+            if response.status_code != 200:
+                raise CommandError(
+                    f"{name} returned {response.status_code}."
+                )
+            data = response.data
+
+            stdlib, stdlib_ms = _time_per_call(
+                lambda: JSONRenderer().render(data), repeat
+            )
+            fast, fast_ms = _time_per_call(
+                lambda: FastJSONRenderer().render(data), repeat
+            )
+            if json.loads(stdlib) != json.loads(fast):
+                raise CommandError(f"Renderers disagree on {name}.")
+
+            result = {
+                "name": name,
+                "rows": len(data.get("results", data)),
+                "json_bytes": len(fast),
+                "stdlib_ms": round(stdlib_ms, 3),
+                "fast_ms": round(fast_ms, 3),
+            }
+            for encoding in encodings:
+                compressed, compress_ms = _time_per_call(
+                    lambda: compress(fast, encoding), repeat
+                )
+                result[f"{encoding}_bytes"] = len(compressed)
+                result[f"{encoding}_ms"] = round(compress_ms, 3)
+            results.append(result)
+
+            self.stdout.write(
+                f"{name:<18}{result['rows']:>6}{result['json_bytes']:>9}"
+                + "".join(
+                    f"{result[encoding + '_bytes']:>9}"
+                    for encoding in encodings
+                )
+                + f"{stdlib_ms:>11.2f}{fast_ms:>9.2f}"
+                f"{stdlib_ms / fast_ms:>8.1f}x"
+                + "".join(
+                    f"{result[encoding + '_ms']:>9.2f}"
+                    for encoding in encodings
+                )
+            )
+
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump({"endpoints": results}, file, indent=2)
@@ -0,0 +1,74 @@
+import pickle
+import time
+import uuid
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+from rest_framework.throttling import UserRateThrottle
+
+from planetarium.throttling import SlidingWindowUserRateThrottle
+
+THROTTLES = (
+    ("drf history", UserRateThrottle),
+    ("sliding window", SlidingWindowUserRateThrottle),
+)
+
+
+def _keys(throttle, request):
+    """Cache keys either throttle may have written for ``request``."""
+    key = throttle.get_cache_key(request, None)
+    window = int(throttle.timer() // throttle.duration)
+    return [key, f"{key}:{window - 1}", f"{key}:{window}"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark DRF's timestamp-history throttle against the "
+        "sliding-window counter throttle on the configured cache."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rate", default="1000/day")
+        parser.add_argument(
+            "--requests", type=int, default=5000,
+            help="Throttle checks per user.",
+        )
+        parser.add_argument("--users", type=int, default=10)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'throttle':<16}{'us/check':>10}{'allowed':>10}"
+            f"{'bytes/user':>12}"
+        )
+        for name, base in THROTTLES:
+            throttle_class = type("BenchmarkThrottle", (base,), {
+                "rate": options["rate"],
+                "scope": f"benchmark-{uuid.uuid4().hex}",
+            })
+            requests = [
+                SimpleNamespace(
+                    method="GET",
+                    user=SimpleNamespace(is_authenticated=True, pk=user_id),
+                    META={},
+                )
+                for user_id in range(options["users"])
+            ]
+
+            allowed = 0
+            started = time.perf_counter()
+            for _ in range(options["requests"]):
+                for request in requests:
+                    allowed += throttle_class().allow_request(request, None)
+            elapsed = time.perf_counter() - started
+
+            checks = options["requests"] * len(requests)
+            throttle = throttle_class()
+            stored = throttle.cache.get_many(_keys(throttle, requests[0]))
+            size = sum(len(pickle.dumps(value)) for value in stored.values())
+            for request in requests:
+                throttle.cache.delete_many(_keys(throttle, request))
+
+            self.stdout.write(
+                f"{name:<16}{elapsed / checks * 1e6:>10.1f}"
+                f"{allowed:>10}{size:>12}"
+            )
@@ -0,0 +1,104 @@
+import time
+from datetime import datetime, time as datetime_time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from planetarium.datagen import generate_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a coherent synthetic dataset: domes, themes, shows with "
+        "themes, sessions on non-overlapping dome schedules, users, "
+        "reservations and seat-unique tickets. Output is deterministic for "
+        "a given --seed and --start."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--domes", type=int, default=50)
+        parser.add_argument("--themes", type=int, default=40)
+        parser.add_argument("--shows", type=int, default=5000)
+        parser.add_argument("--sessions", type=int, default=200_000)
+        parser.add_argument("--users", type=int, default=10_000)
+        parser.add_argument(
+            "--tickets", type=int, default=1_000_000,
+            help="Approximate total; sessions are never oversold.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--start",
+            help="First session time (ISO 8601). Defaults to a schedule "
+                 "centred on now.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10_000,
+            help="Rows per COPY or INSERT batch, and sessions per "
+                 "transaction.",
+        )
+        parser.add_argument(
+            "--method",
+            choices=("auto", "bulk", "copy"),
+            default="auto",
+            help="Insert with executemany or PostgreSQL COPY "
+                 "(auto picks COPY on PostgreSQL).",
+        )
+
+        parser.add_argument(
+            "--password",
+            help="Password for every generated user. Without it users get "
+                 "unusable passwords and cannot log in.",
+        )
+
+    def handle(self, *args, **options):
+        if options["method"] == "copy" and connection.vendor != "postgresql":
+            raise CommandError("COPY is only available on PostgreSQL.")
+
+        start = None
+        if options["start"]:
+            start = parse_datetime(options["start"])
+            if start is None:
+                try:
+                    start = datetime.combine(
+                        datetime.fromisoformat(options["start"]).date(),
+                        datetime_time(),
+                    )
+                except ValueError:
+                    raise CommandError(
+                        f"Invalid --start {options['start']!r}."
+                    )
+            if timezone.is_naive(start):
+                start = timezone.make_aware(start)
+
+        started = time.perf_counter()
+
+        def log(message):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"[{elapsed:7.1f}s] {message}")
+
+        created = generate_dataset(
+            domes=options["domes"],
+            themes=options["themes"],
+            shows=options["shows"],
+            sessions=options["sessions"],
+            users=options["users"],
+            tickets=options["tickets"],
+            seed=options["seed"],
+            start=start,
+            batch_size=options["batch_size"],
+            method=options["method"],
+            password=options["password"],
+            log=log,
+        )
+
+        elapsed = time.perf_counter() - started
+        rows = sum(created.values())
+        self.stdout.write(self.style.SUCCESS(
+            ", ".join(f"{count} {name}" for name, count in created.items())
+            + f".\nInserted {rows} rows in {elapsed:.2f}s "
+            f"({rows / max(elapsed, 1e-9):,.0f} rows/s)."
+        ))
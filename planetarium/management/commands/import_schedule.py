@@ -0,0 +1,247 @@
+import csv
+import io
+import json
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from planetarium.models import AstronomyShow, PlanetariumDome, ShowSession
+from planetarium.pg_copy import copy_from
+
+MAX_REPORTED_ERRORS = 20
+
+
+class Command(BaseCommand):
+    help = (
+        "Import show sessions from a CSV or JSON file. Each record needs "
+        "astronomy_show (id or title), planetarium_dome (id or name) and "
+        "show_time (ISO 8601)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSON file to import.")
+        parser.add_argument(
+            "--format",
+            choices=("csv", "json"),
+            help="Input format; guessed from the file extension if omitted.",
+        )
+        parser.add_argument(
+            "--min-gap",
+            type=int,
+            default=60,
+            help="Minimum minutes between two sessions in the same dome.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows per bulk_create batch.",
+        )
+        parser.add_argument(
+            "--method",
+            choices=("auto", "bulk", "copy"),
+            default="auto",
+            help="Insert with bulk_create or PostgreSQL COPY "
+                 "(auto picks COPY on PostgreSQL).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate the file and report conflicts without inserting.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        records = self.read_records(options["path"], options["format"])
+        self.stdout.write(f"Read {len(records)} records.")
+
+        sessions, errors = self.resolve(records)
+        errors += self.find_conflicts(
+            sessions, timedelta(minutes=options["min_gap"])
+        )
+        if errors:
+            shown = "\n".join(errors[:MAX_REPORTED_ERRORS])
+            more = len(errors) - MAX_REPORTED_ERRORS
+            if more > 0:
+                shown += f"\n... and {more} more"
+            raise CommandError(
+                f"{len(errors)} problems found, nothing imported:\n{shown}"
+            )
+
+        if options["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(
+                f"Dry run: {len(sessions)} show sessions are valid."
+            ))
+            return
+
+        method = options["method"]
+        if method == "auto":
+            method = "copy" if connection.vendor == "postgresql" else "bulk"
+        if method == "copy" and connection.vendor != "postgresql":
+            raise CommandError("COPY is only available on PostgreSQL.")
+
+        with transaction.atomic():
+            if method == "copy":
+                self.copy(sessions)
+            else:
+                self.bulk_create(sessions, options["batch_size"], started)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {len(sessions)} show sessions in {elapsed:.2f}s "
+            f"({len(sessions) / max(elapsed, 1e-9):,.0f} rows/s)."
+        ))
+
+    def read_records(self, path, input_format):
+        path = Path(path)
+        input_format = input_format or path.suffix.lstrip(".").lower()
+        try:
+            with path.open(newline="", encoding="utf-8") as file:
+                if input_format == "json":
+                    records = json.load(file)
+                elif input_format == "csv":
+                    records = list(csv.DictReader(file))
+                else:
+                    raise CommandError(
+                        f"Cannot guess the format of {path}; use --format."
+                    )
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Cannot read {path}: {exc}")
+
+        if not isinstance(records, list):
+            raise CommandError("JSON input must be a list of objects.")
+        return records
+
+    @staticmethod
+    def _lookup(model, name_field):
+        """Map both ids and names to ids with a single query."""
+        lookup = {}
+        for pk, name in model.objects.values_list("pk", name_field):
+            lookup[str(pk)] = pk
+            lookup.setdefault(name.strip().casefold(), pk)
+        return lookup
+
+    def resolve(self, records):
+        shows = self._lookup(AstronomyShow, "title")
+        domes = self._lookup(PlanetariumDome, "name")
+        current_timezone = timezone.get_current_timezone()
+
+        sessions, errors = [], []
+        for number, record in enumerate(records, start=1):
+            show_key = str(record.get("astronomy_show", "")).strip()
+            dome_key = str(record.get("planetarium_dome", "")).strip()
+            show_id = shows.get(show_key) or shows.get(show_key.casefold())
+            dome_id = domes.get(dome_key) or domes.get(dome_key.casefold())
+            try:
+                show_time = parse_datetime(str(record.get("show_time", "")))
+            except ValueError:
+                show_time = None
+
+            if show_id is None:
+                errors.append(
+                    f"Record {number}: unknown astronomy show {show_key!r}."
+                )
+            if dome_id is None:
+                errors.append(
+                    f"Record {number}: unknown planetarium dome {dome_key!r}."
+                )
+            if show_time is None:
+                errors.append(
+                    f"Record {number}: invalid show_time "
+                    f"{record.get('show_time')!r}."
+                )
+            if show_id is None or dome_id is None or show_time is None:
+                continue
+
+            if timezone.is_naive(show_time):
+                show_time = timezone.make_aware(show_time, current_timezone)
+            sessions.append(ShowSession(
+                astronomy_show_id=show_id,
+                planetarium_dome_id=dome_id,
+                show_time=show_time,
+            ))
+        return sessions, errors
+
+    def find_conflicts(self, sessions, min_gap):
+        """Check every dome's new and existing sessions are min_gap apart.
+
+        Existing sessions are loaded with one query covering the imported
+        time span of all affected domes.
+        """
+        if not sessions:
+            return []
+
+        times = [session.show_time for session in sessions]
+        existing = ShowSession.objects.filter(
+            planetarium_dome_id__in={
+                session.planetarium_dome_id for session in sessions
+            },
+            show_time__gt=min(times) - min_gap,
+            show_time__lt=max(times) + min_gap,
+        ).values_list("planetarium_dome_id", "show_time")
+
+        scheduled = {}
+        for dome_id, show_time in existing:
+            scheduled.setdefault(dome_id, []).append((show_time, None))
+        for number, session in enumerate(sessions, start=1):
+            scheduled.setdefault(session.planetarium_dome_id, []).append(
+                (session.show_time, number)
+            )
+
+        errors = []
+        for dome_id, slots in scheduled.items():
+            # Once sorted, the closest sessions are the direct neighbours.
+            slots.sort(key=lambda slot: slot[0])
+            for index, (show_time, number) in enumerate(slots):
+                if number is None:
+                    continue
+                neighbours = slots[max(index - 1, 0):index] \
+                    + slots[index + 1:index + 2]
+                if any(
+                    abs(other - show_time) < min_gap
+                    for other, _ in neighbours
+                ):
+                    errors.append(
+                        f"Record {number}: dome {dome_id} has another "
+                        f"session within {min_gap} of "
+                        f"{show_time.isoformat()}."
+                    )
+        return errors
+
+    def bulk_create(self, sessions, batch_size, started):
+        for offset in range(0, len(sessions), batch_size):
+            batch = sessions[offset:offset + batch_size]
+            ShowSession.objects.bulk_create(batch, batch_size=batch_size)
+            done = offset + len(batch)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"Inserted {done}/{len(sessions)} "
+                f"({done / max(elapsed, 1e-9):,.0f} rows/s)"
+            )
+
+    def copy(self, sessions):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for session in sessions:
+            writer.writerow((
+                session.astronomy_show_id,
+                session.planetarium_dome_id,
+                session.show_time.isoformat(),
+                0,
+            ))
+        buffer.seek(0)
+
+        table = connection.ops.quote_name(ShowSession._meta.db_table)
+        with connection.cursor() as cursor:
+            copy_from(
+                cursor,
+                f"COPY {table} (astronomy_show_id, planetarium_dome_id, "
+                f"show_time, tickets_sold) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+        self.stdout.write(f"Copied {len(sessions)} rows.")
@@ -0,0 +1,159 @@
+import asyncio
+import json
+import ssl
+import time
+from urllib.parse import urlsplit
+from urllib.request import Request, urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from planetarium.profiling import latency_summary
+
+ENDPOINTS = (
+    (
+        "list",
+        ("planetarium:showsession-list", ()),
+        ("planetarium:async-showsession-list", ()),
+    ),
+    (
+        "detail",
+        ("planetarium:showsession-detail", ("pk",)),
+        ("planetarium:async-showsession-detail", ("pk",)),
+    ),
+    (
+        "seat-map",
+        ("planetarium:showsession-seat-map", ("pk",)),
+        ("planetarium:async-showsession-seat-map", ("pk",)),
+    ),
+)
+
+
+async def _get(url, headers):
+    parts = urlsplit(url)
+    secure = parts.scheme == "https"
+    reader, writer = await asyncio.open_connection(
+        parts.hostname,
+        parts.port or (443 if secure else 80),
+        ssl=ssl.create_default_context() if secure else None,
+    )
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    request = [f"GET {path} HTTP/1.1", f"Host: {parts.netloc}"]
+    request += [f"{name}: {value}" for name, value in headers.items()]
+    request += ["Connection: close", "", ""]
+    try:
+        writer.write("\r\n".join(request).encode("latin-1"))
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read()
+    finally:
+        writer.close()
+    return int(status_line.split()[1])
+
+
+async def _worker(url, headers, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            status = await _get(url, headers)
+        except (OSError, ValueError, IndexError):
+            status = None
+        latencies.append(time.perf_counter() - started)
+        if status != 200:
+            errors.append(status)
+
+
+async def _run(url, headers, concurrency, duration):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(
+        _worker(url, headers, deadline, latencies, errors)
+        for _ in range(concurrency)
+    ))
+    return latencies, errors
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare concurrent-connection throughput of the sync and async "
+        "show session endpoints against a running server. Both are "
+        "subject to the user and catalog throttle rates, so raise those "
+        "first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--base-url", default="http://127.0.0.1:8000",
+            help="Server to load, e.g. a uvicorn or gunicorn instance.",
+        )
+        parser.add_argument("--token", help="JWT access token.")
+        parser.add_argument("--email", help="Obtain a token for this user.")
+        parser.add_argument("--password")
+        parser.add_argument(
+            "--session-id", type=int,
+            help="Session for detail and seat map requests "
+                 "(default: first session in the list).",
+        )
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument(
+            "--duration", type=float, default=10.0,
+            help="Seconds to run each endpoint.",
+        )
+
+    def handle(self, *args, **options):
+        base_url = options["base_url"].rstrip("/")
+        token = options["token"] or self.obtain_token(base_url, options)
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/json",
+        }
+        session_id = options["session_id"] or self.first_session_id(
+            base_url, headers
+        )
+
+        self.stdout.write(
+            f"{'endpoint':<10}{'mode':<7}{'req/s':>10}{'p50 ms':>10}"
+            f"{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}"
+        )
+        for name, *variants in ENDPOINTS:
+            for mode, (url_name, args) in zip(("sync", "async"), variants):
+                url = base_url + reverse(
+                    url_name, args=[session_id for _ in args]
+                )
+                latencies, errors = asyncio.run(_run(
+                    url, headers, options["concurrency"], options["duration"]
+                ))
+                result = latency_summary(
+                    latencies, errors, options["duration"]
+                )
+                self.stdout.write(
+                    f"{name:<10}{mode:<7}{result['rps']:>10.1f}"
+                    f"{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}"
+                    f"{result['p99_ms']:>10.1f}{result['errors']:>8}"
+                )
+
+    def obtain_token(self, base_url, options):
+        if not (options["email"] and options["password"]):
+            raise CommandError("Pass --token or --email and --password.")
+        request = Request(
+            base_url + reverse("token_obtain_pair"),
+            data=json.dumps({
+                "email": options["email"],
+                "password": options["password"],
+            }).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        with urlopen(request) as response:
+            return json.load(response)["access"]
+
+    def first_session_id(self, base_url, headers):
+        request = Request(
+            base_url + reverse("planetarium:showsession-list")
+            + "?page_size=1",
+            headers=headers,
+        )
+        with urlopen(request) as response:
+            results = json.load(response)["results"]
+        if not results:
+            raise CommandError("No show sessions to load test.")
+        return results[0]["id"]
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from planetarium.models import ShowSession
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute ShowSession.tickets_sold from the ticket table and fix "
+        "sessions whose counter has drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of sessions locked and checked per transaction.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report drifted sessions without updating them.",
+        )
+
+    def handle(self, *args, batch_size, dry_run, **options):
+        checked = repaired = 0
+        last_id = 0
+
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    ShowSession.objects.filter(pk__gt=last_id)
+                    .order_by("pk")
+                    .select_for_update()
+                    .with_actual_tickets_sold()
+                    .values_list("pk", "tickets_sold", "actual_tickets_sold")
+                    [:batch_size]
+                )
+                if not batch:
+                    break
+
+                drifted = [
+                    ShowSession(pk=pk, tickets_sold=actual)
+                    for pk, stored, actual in batch
+                    if stored != actual
+                ]
+                for session in drifted:
+                    self.stdout.write(
+                        f"Show session {session.pk}: "
+                        f"tickets_sold -> {session.tickets_sold}"
+                    )
+                if drifted and not dry_run:
+                    ShowSession.objects.bulk_update(drifted, ["tickets_sold"])
+
+            checked += len(batch)
+            repaired += len(drifted)
+            last_id = batch[-1][0]
+
+        verb = "would be repaired" if dry_run else "repaired"
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {checked} show sessions, {repaired} {verb}."
+        ))
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_tickets(apps, schema_editor):
+    # Until now a ticket was only its session, row and seat, so duplicates
+    # carry nothing of their own: keep the earliest ticket for each seat.
+    Ticket = apps.get_model("planetarium", "Ticket")
+    duplicates = (
+        Ticket.objects.order_by()
+        .values("show_session", "row", "seat")
+        .annotate(first=Min("id"), count=Count("id"))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates.iterator():
+        Ticket.objects.filter(
+            show_session=duplicate["show_session"],
+            row=duplicate["row"],
+            seat=duplicate["seat"],
+        ).exclude(pk=duplicate["first"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planetarium', '0004_alter_ticket_show_session'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            remove_duplicate_tickets, migrations.RunPython.noop
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='reservation',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tickets', to='planetarium.reservation'),
+        ),
+        migrations.AddConstraint(
+            model_name='ticket',
+            constraint=models.UniqueConstraint(fields=('show_session', 'row', 'seat'), name='unique_ticket_show_session_row_seat'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planetarium', '0005_ticket_reservation_unique_seat'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['created_at', 'id'], name='reservation_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='showsession',
+            index=models.Index(fields=['show_time', 'id'], name='showsession_time_id_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.6 on 2026-10-18 06:02
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+from django.db.models.functions import Upper
+
+# Indexed on UPPER(column) so they also serve Django's icontains and
+# istartswith lookups, which compile to UPPER(column::text) LIKE UPPER(...).
+TRIGRAM_INDEXES = (
+    ("PlanetariumDome", "name", "planetariumdome_name_trgm_idx"),
+    ("ShowTheme", "name", "showtheme_name_trgm_idx"),
+    ("AstronomyShow", "title", "astronomyshow_title_trgm_idx"),
+)
+
+
+def _trigram_indexes(apps):
+    for model_name, field, index_name in TRIGRAM_INDEXES:
+        model = apps.get_model("planetarium", model_name)
+        index = GinIndex(
+            OpClass(Upper(field), name="gin_trgm_ops"), name=index_name
+        )
+        yield model, index
+
+
+def add_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for model, index in _trigram_indexes(apps):
+        schema_editor.add_index(model, index)
+
+
+def remove_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for model, index in _trigram_indexes(apps):
+        schema_editor.remove_index(model, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planetarium', '0008_astronomyshow_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(add_trigram_indexes, remove_trigram_indexes),
+    ]
@@ -1,4 +1,8 @@
-from django.db import models
+from django.contrib.postgres.search import SearchQuery, SearchRank, \
+    SearchVector, SearchVectorField
+from django.db import connections, models
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
 
 from planetarium_service import settings
 from user.models import User
@@ -24,10 +28,40 @@ class ShowTheme(models.Model):
         return self.name
 
 
+SEARCH_CONFIG = "english"
+
+
+class AstronomyShowQuerySet(models.QuerySet):
+    def _supports_full_text_search(self):
+        return connections[self.db].vendor == "postgresql"
+
+    def update_search_vector(self):
+        if not self._supports_full_text_search():
+            return 0
+        return self.update(
+            search_vector=(
+                SearchVector("title", weight="A", config=SEARCH_CONFIG)
+                + SearchVector("description", weight="B", config=SEARCH_CONFIG)
+            )
+        )
+
+    def search(self, text):
+        if not self._supports_full_text_search():
+            return self.filter(title__icontains=text)
+
+        query = SearchQuery(text, search_type="websearch", config=SEARCH_CONFIG)
+        return self.filter(search_vector=query).annotate(
+            rank=SearchRank(F("search_vector"), query)
+        ).order_by("-rank", "-id")
+
+
 class AstronomyShow(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField()
     themes = models.ManyToManyField(ShowTheme, related_name='shows')
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = AstronomyShowQuerySet.as_manager()
 
     def __str__(self):
         return self.title
@@ -38,40 +72,119 @@ class Reservation(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
-        related_name="reservations"
+        related_name="reservations",
+        db_index=False,
     )
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["created_at", "id"],
+                name="reservation_created_id_idx",
+            ),
+            models.Index(
+                fields=["user", "created_at"],
+                name="reservation_user_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return (f"Reservation #{self.id} by {self.user} "
                 f"created at {self.created_at:%d.%m.%Y %H:%M}")
 
 
+def availability_annotations(session_path=""):
+    """Annotations with a show session's capacity and free seats.
+
+    List readers select these in place of ``ShowSession.capacity`` and
+    ``ShowSession.seats_available``, which read the dome.
+
+    ``session_path`` is the lookup path to the session, e.g.
+    ``"show_session__"`` when annotating tickets.
+    """
+    prefix = session_path.replace("__", "_")
+    return {
+        f"{prefix}dome_capacity": (
+            F(f"{session_path}planetarium_dome__rows")
+            * F(f"{session_path}planetarium_dome__seats_in_row")
+        ),
+        f"{prefix}seats_available_count": (
+            F(f"{prefix}dome_capacity") - F(f"{session_path}tickets_sold")
+        ),
+    }
+
+
+class ShowSessionQuerySet(models.QuerySet):
+    def add_tickets_sold(self, count):
+        return self.update(
+            tickets_sold=Greatest(F("tickets_sold") + count, Value(0))
+        )
+
+    def with_actual_tickets_sold(self):
+        return self.annotate(
+            actual_tickets_sold=Coalesce(
+                Subquery(
+                    Ticket.objects.filter(show_session=OuterRef("pk"))
+                    .order_by()
+                    .values("show_session")
+                    .annotate(count=Count("*"))
+                    .values("count"),
+                    output_field=models.IntegerField(),
+                ),
+                Value(0),
+            )
+        )
+
+
 class ShowSession(models.Model):
     astronomy_show = models.ForeignKey(
         AstronomyShow,
         on_delete=models.CASCADE,
-        related_name="show_sessions"
+        related_name="show_sessions",
+        db_index=False,
     )
     planetarium_dome = models.ForeignKey(
         PlanetariumDome,
         on_delete=models.CASCADE,
-        related_name="show_sessions"
+        related_name="show_sessions",
+        db_index=False,
     )
     show_time = models.DateTimeField()
+    # Maintained with F() updates whenever tickets are created or deleted;
+    # `manage.py repair_tickets_sold` recomputes it from the ticket table.
+    tickets_sold = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = ShowSessionQuerySet.as_manager()
 
     class Meta:
         ordering = ["-show_time"]
+        indexes = [
+            models.Index(
+                fields=["show_time", "id"],
+                name="showsession_time_id_idx",
+            ),
+            models.Index(
+                fields=["planetarium_dome", "show_time"],
+                name="showsession_dome_time_idx",
+            ),
+            models.Index(
+                fields=["astronomy_show", "show_time"],
+                name="showsession_show_time_idx",
+            ),
+        ]
 
     def __str__(self):
         return (f"{self.astronomy_show} in "
                 f"{self.planetarium_dome} at {self.show_time:%d.%m %H:%M}")
 
     @property
-    def tickets_sold(self):
-        return self.planetarium_dome.capacity - self.tickets.count()
+    def capacity(self):
+        return self.planetarium_dome.capacity
+
+    @property
+    def seats_available(self):
+        return self.capacity - self.tickets_sold
 
 
 class Ticket(models.Model):
@@ -80,8 +193,24 @@ class Ticket(models.Model):
     show_session = models.ForeignKey(
         ShowSession,
         on_delete=models.CASCADE,
-        related_name="tickets"
+        related_name="tickets",
+        db_index=False,
     )
+    reservation = models.ForeignKey(
+        Reservation,
+        on_delete=models.CASCADE,
+        related_name="tickets",
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["show_session", "row", "seat"],
+                name="unique_ticket_show_session_row_seat",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.show_session}, seat: {self.seat}, row: {self.row}"
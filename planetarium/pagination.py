@@ -0,0 +1,229 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import reduce
+from operator import and_, or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination that seeks by the last row seen instead of OFFSET.
+
+    Rows are ordered by the queryset's explicit ``order_by()``, the view's
+    ``ordering`` or the model's ``Meta.ordering``, in that order of
+    preference, with ``id`` appended as a tie-breaker, and the cursor
+    stores that row's ordering values. Every page is an index range scan
+    on the ordering columns, so page N costs the same as page 1.
+    """
+
+    page_size = api_settings.PAGE_SIZE or 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    default_ordering = ("id",)
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_ordering(self, queryset, view):
+        explicit = [
+            field for field in queryset.query.order_by
+            if isinstance(field, str)
+        ]
+        ordering = list(
+            explicit
+            or getattr(view, "ordering", None)
+            or queryset.model._meta.ordering
+            or self.default_ordering
+        )
+        ordering = [
+            field[:-2] + "id" if field.lstrip("-") == "pk" else field
+            for field in ordering
+        ]
+        if "id" not in [field.lstrip("-") for field in ordering]:
+            descending = ordering[-1].startswith("-")
+            ordering.append("-id" if descending else "id")
+        return tuple(ordering)
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        return self.get_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        return self.get_page([row async for row in queryset])
+
+    def get_page_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset, view)
+        self.model = queryset.model
+        self.annotations = queryset.query.annotations
+
+        self.cursor = self.decode_cursor(request)
+        self.reverse = bool(self.cursor and self.cursor["reverse"])
+        ordering = (
+            self._reversed(self.ordering) if self.reverse else self.ordering
+        )
+
+        queryset = queryset.order_by(*ordering)
+        if self.cursor:
+            queryset = queryset.filter(
+                self._seek_filter(ordering, self.cursor["position"])
+            )
+        return queryset[:self.page_size + 1]
+
+    def get_page(self, results):
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+
+        self.has_next = has_more if not self.reverse else True
+        self.has_previous = bool(self.cursor) if not self.reverse else has_more
+        self.first = results[0] if results else None
+        self.last = results[-1] if results else None
+        return results
+
+    @staticmethod
+    def _reversed(ordering):
+        return tuple(
+            field[1:] if field.startswith("-") else f"-{field}"
+            for field in ordering
+        )
+
+    @staticmethod
+    def _seek_filter(ordering, position):
+        """Build ``(a, b, ...) > (x, y, ...)`` for the given directions.
+
+        The leading ``a >= x`` term is redundant but lets the database
+        turn the whole condition into a single index range scan.
+        """
+        names = [field.lstrip("-") for field in ordering]
+        lookups = ["lt" if field.startswith("-") else "gt"
+                   for field in ordering]
+
+        alternatives = []
+        for index, (name, lookup) in enumerate(zip(names, lookups)):
+            equal = [Q(**{names[i]: position[i]}) for i in range(index)]
+            after = Q(**{f"{name}__{lookup}": position[index]})
+            alternatives.append(reduce(and_, equal + [after]))
+
+        bound = Q(**{f"{names[0]}__{lookups[0]}e": position[0]})
+        return bound & reduce(or_, alternatives)
+
+    def _position(self, instance):
+        position = []
+        for field in self.ordering:
+            if isinstance(instance, dict):
+                value = instance[field.lstrip("-")]
+            else:
+                value = getattr(instance, field.lstrip("-"))
+            if hasattr(value, "isoformat"):
+                value = value.isoformat()
+            position.append(value)
+        return position
+
+    def _field(self, name):
+        if name in self.annotations:
+            return self.annotations[name].output_field
+        return self.model._meta.get_field(name)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            position = cursor["p"]
+            if len(position) != len(self.ordering):
+                raise ValueError
+            fields = [self._field(field.lstrip("-")) for field in self.ordering]
+            position = [
+                field.to_python(value)
+                for field, value in zip(fields, position)
+            ]
+            return {"position": position, "reverse": bool(cursor.get("r"))}
+        except (
+            TypeError, ValueError, KeyError, UnicodeError, ValidationError
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance, reverse):
+        cursor = {"p": self._position(instance)}
+        if reverse:
+            cursor["r"] = 1
+        encoded = urlsafe_b64encode(
+            json.dumps(cursor, separators=(",", ":")).encode()
+        ).decode("ascii")
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or self.last is None:
+            return None
+        return self.encode_cursor(self.last, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first is None:
+            url = self.request.build_absolute_uri()
+            return remove_query_param(url, self.cursor_query_param)
+        return self.encode_cursor(self.first, reverse=True)
+
+    def get_paginated_data(self, data):
+        return {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {
+                    "type": "string", "nullable": True, "format": "uri"
+                },
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+        ]
@@ -19,11 +19,10 @@ class IsAdminOrAuthenticatedReadOnly(BasePermission):
 
 class IsOwnerOrAdmin(BasePermission):
     def has_permission(self, request, view):
-        if request.method in SAFE_METHODS:
-            return request.user and request.user.is_authenticated
-        return True
+        # Writes are saved as the requesting user, so they need one too.
+        return request.user and request.user.is_authenticated
 
     def has_object_permission(self, request, view, obj):
         if request.method in SAFE_METHODS:
             return request.user and request.user.is_authenticated
-        return request.user == obj.user or request.user.is_staff
+        return obj.user_id == request.user.pk or request.user.is_staff
@@ -0,0 +1,20 @@
+try:
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+except ImportError:
+    is_psycopg3 = False
+
+COPY_CHUNK_SIZE = 1 << 16
+
+
+def copy_from(cursor, sql, buffer):
+    """Run a ``COPY ... FROM STDIN`` statement reading from ``buffer``.
+
+    ``cursor`` is a Django cursor on PostgreSQL, with either psycopg 2
+    (``copy_expert``) or psycopg 3 (``Cursor.copy``) underneath.
+    """
+    if not is_psycopg3:
+        cursor.cursor.copy_expert(sql, buffer)
+        return
+    with cursor.cursor.copy(sql) as copy:
+        while data := buffer.read(COPY_CHUNK_SIZE):
+            copy.write(data)
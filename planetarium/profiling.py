@@ -0,0 +1,215 @@
+import logging
+import re
+import statistics
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger("planetarium.profiling")
+
+DEFAULT_REPEAT_THRESHOLD = 5
+
+_profile = ContextVar("planetarium_request_profile", default=None)
+
+_IN_LIST = re.compile(r"\(\s*%s(?:\s*,\s*%s)+\s*\)")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACES = re.compile(r"\s+")
+
+
+def query_shape(sql):
+    """SQL with literals and IN lists collapsed, for spotting N+1 loops."""
+    sql = _LITERALS.sub("%s", sql)
+    sql = _IN_LIST.sub("(%s, ...)", sql)
+    return _SPACES.sub(" ", sql).strip()
+
+
+def repeated_queries(statements, threshold=None):
+    """Query shapes run at least ``threshold`` times, most frequent first."""
+    if threshold is None:
+        threshold = getattr(
+            settings, "QUERY_REPEAT_THRESHOLD", DEFAULT_REPEAT_THRESHOLD
+        )
+    shapes = Counter(query_shape(sql) for sql in statements)
+    return [
+        {"sql": shape, "count": count}
+        for shape, count in shapes.most_common()
+        if count >= threshold
+    ]
+
+
+def latency_summary(latencies, errors, duration):
+    """Throughput and p50/p95/p99 latency (ms) of a benchmark run."""
+    if len(latencies) > 1:
+        cuts = statistics.quantiles(latencies, n=100)
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = latencies[0] if latencies else 0.0
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / duration if duration else 0.0,
+        "p50_ms": p50 * 1000,
+        "p95_ms": p95 * 1000,
+        "p99_ms": p99 * 1000,
+    }
+
+
+class RequestProfile:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.statements = []
+        self._serializing = False
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper installed on every connection (see signals).
+
+    The profile is looked up through a context variable, so queries run
+    by async views in sync_to_async threads are attributed correctly.
+    """
+    profile = _profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.db_time += time.perf_counter() - started
+        profile.queries += 1
+        profile.statements.append(sql)
+
+
+@contextmanager
+def serialization():
+    """Add the enclosed time, minus SQL run inside it, to serializer time.
+
+    Nested sections are folded into the outermost one.
+    """
+    profile = _profile.get()
+    if profile is None or profile._serializing:
+        yield
+        return
+
+    profile._serializing = True
+    started, db_time = time.perf_counter(), profile.db_time
+    try:
+        yield
+    finally:
+        profile._serializing = False
+        profile.serialize_time += (
+            time.perf_counter() - started - (profile.db_time - db_time)
+        )
+
+
+class TimedSerializerMixin:
+    """Count ``to_representation`` towards the request's serializer time."""
+
+    def to_representation(self, instance):
+        with serialization():
+            return super().to_representation(instance)
+
+
+class RequestProfilingMiddleware:
+    """Report SQL, serializer and total time for each request.
+
+    Timings go out as a ``Server-Timing`` header and a structured log record
+    on the ``planetarium.profiling`` logger; query shapes repeated at least
+    ``QUERY_REPEAT_THRESHOLD`` times are logged as a likely N+1 warning.
+    For streaming responses the header covers the view only and the log
+    record is written once the body has been sent.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        profile = RequestProfile()
+        token = _profile.set(profile)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _profile.reset(token)
+        return self.report(request, response, profile, started)
+
+    async def __acall__(self, request):
+        profile = RequestProfile()
+        token = _profile.set(profile)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _profile.reset(token)
+        return self.report(request, response, profile, started)
+
+    def report(self, request, response, profile, started):
+        total = time.perf_counter() - started
+
+        response["Server-Timing"] = ", ".join((
+            f'db;dur={profile.db_time * 1000:.1f};'
+            f'desc="{profile.queries} queries"',
+            f"serialize;dur={profile.serialize_time * 1000:.1f}",
+            f"total;dur={total * 1000:.1f}",
+        ))
+
+        if not response.streaming:
+            self.log(request, response, profile, total)
+            return response
+
+        def log():
+            self.log(
+                request, response, profile, time.perf_counter() - started
+            )
+
+        content = response.streaming_content
+        if response.is_async:
+            async def streaming_content():
+                try:
+                    async for chunk in content:
+                        yield chunk
+                finally:
+                    log()
+        else:
+            def streaming_content():
+                try:
+                    yield from content
+                finally:
+                    log()
+        response.streaming_content = streaming_content()
+        return response
+
+    def log(self, request, response, profile, total):
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": profile.queries,
+            "db_ms": round(profile.db_time * 1000, 2),
+            "serialize_ms": round(profile.serialize_time * 1000, 2),
+            "total_ms": round(total * 1000, 2),
+        }
+        logger.info("request profile", extra={"profile": record})
+
+        repeated = repeated_queries(profile.statements)
+        if repeated:
+            logger.warning(
+                "Repeated queries on %s %s, possible N+1",
+                request.method,
+                request.path,
+                extra={"profile": {**record, "repeated_queries": repeated}},
+            )
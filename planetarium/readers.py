@@ -0,0 +1,186 @@
+from operator import itemgetter
+
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from planetarium.fieldsets import SparseFieldsViewMixin
+from planetarium.holds import get_seat_hold_store
+from planetarium.models import availability_annotations
+from planetarium.profiling import serialization
+
+
+class ValuesReader:
+    """Read-only list representation built from ``.values()`` rows.
+
+    Each reader mirrors one serializer field for field, so list responses
+    render to the same JSON without instantiating a serializer field tree
+    for every row.
+
+    ``fields`` maps each output field to its ``values()`` lookup, or to a
+    reader for the forward relation of that name. Lookups listed in
+    ``annotated`` name annotations from ``get_annotations`` instead. Only
+    the fields in the ``fields`` tree given to the reader are selected.
+
+    ``prepare`` is called with a page of rows before they are rendered, for
+    data that doesn't come from the database.
+    """
+
+    fields = {}
+    annotated = ()
+    converters = {}
+
+    def __init__(self, fields=None, prefix=""):
+        self.prefix = prefix
+        self.columns = []
+        for name, lookup in self.fields.items():
+            if fields is not None and name not in fields:
+                continue
+            if isinstance(lookup, type):
+                lookup = lookup(
+                    (fields or {}).get(name) or None, f"{prefix}{name}__"
+                )
+            elif name in self.annotated:
+                lookup = prefix.replace("__", "_") + lookup
+            else:
+                lookup = prefix + lookup
+            self.columns.append((name, lookup))
+        self.getters = [
+            (name, self._getter(name, lookup)) for name, lookup in self.columns
+        ]
+
+    def _getter(self, name, lookup):
+        if isinstance(lookup, ValuesReader):
+            return lookup.to_representation
+        converter = self.converters.get(name)
+        if converter is None:
+            return itemgetter(lookup)
+        return lambda row: converter.to_representation(row[lookup])
+
+    def prepare(self, rows):
+        for _, lookup in self.columns:
+            if isinstance(lookup, ValuesReader):
+                lookup.prepare(rows)
+
+    def get_annotations(self):
+        annotations = {}
+        for _, lookup in self.columns:
+            if isinstance(lookup, ValuesReader):
+                annotations.update(lookup.get_annotations())
+        return annotations
+
+    def get_values(self):
+        values = []
+        for _, lookup in self.columns:
+            if isinstance(lookup, ValuesReader):
+                values.extend(lookup.get_values())
+            else:
+                values.append(lookup)
+        return values
+
+    def shape(self, queryset):
+        annotations = {
+            name: expression
+            for name, expression in self.get_annotations().items()
+            if name not in queryset.query.annotations
+        }
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+        # Pagination cursors read the ordering columns from each row.
+        ordering = [
+            field.lstrip("-")
+            for field in (
+                queryset.query.order_by or queryset.model._meta.ordering
+            )
+            if isinstance(field, str)
+        ]
+        return queryset.values(
+            *dict.fromkeys(["id", *self.get_values(), *ordering])
+        )
+
+    def to_representation(self, row):
+        return {name: get(row) for name, get in self.getters}
+
+
+class ShowSessionReader(ValuesReader):
+    fields = {
+        "id": "id",
+        "astronomy_show": "astronomy_show_id",
+        "planetarium_dome": "planetarium_dome_id",
+        "show_time": "show_time",
+        "capacity": "dome_capacity",
+        "tickets_sold": "tickets_sold",
+        "seats_available": "seats_available_count",
+    }
+    annotated = ("capacity", "seats_available")
+    converters = {"show_time": serializers.DateTimeField()}
+    held_counts = None
+
+    def _getter(self, name, lookup):
+        if name != "seats_available":
+            return super()._getter(name, lookup)
+        # Held seats are as unavailable as sold ones, as on the seat map.
+        session_id = itemgetter(f"{self.prefix}id")
+        return lambda row: row[lookup] - self.held_counts.get(
+            session_id(row), 0
+        )
+
+    def prepare(self, rows):
+        if any(name == "seats_available" for name, _ in self.columns):
+            self.held_counts = get_seat_hold_store().held_counts(
+                {row[f"{self.prefix}id"] for row in rows}
+            )
+
+    def get_values(self):
+        values = super().get_values()
+        if any(name == "seats_available" for name, _ in self.columns):
+            values.append(f"{self.prefix}id")
+        return values
+
+    def get_annotations(self):
+        if any(name in self.annotated for name, _ in self.columns):
+            return availability_annotations(self.prefix)
+        return {}
+
+
+class TicketReader(ValuesReader):
+    fields = {
+        "id": "id",
+        "row": "row",
+        "seat": "seat",
+        "show_session": ShowSessionReader,
+    }
+
+
+class ValuesListMixin(SparseFieldsViewMixin):
+    """Serve ``list`` through ``list_reader_class`` when one is set.
+
+    Readers render ids only, so requests with ``?expand=`` go through the
+    serializer instead.
+    """
+
+    list_reader_class = None
+
+    def get_list_reader(self):
+        if self.list_reader_class is None:
+            return None
+        fields, expand = self.get_field_trees()
+        if expand:
+            return None
+        return self.list_reader_class(fields)
+
+    def list(self, request, *args, **kwargs):
+        reader = self.get_list_reader()
+        if reader is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = reader.shape(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(queryset)
+        rows = list(queryset if page is None else page)
+        reader.prepare(rows)
+        with serialization():
+            data = [reader.to_representation(row) for row in rows]
+
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
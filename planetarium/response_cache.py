@@ -0,0 +1,111 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from planetarium.db_routers import use_primary
+
+VERSION_KEY = "planetarium:catalog-version:{label}"
+RESPONSE_KEY = "planetarium:response:{view}:{action}:{versions}:{digest}"
+STATS_KEY = "planetarium:response-cache:{counter}"
+DEFAULT_TIMEOUT = 60 * 60
+
+
+def _version_key(model):
+    return VERSION_KEY.format(label=model._meta.label_lower)
+
+
+def get_versions(models):
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        # Start from a timestamp rather than 1 so that a version evicted
+        # from the cache never comes back with a value already used.
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump_version(model):
+    key = _version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def _count(counter):
+    key = STATS_KEY.format(counter=counter)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def get_stats():
+    counters = ("hits", "misses")
+    values = cache.get_many(
+        [STATS_KEY.format(counter=counter) for counter in counters]
+    )
+    return {
+        counter: values.get(STATS_KEY.format(counter=counter), 0)
+        for counter in counters
+    }
+
+
+class CatalogCacheMixin:
+    """Cache list/retrieve responses until one of ``cache_models`` changes.
+
+    The cache key contains the request URL and the current version of every
+    model in ``cache_models``. Versions are bumped by model signals (see
+    planetarium.signals), which makes stale entries unreachable.
+    """
+
+    cache_models = ()
+
+    def get_response_cache_key(self, request):
+        params = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            for value in values
+        )
+        digest = hashlib.md5(
+            repr((request.get_host(), request.path, params)).encode(),
+            usedforsecurity=False,
+        ).hexdigest()
+        versions = ".".join(map(str, get_versions(self.cache_models)))
+        return RESPONSE_KEY.format(
+            view=self.basename,
+            action=self.action,
+            versions=versions,
+            digest=digest,
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = self.get_response_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            _count("hits")
+            return Response(data, headers={"X-Cache": "HIT"})
+
+        _count("misses")
+        # Fill the cache from the primary: a lagging replica would pin
+        # stale data under the new version key.
+        with use_primary():
+            response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(
+                key,
+                response.data,
+                timeout=getattr(
+                    settings, "CATALOG_CACHE_TIMEOUT", DEFAULT_TIMEOUT
+                ),
+            )
+        response["X-Cache"] = "MISS"
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
@@ -0,0 +1,171 @@
+import base64
+
+from django.core.cache import cache
+
+from planetarium.db_routers import use_primary
+from planetarium.models import Ticket
+
+SEAT_MAP_CACHE_KEY = "planetarium:seat-map:{show_session_id}"
+
+
+def _cache_key(show_session_id):
+    return SEAT_MAP_CACHE_KEY.format(show_session_id=show_session_id)
+
+
+def _mark_seats(bitmap, rows, seats_in_row, seats):
+    for row, seat in seats:
+        if 1 <= row <= rows and 1 <= seat <= seats_in_row:
+            index = (row - 1) * seats_in_row + seat - 1
+            bitmap[index >> 3] |= 0x80 >> (index & 7)
+
+
+def build_seat_map(show_session):
+    """Pack occupied seats row by row, one bit per seat, MSB first."""
+    dome = show_session.planetarium_dome
+    rows, seats_in_row = dome.rows, dome.seats_in_row
+    bitmap = bytearray((rows * seats_in_row + 7) // 8)
+
+    occupied = Ticket.objects.filter(
+        show_session_id=show_session.id
+    ).values_list("row", "seat")
+    _mark_seats(bitmap, rows, seats_in_row, occupied.iterator())
+
+    return rows, seats_in_row, bytes(bitmap)
+
+
+async def abuild_seat_map(show_session):
+    dome = show_session.planetarium_dome
+    rows, seats_in_row = dome.rows, dome.seats_in_row
+    bitmap = bytearray((rows * seats_in_row + 7) // 8)
+
+    occupied = Ticket.objects.filter(
+        show_session_id=show_session.id
+    ).values_list("row", "seat")
+    seats = [seat async for seat in occupied.aiterator()]
+    _mark_seats(bitmap, rows, seats_in_row, seats)
+
+    return rows, seats_in_row, bytes(bitmap)
+
+
+def get_seat_map(show_session):
+    dome = show_session.planetarium_dome
+    key = _cache_key(show_session.id)
+    cached = cache.get(key)
+    if cached is not None and cached[:2] == (dome.rows, dome.seats_in_row):
+        return cached
+
+    with use_primary():
+        seat_map = build_seat_map(show_session)
+    cache.set(key, seat_map, timeout=None)
+    return seat_map
+
+
+async def aget_seat_map(show_session):
+    dome = show_session.planetarium_dome
+    key = _cache_key(show_session.id)
+    cached = await cache.aget(key)
+    if cached is not None and cached[:2] == (dome.rows, dome.seats_in_row):
+        return cached
+
+    with use_primary():
+        seat_map = await abuild_seat_map(show_session)
+    await cache.aset(key, seat_map, timeout=None)
+    return seat_map
+
+
+def invalidate_seat_map(show_session_id):
+    cache.delete(_cache_key(show_session_id))
+
+
+def invalidate_seat_maps(show_session_ids):
+    """Bulk variant for writes that bypass the Ticket signals."""
+    cache.delete_many([_cache_key(pk) for pk in show_session_ids])
+
+
+def mark_held_seats(seat_map, held_seats):
+    rows, seats_in_row, bitmap = seat_map
+    if not held_seats:
+        return seat_map
+
+    bitmap = bytearray(bitmap)
+    _mark_seats(bitmap, rows, seats_in_row, held_seats)
+    return rows, seats_in_row, bytes(bitmap)
+
+
+def _free_blocks(free, count):
+    """Bits j of the result where bits j..j+count-1 of ``free`` are all set.
+
+    Doubling the run length each step needs O(log count) shifts.
+    """
+    span = 1
+    while span * 2 <= count:
+        free &= free >> span
+        span *= 2
+    if span < count:
+        free &= free >> (count - span)
+    return free
+
+
+def find_best_seats(seat_map, count):
+    """Best block of ``count`` adjacent free seats in one row.
+
+    Returns ``(row, first_seat, distance)`` for the block whose centre is
+    nearest the dome centre (ties go to the lower row, then the lower
+    seat), or None. Each row is searched as an integer bitmask: blocks come
+    from ``_free_blocks`` and the most central one is the set bit nearest
+    the row centre, found with two bit_length() calls instead of a scan.
+    """
+    rows, seats_in_row, bitmap = seat_map
+    if not 1 <= count <= seats_in_row:
+        return None
+
+    taken = int.from_bytes(bitmap, "big")
+    end = len(bitmap) * 8
+    full = (1 << seats_in_row) - 1
+    # Bit j of a row mask is seat seats_in_row - j; a block starting at bit
+    # j is centred exactly when j == (seats_in_row - count) / 2.
+    centre = (seats_in_row - count) // 2
+    below_centre = (2 << centre) - 1
+
+    best = None
+    for row in range(1, rows + 1):
+        free = ~(taken >> (end - row * seats_in_row)) & full
+        blocks = _free_blocks(free, count)
+        if not blocks:
+            continue
+
+        candidates = []
+        below = (blocks & below_centre).bit_length() - 1
+        if below >= 0:
+            candidates.append(below)
+        above = blocks >> (centre + 1)
+        if above:
+            candidates.append((above & -above).bit_length() + centre)
+        start = min(
+            candidates,
+            key=lambda bit: (abs(seats_in_row - 2 * bit - count), -bit),
+        )
+
+        # Doubled offsets from the centre keep the score an integer.
+        row_offset = 2 * row - rows - 1
+        seat_offset = seats_in_row - 2 * start - count
+        score = row_offset * row_offset + seat_offset * seat_offset
+        if best is None or score < best[0]:
+            best = (score, row, seats_in_row - start - count + 1)
+
+    if best is None:
+        return None
+    score, row, first_seat = best
+    return row, first_seat, score ** 0.5 / 2
+
+
+def encode_seat_map(show_session, seat_map, seats_held=0):
+    rows, seats_in_row, bitmap = seat_map
+    return {
+        "show_session": show_session.id,
+        "rows": rows,
+        "seats_in_row": seats_in_row,
+        "seats_held": seats_held,
+        "encoding": "base64",
+        "bitmap": base64.b64encode(bitmap).decode("ascii"),
+    }
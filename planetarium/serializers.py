@@ -1,22 +1,93 @@
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 
+from planetarium.fieldsets import SparseFieldsMixin
+from planetarium.holds import get_seat_hold_store
 from planetarium.models import AstronomyShow, PlanetariumDome, Reservation, \
     ShowTheme, ShowSession, Ticket
+from planetarium.profiling import TimedSerializerMixin
+from planetarium.seat_map import invalidate_seat_map
 
 
-class PlanetariumDomeSerializer(serializers.ModelSerializer):
+class HeldCountsListSerializer(serializers.ListSerializer):
+    """Look up the held seats of all sessions rendered in the list at once.
+
+    ``session_path`` leads from the child to its nested session serializer,
+    which reads the counts from the context instead of the hold store.
+    """
+
+    session_path = ()
+
+    def renders_seats_available(self):
+        serializer = self.child
+        for name in self.session_path:
+            serializer = getattr(serializer, "fields", {}).get(name)
+            serializer = getattr(serializer, "child", serializer)
+        return (
+            isinstance(serializer, ShowSessionSerializer)
+            and "seats_available" in serializer.fields
+        )
+
+    def get_sessions(self, instances):
+        for name in self.session_path:
+            nested = []
+            for instance in instances:
+                value = getattr(instance, name)
+                if hasattr(value, "all"):
+                    nested.extend(value.all())
+                else:
+                    nested.append(value)
+            instances = nested
+        return instances
+
+    def to_representation(self, data):
+        if hasattr(data, "all"):
+            data = data.all()
+        instances = list(data)
+        if "held_counts" in self.context or not self.renders_seats_available():
+            return super().to_representation(instances)
+        self.context["held_counts"] = get_seat_hold_store().held_counts(
+            {session.id for session in self.get_sessions(instances)}
+        )
+        try:
+            return super().to_representation(instances)
+        finally:
+            del self.context["held_counts"]
+
+
+class ShowSessionListSerializer(HeldCountsListSerializer):
+    pass
+
+
+class TicketListSerializer(HeldCountsListSerializer):
+    session_path = ("show_session",)
+
+
+class ReservationListSerializer(HeldCountsListSerializer):
+    session_path = ("tickets", "show_session")
+
+
+class PlanetariumDomeSerializer(
+    SparseFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer
+):
+    field_columns = {"capacity": ("rows", "seats_in_row")}
+
     class Meta:
         model = PlanetariumDome
         fields = ("id", "name", "rows", "seats_in_row", "capacity")
 
 
-class ShowThemeSerializer(serializers.ModelSerializer):
+class ShowThemeSerializer(
+    SparseFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer
+):
     class Meta:
         model = ShowTheme
         fields = ("id", "name", )
 
 
-class AstronomyShowSerializer(serializers.ModelSerializer):
+class AstronomyShowSerializer(
+    SparseFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer
+):
     themes = ShowThemeSerializer(
         many=True
     )
@@ -25,35 +96,272 @@ class AstronomyShowSerializer(serializers.ModelSerializer):
         fields = ("id", "title", "description", "themes", )
 
 
-class ReservationSerializer(serializers.ModelSerializer):
+class ReservationTicketSerializer(
+    SparseFieldsMixin, serializers.ModelSerializer
+):
+    show_session = serializers.IntegerField(source="show_session_id")
+    expandable_fields = {
+        "show_session": "planetarium.serializers.ShowSessionSerializer",
+    }
+
+    class Meta:
+        model = Ticket
+        list_serializer_class = TicketListSerializer
+        fields = ("id", "show_session", "row", "seat")
+        # Seats are checked for the whole reservation at once in
+        # ReservationSerializer instead of one query per ticket.
+        validators = []
+
+
+class ReservationSerializer(
+    SparseFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer
+):
+    tickets = ReservationTicketSerializer(many=True, allow_empty=False)
+
     class Meta:
         model = Reservation
-        fields = ("id", "created_at", )
+        list_serializer_class = ReservationListSerializer
+        fields = ("id", "created_at", "tickets", )
+
+    def validate_tickets(self, tickets):
+        session_ids = {ticket["show_session_id"] for ticket in tickets}
+        sessions = ShowSession.objects.select_related(
+            "planetarium_dome"
+        ).in_bulk(session_ids)
 
+        errors = []
+        seen = set()
+        for ticket in tickets:
+            session = sessions.get(ticket["show_session_id"])
+            key = (ticket["show_session_id"], ticket["row"], ticket["seat"])
+            if session is None:
+                errors.append({"show_session": "Show session does not exist."})
+            elif not 1 <= ticket["row"] <= session.planetarium_dome.rows:
+                errors.append({
+                    "row": "Row must be in range "
+                           f"[1, {session.planetarium_dome.rows}]."
+                })
+            elif not 1 <= ticket["seat"] <= (
+                session.planetarium_dome.seats_in_row
+            ):
+                errors.append({
+                    "seat": "Seat must be in range "
+                            f"[1, {session.planetarium_dome.seats_in_row}]."
+                })
+            elif key in seen:
+                errors.append({"seat": "Seat is listed more than once."})
+            else:
+                errors.append({})
+            seen.add(key)
 
-class ShowSessionSerializer(serializers.ModelSerializer):
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return tickets
+
+    def create(self, validated_data):
+        tickets_data = validated_data.pop("tickets")
+        session_ids = sorted(
+            {ticket["show_session_id"] for ticket in tickets_data}
+        )
+
+        try:
+            with transaction.atomic():
+                # One row lock per session serializes concurrent buyers of
+                # the same show without locking individual seats.
+                list(
+                    ShowSession.objects.select_for_update()
+                    .filter(id__in=session_ids)
+                    .order_by("id")
+                    .values_list("id", flat=True)
+                )
+                self._check_seats_are_free(tickets_data, session_ids)
+                self._check_seats_are_not_held(
+                    tickets_data, validated_data["user"]
+                )
+
+                reservation = Reservation.objects.create(**validated_data)
+                Ticket.objects.bulk_create(
+                    Ticket(reservation=reservation, **ticket)
+                    for ticket in tickets_data
+                )
+                for session_id, seats in self._seats_by_session(
+                    tickets_data
+                ).items():
+                    ShowSession.objects.filter(
+                        pk=session_id
+                    ).add_tickets_sold(len(seats))
+                transaction.on_commit(
+                    lambda: self._release_holds(
+                        tickets_data, validated_data["user"]
+                    )
+                )
+        except IntegrityError:
+            raise serializers.ValidationError(
+                {"tickets": "One or more seats are already taken."}
+            )
+
+        return reservation
+
+    @staticmethod
+    def _seats_by_session(tickets_data):
+        seats = {}
+        for ticket in tickets_data:
+            seats.setdefault(ticket["show_session_id"], []).append(
+                (ticket["row"], ticket["seat"])
+            )
+        return seats
+
+    def _check_seats_are_not_held(self, tickets_data, user):
+        store = get_seat_hold_store()
+        held = [
+            (session_id, row, seat)
+            for session_id, seats in self._seats_by_session(
+                tickets_data
+            ).items()
+            for row, seat in store.conflicts(session_id, seats, user.id)
+        ]
+        if held:
+            raise serializers.ValidationError({
+                "tickets": [
+                    f"Seat {seat} in row {row} of show session "
+                    f"{session_id} is held by another buyer."
+                    for session_id, row, seat in sorted(held)
+                ]
+            })
+
+    def _release_holds(self, tickets_data, user):
+        store = get_seat_hold_store()
+        for session_id, seats in self._seats_by_session(
+            tickets_data
+        ).items():
+            store.release(session_id, seats, user.id)
+            invalidate_seat_map(session_id)
+
+    @staticmethod
+    def _check_seats_are_free(tickets_data, session_ids):
+        requested = {
+            (ticket["show_session_id"], ticket["row"], ticket["seat"])
+            for ticket in tickets_data
+        }
+        taken = requested.intersection(
+            Ticket.objects.filter(
+                show_session_id__in=session_ids,
+                row__in={row for _, row, _ in requested},
+                seat__in={seat for _, _, seat in requested},
+            ).values_list("show_session_id", "row", "seat").iterator()
+        )
+        if taken:
+            raise serializers.ValidationError({
+                "tickets": [
+                    f"Seat {seat} in row {row} of show session "
+                    f"{session_id} is already taken."
+                    for session_id, row, seat in sorted(taken)
+                ]
+            })
+
+
+class SeatSerializer(serializers.Serializer):
+    row = serializers.IntegerField(min_value=1)
+    seat = serializers.IntegerField(min_value=1)
+
+
+class SeatHoldSerializer(serializers.Serializer):
+    seats = SeatSerializer(many=True, allow_empty=False)
+
+    def validate_seats(self, seats):
+        dome = self.context["show_session"].planetarium_dome
+        for seat in seats:
+            if seat["row"] > dome.rows or seat["seat"] > dome.seats_in_row:
+                raise serializers.ValidationError(
+                    f"Seat {seat['seat']} in row {seat['row']} is outside "
+                    f"the dome ({dome.rows} rows x {dome.seats_in_row} "
+                    "seats)."
+                )
+
+        requested = {(seat["row"], seat["seat"]) for seat in seats}
+        sold = requested.intersection(
+            self.context["show_session"].tickets.filter(
+                row__in={row for row, _ in requested},
+                seat__in={seat for _, seat in requested},
+            ).values_list("row", "seat")
+        )
+        if sold:
+            raise serializers.ValidationError([
+                f"Seat {seat} in row {row} is already sold."
+                for row, seat in sorted(sold)
+            ])
+        return sorted(requested)
+
+
+class BestSeatsSerializer(serializers.Serializer):
+    count = serializers.IntegerField(min_value=1)
+
+    def validate_count(self, count):
+        dome = self.context["show_session"].planetarium_dome
+        if count > dome.seats_in_row:
+            raise serializers.ValidationError(
+                f"Rows in this dome have {dome.seats_in_row} seats."
+            )
+        return count
+
+
+class ShowSessionSerializer(
+    SparseFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer
+):
     astronomy_show = serializers.PrimaryKeyRelatedField(
         queryset=AstronomyShow.objects.all())
     planetarium_dome = serializers.PrimaryKeyRelatedField(
         queryset=PlanetariumDome.objects.all())
+    expandable_fields = {
+        "astronomy_show": AstronomyShowSerializer,
+        "planetarium_dome": PlanetariumDomeSerializer,
+    }
+    # Computed from the dome's size and the tickets_sold counter.
+    field_columns = {
+        "capacity": (
+            "planetarium_dome__rows", "planetarium_dome__seats_in_row"
+        ),
+        "seats_available": (
+            "planetarium_dome__rows", "planetarium_dome__seats_in_row",
+            "tickets_sold",
+        ),
+    }
 
     class Meta:
         model = ShowSession
+        list_serializer_class = ShowSessionListSerializer
         fields = (
             "id",
             "astronomy_show",
             "planetarium_dome",
             "show_time",
-            "tickets_sold"
+            "capacity",
+            "tickets_sold",
+            "seats_available",
         )
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if "seats_available" in data:
+            # Held seats are as unavailable as sold ones, as on the seat map.
+            held_counts = self.context.get("held_counts")
+            if held_counts is None:
+                held_counts = get_seat_hold_store().held_counts(
+                    [instance.id]
+                )
+            data["seats_available"] -= held_counts.get(instance.id, 0)
+        return data
+
 
-class TicketSerializer(serializers.ModelSerializer):
+class TicketSerializer(
+    SparseFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer
+):
     show_session = ShowSessionSerializer(
         read_only=True
     )
     class Meta:
         model = Ticket
+        list_serializer_class = TicketListSerializer
         fields = ("id", "row", "seat","show_session")
 
 
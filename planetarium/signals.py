@@ -0,0 +1,72 @@
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from planetarium.db_stats import record_connection
+from planetarium.holds import reset_seat_hold_store
+from planetarium.models import AstronomyShow, PlanetariumDome, ShowTheme, \
+    ShowSession, Ticket
+from planetarium.profiling import record_query
+from planetarium.response_cache import bump_version
+from planetarium.seat_map import invalidate_seat_map
+
+
+@receiver([post_save, post_delete], sender=Ticket)
+def invalidate_ticket_seat_map(sender, instance, **kwargs):
+    _now_and_on_commit(invalidate_seat_map, instance.show_session_id)
+
+
+@receiver(post_save, sender=Ticket)
+def count_created_ticket(sender, instance, created, **kwargs):
+    if created:
+        ShowSession.objects.filter(
+            pk=instance.show_session_id
+        ).add_tickets_sold(1)
+
+
+@receiver(post_delete, sender=Ticket)
+def count_deleted_ticket(sender, instance, **kwargs):
+    ShowSession.objects.filter(
+        pk=instance.show_session_id
+    ).add_tickets_sold(-1)
+
+
+@receiver([post_save, post_delete], sender=PlanetariumDome)
+@receiver([post_save, post_delete], sender=ShowTheme)
+@receiver([post_save, post_delete], sender=AstronomyShow)
+def bump_catalog_version(sender, **kwargs):
+    _now_and_on_commit(bump_version, sender)
+
+
+@receiver(post_save, sender=AstronomyShow)
+def update_show_search_vector(sender, instance, **kwargs):
+    AstronomyShow.objects.filter(pk=instance.pk).update_search_vector()
+
+
+@receiver(m2m_changed, sender=AstronomyShow.themes.through)
+def bump_show_themes_version(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        _now_and_on_commit(bump_version, AstronomyShow)
+
+
+def _now_and_on_commit(invalidate, key):
+    # The second call drops anything another request cached from the old
+    # rows between the write and the commit.
+    invalidate(key)
+    transaction.on_commit(lambda: invalidate(key))
+
+
+setting_changed.connect(reset_seat_hold_store)
+
+
+@receiver(connection_created)
+def count_database_connection(sender, connection, **kwargs):
+    record_connection(connection.alias)
+
+
+@receiver(connection_created)
+def install_query_profiler(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
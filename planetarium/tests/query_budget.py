@@ -0,0 +1,31 @@
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+from planetarium.profiling import repeated_queries
+
+
+class QueryBudgetMixin:
+    """``assertQueryBudget`` for TestCases guarding per-endpoint SQL cost."""
+
+    @contextmanager
+    def assertQueryBudget(self, budget, using=DEFAULT_DB_ALIAS):
+        with CaptureQueriesContext(connections[using]) as captured:
+            yield captured
+
+        statements = [query["sql"] for query in captured]
+        if len(statements) <= budget:
+            return
+
+        lines = [
+            f"{len(statements)} queries executed, budget is {budget}:",
+            *(f"{i}. {sql}" for i, sql in enumerate(statements, 1)),
+        ]
+        repeated = repeated_queries(statements, threshold=2)
+        if repeated:
+            lines.append("Repeated query shapes:")
+            lines.extend(
+                f"{shape['count']}x {shape['sql']}" for shape in repeated
+            )
+        self.fail("\n".join(lines))
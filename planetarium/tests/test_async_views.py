@@ -0,0 +1,177 @@
+from datetime import timedelta
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from planetarium.models import ShowSession, Ticket
+from planetarium.throttling import CatalogReadThrottle
+from planetarium.tests.test_planetarium_api import (
+    SHOW_SESSION_URL,
+    sample_astronomy_show,
+    sample_dome,
+    session_detail_url,
+    session_seat_map_url,
+)
+
+ASYNC_SHOW_SESSION_URL = reverse("planetarium:async-showsession-list")
+
+
+def async_detail_url(show_session_id):
+    return reverse(
+        "planetarium:async-showsession-detail", args=[show_session_id]
+    )
+
+
+def async_seat_map_url(show_session_id):
+    return reverse(
+        "planetarium:async-showsession-seat-map", args=[show_session_id]
+    )
+
+
+class AsyncShowSessionViewsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_user(
+            email="async@mail.com", password="asyncpass123"
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}"
+        )
+
+        show = sample_astronomy_show()
+        domes = [sample_dome(), sample_dome(name="Orion", rows=3)]
+        start = timezone.now().replace(microsecond=0)
+        self.sessions = [
+            ShowSession.objects.create(
+                astronomy_show=show,
+                planetarium_dome=domes[i % 2],
+                show_time=start + timedelta(days=i),
+            )
+            for i in range(5)
+        ]
+        for seat in (1, 2, 9):
+            Ticket.objects.create(
+                show_session=self.sessions[0], row=2, seat=seat
+            )
+
+    def assertSameResponse(self, sync_url, async_url, params=None, **extra):
+        expected = self.client.get(sync_url, params, **extra)
+        res = self.client.get(async_url, params, **extra)
+
+        self.assertEqual(res.status_code, expected.status_code)
+        self.assertEqual(res["Content-Type"], expected["Content-Type"])
+        self.assertEqual(res.content, expected.content)
+        return res
+
+    def test_list_matches_sync_view(self):
+        self.assertSameResponse(SHOW_SESSION_URL, ASYNC_SHOW_SESSION_URL)
+        self.assertSameResponse(
+            SHOW_SESSION_URL,
+            ASYNC_SHOW_SESSION_URL,
+            {"planetarium_domes": self.sessions[1].planetarium_dome_id},
+        )
+
+    def test_list_pages_match_sync_view(self):
+        params = {"page_size": 2}
+        pages = 0
+        while True:
+            expected = self.client.get(SHOW_SESSION_URL, params).json()
+            res = self.client.get(ASYNC_SHOW_SESSION_URL, params).json()
+            pages += 1
+
+            self.assertEqual(res["results"], expected["results"])
+            if expected["next"] is None:
+                self.assertIsNone(res["next"])
+                break
+            self.assertEqual(
+                res["next"],
+                expected["next"].replace(
+                    SHOW_SESSION_URL, ASYNC_SHOW_SESSION_URL
+                ),
+            )
+            params["cursor"] = parse_qs(urlsplit(res["next"]).query)["cursor"]
+
+        self.assertEqual(pages, 3)
+
+    def test_detail_matches_sync_view(self):
+        show_session = self.sessions[0]
+        self.assertSameResponse(
+            reverse(
+                "planetarium:showsession-detail", args=[show_session.id]
+            ),
+            async_detail_url(show_session.id),
+        )
+
+    def test_seat_map_matches_sync_view(self):
+        show_session = self.sessions[0]
+        self.assertSameResponse(
+            session_seat_map_url(show_session.id),
+            async_seat_map_url(show_session.id),
+        )
+        res = self.assertSameResponse(
+            session_seat_map_url(show_session.id),
+            async_seat_map_url(show_session.id),
+            HTTP_ACCEPT="application/octet-stream",
+        )
+        self.assertEqual(res["X-Seat-Map-Rows"], "10")
+
+    def test_errors_match_sync_view(self):
+        self.assertSameResponse(
+            reverse("planetarium:showsession-detail", args=[0]),
+            async_detail_url(0),
+        )
+        self.assertSameResponse(
+            SHOW_SESSION_URL,
+            ASYNC_SHOW_SESSION_URL,
+            {"show_time_after": "tomorrow"},
+        )
+
+        self.client.credentials()
+        res = self.client.get(ASYNC_SHOW_SESSION_URL)
+        self.assertEqual(res.status_code, 401)
+        self.assertEqual(
+            res.json(),
+            {"detail": "Authentication credentials were not provided."},
+        )
+
+    def test_sparse_fields_match_sync_view(self):
+        params = {"fields": "id,show_time,seats_available"}
+        self.assertSameResponse(
+            SHOW_SESSION_URL, ASYNC_SHOW_SESSION_URL, params
+        )
+        self.assertSameResponse(
+            session_detail_url(self.sessions[0].id),
+            async_detail_url(self.sessions[0].id),
+            params,
+        )
+
+    def test_expand_is_rejected(self):
+        res = self.client.get(
+            ASYNC_SHOW_SESSION_URL, {"expand": "planetarium_dome"}
+        )
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("expand", res.json())
+
+    def test_write_methods_are_not_allowed(self):
+        res = self.client.post(ASYNC_SHOW_SESSION_URL, {})
+        self.assertEqual(res.status_code, 405)
+
+    @mock.patch.object(CatalogReadThrottle, "rate", "1/min", create=True)
+    def test_reads_are_throttled(self):
+        self.assertEqual(
+            self.client.get(ASYNC_SHOW_SESSION_URL).status_code, 200
+        )
+
+        res = self.client.get(async_detail_url(self.sessions[0].id))
+        self.assertEqual(res.status_code, 429)
+        self.assertIn("Retry-After", res)
+        self.assertIn("throttled", res.json()["detail"])
+        self.assertEqual(self.client.get(SHOW_SESSION_URL).status_code, 429)
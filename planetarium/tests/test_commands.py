@@ -0,0 +1,403 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+
+from planetarium.datagen import SESSION_SLOT
+from planetarium.models import AstronomyShow, PlanetariumDome, \
+    ShowSession, Ticket
+from planetarium.pg_copy import copy_from
+from planetarium.seat_map import SEAT_MAP_CACHE_KEY, get_seat_map
+from planetarium.throttling import CatalogReadThrottle
+from planetarium.tests.test_planetarium_api import (
+    sample_astronomy_show,
+    sample_dome,
+    sample_show_session,
+)
+
+
+class RepairTicketsSoldCommandTest(TestCase):
+    def setUp(self):
+        self.sessions = [sample_show_session() for _ in range(3)]
+        for seat in range(1, 4):
+            Ticket.objects.create(
+                show_session=self.sessions[0], row=1, seat=seat
+            )
+
+    def test_ticket_changes_keep_counter_in_sync(self):
+        self.sessions[0].refresh_from_db()
+        self.assertEqual(self.sessions[0].tickets_sold, 3)
+
+        Ticket.objects.filter(seat=1).delete()
+        self.sessions[0].refresh_from_db()
+        self.assertEqual(self.sessions[0].tickets_sold, 2)
+
+    def test_repair_fixes_drift_in_batches(self):
+        ShowSession.objects.filter(pk=self.sessions[0].pk).update(
+            tickets_sold=0
+        )
+        ShowSession.objects.filter(pk=self.sessions[2].pk).update(
+            tickets_sold=7
+        )
+
+        out = StringIO()
+        call_command("repair_tickets_sold", batch_size=2, stdout=out)
+
+        self.assertIn("Checked 3 show sessions, 2 repaired.", out.getvalue())
+        self.assertEqual(
+            list(
+                ShowSession.objects.order_by("pk")
+                .values_list("tickets_sold", flat=True)
+            ),
+            [3, 0, 0],
+        )
+
+
+class ImportScheduleCommandTest(TestCase):
+    def setUp(self):
+        self.show = sample_astronomy_show(title="Black holes")
+        self.dome = sample_dome(name="Orion")
+        ShowSession.objects.create(
+            astronomy_show=self.show,
+            planetarium_dome=self.dome,
+            show_time="2030-01-01T12:00:00Z",
+        )
+
+    def write_file(self, suffix, content):
+        file = tempfile.NamedTemporaryFile(
+            "w", suffix=suffix, delete=False, encoding="utf-8"
+        )
+        with file:
+            file.write(content)
+        self.addCleanup(os.remove, file.name)
+        return file.name
+
+    def test_import_csv_resolves_names_and_ids(self):
+        path = self.write_file(
+            ".csv",
+            "astronomy_show,planetarium_dome,show_time\n"
+            f"black holes,{self.dome.id},2030-01-01T14:00:00Z\n"
+            f"{self.show.id},Orion,2030-01-01T16:00:00Z\n",
+        )
+
+        out = StringIO()
+        call_command("import_schedule", path, batch_size=1, stdout=out)
+
+        self.assertIn("Imported 2 show sessions", out.getvalue())
+        self.assertIn("Inserted 2/2", out.getvalue())
+        self.assertEqual(
+            ShowSession.objects.filter(planetarium_dome=self.dome).count(), 3
+        )
+
+    def test_conflicts_and_unknown_references_abort_import(self):
+        path = self.write_file(".json", json.dumps([
+            {
+                "astronomy_show": "Black holes",
+                "planetarium_dome": "Orion",
+                "show_time": "2030-01-01T12:30:00Z",
+            },
+            {
+                "astronomy_show": "Black holes",
+                "planetarium_dome": "Orion",
+                "show_time": "2030-01-02T10:00:00Z",
+            },
+            {
+                "astronomy_show": "Black holes",
+                "planetarium_dome": "Orion",
+                "show_time": "2030-01-02T10:15:00Z",
+            },
+            {
+                "astronomy_show": "Comets",
+                "planetarium_dome": "Orion",
+                "show_time": "2030-01-03T10:00:00Z",
+            },
+        ]))
+
+        with self.assertRaises(CommandError) as context:
+            call_command("import_schedule", path, stdout=StringIO())
+
+        message = str(context.exception)
+        self.assertIn("4 problems found", message)
+        self.assertIn("Record 1:", message)
+        self.assertIn("Record 4: unknown astronomy show 'Comets'", message)
+        self.assertEqual(ShowSession.objects.count(), 1)
+
+    def test_dry_run_does_not_insert(self):
+        path = self.write_file(".json", json.dumps([{
+            "astronomy_show": self.show.id,
+            "planetarium_dome": self.dome.id,
+            "show_time": "2030-01-05T10:00:00",
+        }]))
+
+        out = StringIO()
+        call_command("import_schedule", path, dry_run=True, stdout=out)
+
+        self.assertIn("Dry run: 1 show sessions are valid.", out.getvalue())
+        self.assertEqual(ShowSession.objects.count(), 1)
+
+
+class CopyFromTest(TestCase):
+    sql = "COPY t (a) FROM STDIN WITH (FORMAT csv)"
+
+    def test_psycopg2_uses_copy_expert(self):
+        cursor = mock.Mock()
+        buffer = StringIO("1\n2\n")
+        with mock.patch("planetarium.pg_copy.is_psycopg3", False):
+            copy_from(cursor, self.sql, buffer)
+
+        cursor.cursor.copy_expert.assert_called_once_with(self.sql, buffer)
+
+    def test_psycopg3_writes_to_copy(self):
+        cursor = mock.MagicMock()
+        copy = cursor.cursor.copy.return_value.__enter__.return_value
+        with mock.patch("planetarium.pg_copy.is_psycopg3", True), \
+                mock.patch("planetarium.pg_copy.COPY_CHUNK_SIZE", 2):
+            copy_from(cursor, self.sql, StringIO("1\n2\n"))
+
+        cursor.cursor.copy.assert_called_once_with(self.sql)
+        self.assertEqual(
+            "".join(call.args[0] for call in copy.write.call_args_list),
+            "1\n2\n",
+        )
+
+
+class BenchmarkApiCommandTest(TestCase):
+    # Throttling is off unless --throttle, for the async views too.
+    @mock.patch.object(CatalogReadThrottle, "rate", "1/min", create=True)
+    def test_benchmark_reports_each_endpoint(self):
+        file = tempfile.NamedTemporaryFile(suffix=".json", delete=False)
+        file.close()
+        self.addCleanup(os.remove, file.name)
+
+        out = StringIO()
+        call_command(
+            "benchmark_api",
+            generate=True,
+            domes=2,
+            themes=3,
+            shows=4,
+            sessions=6,
+            users=3,
+            tickets=50,
+            requests=3,
+            warmup=0,
+            create_user=True,
+            exports=True,
+            endpoints=[
+                "session-list", "async-session-list", "reservation-create",
+                "token-verify", "ticket-export",
+            ],
+            output=file.name,
+            stdout=out,
+        )
+
+        with open(file.name) as results_file:
+            results = json.load(results_file)
+        self.assertEqual(
+            [result["name"] for result in results["endpoints"]],
+            ["session-list", "async-session-list", "reservation-create",
+             "token-verify", "ticket-export"],
+        )
+        for result in results["endpoints"]:
+            self.assertEqual(result["requests"], 3)
+            self.assertEqual(result["errors"], 0, result)
+            self.assertGreater(result["p95_ms"], 0)
+        self.assertEqual(results["endpoints"][0]["queries"], 1)
+        self.assertEqual(results["dataset"]["sessions"], 7)
+        # The temporary user is deleted with the reservations it made.
+        self.assertEqual(
+            results["dataset"]["tickets"],
+            Ticket.objects.count() + 3,
+        )
+        self.assertFalse(
+            get_user_model().objects.filter(is_staff=True).exists()
+        )
+        self.assertIn("session-list", out.getvalue())
+
+    def test_unexpected_statuses_fail_the_run(self):
+        err = StringIO()
+        with mock.patch.object(CatalogReadThrottle, "rate", "1/min",
+                               create=True), \
+                self.assertRaisesMessage(CommandError, "session-list"):
+            call_command(
+                "benchmark_api",
+                generate=True,
+                domes=1,
+                themes=1,
+                shows=1,
+                sessions=1,
+                users=1,
+                tickets=1,
+                requests=3,
+                warmup=0,
+                create_user=True,
+                throttle=True,
+                endpoints=["session-list", "async-session-list"],
+                stdout=StringIO(),
+                stderr=err,
+            )
+        self.assertIn("session-list: 2 of 3 responses were not 200",
+                      err.getvalue())
+
+    def test_requires_credentials(self):
+        with self.assertRaisesMessage(CommandError, "--create-user"):
+            call_command("benchmark_api", stdout=StringIO())
+
+    def test_refuses_other_accounts(self):
+        get_user_model().objects.create_user(
+            email="real@mail.com", password="realpass123"
+        )
+        with self.assertRaisesMessage(CommandError, "real@mail.com"):
+            call_command(
+                "benchmark_api", create_user=True, stdout=StringIO()
+            )
+
+
+class GenerateDataCommandTest(TestCase):
+    options = {
+        "domes": 3,
+        "themes": 4,
+        "shows": 5,
+        "sessions": 12,
+        "users": 4,
+        "tickets": 300,
+        "start": "2030-01-01",
+    }
+
+    def generate(self, **options):
+        out = StringIO()
+        call_command("generate_data", **{**self.options, **options},
+                     stdout=out)
+        return out.getvalue()
+
+    def snapshot(self):
+        first_session = ShowSession.objects.order_by("pk").first().pk
+        return sorted(
+            (show_session_id - first_session, row, seat)
+            for show_session_id, row, seat in Ticket.objects.values_list(
+                "show_session_id", "row", "seat"
+            )
+        )
+
+    def test_generates_coherent_dataset(self):
+        output = self.generate()
+
+        self.assertIn("12 sessions", output)
+        self.assertEqual(ShowSession.objects.count(), 12)
+        self.assertEqual(
+            get_user_model().objects.filter(
+                email__endswith="@example.com"
+            ).count(),
+            4,
+        )
+        self.assertFalse(
+            get_user_model().objects.first().has_usable_password()
+        )
+        self.assertLessEqual(abs(Ticket.objects.count() - 300), 12)
+        for show in AstronomyShow.objects.prefetch_related("themes"):
+            self.assertIn(len(show.themes.all()), (1, 2, 3))
+
+        sessions = ShowSession.objects.select_related(
+            "planetarium_dome"
+        ).with_actual_tickets_sold().order_by("show_time")
+        schedules = {}
+        for session in sessions:
+            self.assertEqual(session.tickets_sold, session.actual_tickets_sold)
+            self.assertLessEqual(session.tickets_sold, session.capacity)
+            schedules.setdefault(session.planetarium_dome_id, []).append(
+                session.show_time
+            )
+        for times in schedules.values():
+            for before, after in zip(times, times[1:]):
+                self.assertGreaterEqual(after - before, SESSION_SLOT)
+
+        for ticket in Ticket.objects.select_related(
+            "show_session__planetarium_dome", "reservation"
+        ):
+            dome = ticket.show_session.planetarium_dome
+            self.assertLessEqual(ticket.row, dome.rows)
+            self.assertLessEqual(ticket.seat, dome.seats_in_row)
+            self.assertLessEqual(
+                ticket.reservation.created_at, ticket.show_session.show_time
+            )
+
+    def test_same_seed_generates_same_rows(self):
+        self.generate()
+        first = self.snapshot()
+        for model in (ShowSession, AstronomyShow, PlanetariumDome):
+            model.objects.all().delete()
+
+        self.generate()
+        self.assertEqual(self.snapshot(), first)
+
+        ShowSession.objects.all().delete()
+        self.generate(seed=1)
+        self.assertNotEqual(self.snapshot(), first)
+
+    def test_users_share_only_an_explicit_password(self):
+        self.generate(password="shared-pass")
+
+        for user in get_user_model().objects.all():
+            self.assertTrue(user.check_password("shared-pass"))
+
+    def test_bulk_method_resets_sequences(self):
+        with mock.patch.object(
+            connection.ops, "sequence_reset_sql", return_value=[]
+        ) as sequence_reset_sql:
+            self.generate(method="bulk")
+
+        sequence_reset_sql.assert_called_once()
+        self.assertIn(ShowSession, sequence_reset_sql.call_args.args[1])
+
+    def test_reused_session_ids_drop_cached_seat_maps(self):
+        session = sample_show_session()
+        get_seat_map(session)
+        session_id = session.pk
+        session.delete()
+        self.assertIsNotNone(cache.get(SEAT_MAP_CACHE_KEY.format(
+            show_session_id=session_id
+        )))
+
+        self.generate()
+
+        self.assertTrue(ShowSession.objects.filter(pk=session_id).exists())
+        self.assertIsNone(cache.get(SEAT_MAP_CACHE_KEY.format(
+            show_session_id=session_id
+        )))
+
+
+class BenchmarkRenderingCommandTest(TestCase):
+    def test_benchmark_reports_sizes_and_render_times(self):
+        file = tempfile.NamedTemporaryFile(suffix=".json", delete=False)
+        file.close()
+        self.addCleanup(os.remove, file.name)
+
+        call_command(
+            "benchmark_rendering",
+            generate=True,
+            sessions=6,
+            tickets=50,
+            repeat=2,
+            endpoints=["session-list", "ticket-list"],
+            output=file.name,
+            stdout=StringIO(),
+        )
+
+        with open(file.name) as results_file:
+            results = json.load(results_file)["endpoints"]
+        self.assertEqual(
+            [result["name"] for result in results],
+            ["session-list", "ticket-list"],
+        )
+        for result in results:
+            self.assertGreater(result["rows"], 0)
+            self.assertLess(result["gzip_bytes"], result["json_bytes"])
+            self.assertGreater(result["stdlib_ms"], 0)
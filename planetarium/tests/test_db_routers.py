@@ -0,0 +1,144 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections, router
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from planetarium.db_routers import read_from
+from planetarium.models import ShowSession
+from planetarium.tests.test_async_views import ASYNC_SHOW_SESSION_URL
+from planetarium.tests.test_planetarium_api import (
+    RESERVATION_URL,
+    TICKET_EXPORT_URL,
+    SHOW_SESSION_URL,
+    SHOW_THEME_URL,
+    sample_show_session,
+)
+
+REPLICA = "replica"
+
+
+def queried_tables(queries):
+    return " ".join(query["sql"] for query in queries)
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA], REPLICA_STICKY_WINDOW=60)
+class ReplicaRoutingTest(TransactionTestCase):
+    """Route through a second alias that mirrors the test database.
+
+    The alias is registered before the test case resolves "__all__", so it
+    is allowed here without having to exist for the startup system checks.
+    """
+
+    databases = "__all__"
+
+    @classmethod
+    def setUpClass(cls):
+        default = connections["default"].settings_dict
+        connections.settings[REPLICA] = {
+            **default,
+            "TEST": {**default["TEST"], "MIRROR": "default"},
+        }
+        cls.addClassCleanup(cls.remove_replica)
+        super().setUpClass()
+
+    @classmethod
+    def remove_replica(cls):
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+
+    def setUp(self):
+        cache.clear()
+        self.session = sample_show_session()
+        self.user = get_user_model().objects.create_user(
+            email="replica@mail.com", password="replicapass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def get(self, url, client=None):
+        client = client or self.client
+        with CaptureQueriesContext(connections["default"]) as primary, \
+                CaptureQueriesContext(connections[REPLICA]) as replica:
+            res = client.get(url)
+        self.assertEqual(res.status_code, 200)
+        return queried_tables(primary), queried_tables(replica)
+
+    def test_router_decisions(self):
+        self.assertEqual(router.db_for_read(ShowSession), "default")
+        with read_from(REPLICA):
+            self.assertEqual(router.db_for_read(ShowSession), REPLICA)
+            self.assertEqual(router.db_for_write(ShowSession), "default")
+            session = ShowSession.objects.get(pk=self.session.pk)
+        self.assertEqual(session._state.db, REPLICA)
+        self.assertEqual(
+            router.db_for_write(ShowSession, instance=session), "default"
+        )
+        self.assertFalse(router.allow_migrate(REPLICA, "planetarium"))
+
+    def test_safe_requests_read_from_replica(self):
+        primary, replica = self.get(SHOW_SESSION_URL)
+
+        self.assertIn("planetarium_showsession", replica)
+        self.assertNotIn("planetarium_showsession", primary)
+
+    def test_async_views_read_from_replica(self):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+        primary, replica = self.get(ASYNC_SHOW_SESSION_URL, client)
+
+        self.assertIn("planetarium_showsession", replica)
+        self.assertNotIn("planetarium_showsession", primary)
+
+    def test_cached_responses_are_built_from_primary(self):
+        primary, replica = self.get(SHOW_THEME_URL)
+
+        self.assertIn("planetarium_showtheme", primary)
+        self.assertNotIn("planetarium_showtheme", replica)
+
+    def test_writer_reads_from_primary_within_window(self):
+        res = self.client.post(
+            RESERVATION_URL,
+            {"tickets": [
+                {"show_session": self.session.id, "row": 1, "seat": 1}
+            ]},
+            format="json",
+        )
+        self.assertEqual(res.status_code, 201)
+
+        primary, replica = self.get(RESERVATION_URL)
+        self.assertIn("planetarium_reservation", primary)
+        self.assertNotIn("planetarium_reservation", replica)
+
+        other = APIClient()
+        other.force_authenticate(
+            get_user_model().objects.create_user(
+                email="other@mail.com", password="otherpass123"
+            )
+        )
+        primary, replica = self.get(RESERVATION_URL, other)
+        self.assertIn("planetarium_reservation", replica)
+
+    def test_streamed_exports_read_from_replica(self):
+        self.user.is_staff = True
+        self.user.save()
+
+        res = self.client.get(TICKET_EXPORT_URL)
+        with CaptureQueriesContext(connections["default"]) as primary, \
+                CaptureQueriesContext(connections[REPLICA]) as replica:
+            b"".join(res.streaming_content)
+
+        self.assertNotIn("planetarium_ticket", queried_tables(primary))
+        self.assertIn("planetarium_ticket", queried_tables(replica))
+
+    @override_settings(REPLICA_STICKY_WINDOW=0)
+    def test_pin_expires_after_window(self):
+        self.client.post(SHOW_SESSION_URL, {})
+
+        primary, replica = self.get(SHOW_SESSION_URL)
+        self.assertIn("planetarium_showsession", replica)
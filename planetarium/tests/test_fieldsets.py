@@ -0,0 +1,166 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from planetarium.fieldsets import parse_field_tree
+from planetarium.models import Reservation, ShowSession, Ticket
+from planetarium.tests.test_planetarium_api import (
+    ASTRONOMY_SHOW_URL,
+    PLANETARIUM_DOME_URL,
+    RESERVATION_URL,
+    SHOW_SESSION_URL,
+    TICKET_URL,
+    sample_astronomy_show,
+    sample_dome,
+    session_detail_url,
+)
+
+
+class ParseFieldTreeTest(TestCase):
+    def test_parse_field_tree(self):
+        self.assertIsNone(parse_field_tree(None))
+        self.assertEqual(parse_field_tree(""), {})
+        self.assertEqual(
+            parse_field_tree("id, show_session.row,show_session.seat,,"),
+            {"id": {}, "show_session": {"row": {}, "seat": {}}},
+        )
+
+
+class SparseFieldsApiTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="fields@mail.com", password="fieldspass123"
+        )
+        self.client.force_authenticate(user=self.user)
+
+        self.dome = sample_dome()
+        self.show = sample_astronomy_show()
+        self.sessions = [
+            ShowSession.objects.create(
+                astronomy_show=self.show,
+                planetarium_dome=self.dome,
+                show_time=timezone.now(),
+            )
+            for _ in range(3)
+        ]
+        self.reservation = Reservation.objects.create(user=self.user)
+        for seat, session in enumerate(self.sessions, 1):
+            Ticket.objects.create(
+                show_session=session,
+                reservation=self.reservation,
+                row=1,
+                seat=seat,
+            )
+
+    def get(self, url, params):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, params)
+        self.assertEqual(res.status_code, 200)
+        data = res.data["results"] if "results" in res.data else res.data
+        return data, [query["sql"] for query in queries.captured_queries]
+
+    def test_default_output_is_unchanged(self):
+        data, _ = self.get(SHOW_SESSION_URL, {})
+        self.assertEqual(
+            list(data[0]),
+            ["id", "astronomy_show", "planetarium_dome", "show_time",
+             "capacity", "tickets_sold", "seats_available"],
+        )
+
+    def test_unselected_columns_are_not_read(self):
+        data, queries = self.get(PLANETARIUM_DOME_URL, {"fields": "id,name"})
+
+        self.assertEqual(data, [{"id": self.dome.id, "name": self.dome.name}])
+        self.assertNotIn("seats_in_row", queries[0])
+
+    def test_unselected_relations_are_not_prefetched(self):
+        data, queries = self.get(ASTRONOMY_SHOW_URL, {"fields": "id,title"})
+
+        self.assertEqual(
+            data, [{"id": self.show.id, "title": self.show.title}]
+        )
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("description", queries[0])
+
+    def test_session_list_reads_only_selected_columns(self):
+        data, queries = self.get(
+            SHOW_SESSION_URL, {"fields": "id,tickets_sold"}
+        )
+
+        self.assertEqual(
+            {tuple(session) for session in data}, {("id", "tickets_sold")}
+        )
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("JOIN", queries[0])
+
+    def test_session_detail_computes_capacity_from_dome(self):
+        data, queries = self.get(
+            session_detail_url(self.sessions[0].id),
+            {"fields": "capacity,seats_available"},
+        )
+
+        self.assertEqual(data, {"capacity": 200, "seats_available": 199})
+        self.assertEqual(len(queries), 1)
+
+    def test_ticket_list_nested_fields(self):
+        data, queries = self.get(TICKET_URL, {"fields": "row,seat"})
+        self.assertEqual(data[0], {"row": 1, "seat": 1})
+        self.assertNotIn("JOIN", queries[0])
+
+        data, _ = self.get(TICKET_URL, {
+            "fields": "seat,show_session.id,show_session.capacity",
+        })
+        self.assertEqual(
+            data[0],
+            {"seat": 1,
+             "show_session": {"id": self.sessions[0].id, "capacity": 200}},
+        )
+
+    def test_expand_embeds_related_objects(self):
+        data, queries = self.get(SHOW_SESSION_URL, {
+            "fields": "id,astronomy_show,planetarium_dome.name",
+            "expand": "astronomy_show,planetarium_dome",
+        })
+
+        self.assertEqual(len(data), 3)
+        self.assertEqual(data[0]["astronomy_show"]["title"], self.show.title)
+        self.assertEqual(
+            data[0]["astronomy_show"]["themes"][0]["id"],
+            self.show.themes.get().id,
+        )
+        self.assertEqual(
+            data[0]["planetarium_dome"], {"name": self.dome.name}
+        )
+        # Sessions with show and dome joined, then the shows' themes.
+        self.assertEqual(len(queries), 2)
+
+    def test_expand_through_nested_serializer(self):
+        data, queries = self.get(RESERVATION_URL, {
+            "fields": "id,tickets.seat,tickets.show_session.show_time",
+            "expand": "tickets.show_session",
+        })
+
+        self.assertEqual(len(data), 1)
+        self.assertEqual(
+            sorted(ticket["seat"] for ticket in data[0]["tickets"]),
+            [1, 2, 3],
+        )
+        self.assertEqual(
+            set(data[0]["tickets"][0]["show_session"]), {"show_time"}
+        )
+        self.assertEqual(len(queries), 2)
+
+    def test_writes_ignore_fields(self):
+        self.user.is_staff = True
+        self.user.save()
+        res = self.client.post(
+            f"{PLANETARIUM_DOME_URL}?fields=id",
+            {"name": "Vega", "rows": 2, "seats_in_row": 3},
+        )
+
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.data["capacity"], 6)
@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from planetarium.models import ShowSession, Ticket
+from planetarium.serializers import ShowSessionSerializer, TicketSerializer
+from planetarium.tests.test_planetarium_api import (
+    SHOW_SESSION_URL,
+    TICKET_URL,
+    sample_astronomy_show,
+    sample_dome,
+)
+
+
+class ValuesReaderParityTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="reader@mail.com", password="readerpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+
+        show = sample_astronomy_show()
+        domes = [sample_dome(), sample_dome(name="Orion", rows=3)]
+        start = timezone.now().replace(microsecond=123456)
+        for i in range(6):
+            session = ShowSession.objects.create(
+                astronomy_show=show,
+                planetarium_dome=domes[i % 2],
+                show_time=start + timedelta(days=i, seconds=i),
+            )
+            for seat in range(1, i + 1):
+                Ticket.objects.create(
+                    show_session=session, row=1, seat=seat
+                )
+
+    def assertSameJSON(self, res, serializer_data):
+        self.assertEqual(res.status_code, 200)
+        renderer = JSONRenderer()
+        self.assertEqual(
+            renderer.render(res.data["results"]),
+            renderer.render(serializer_data),
+        )
+
+    def test_show_session_list_matches_serializer(self):
+        res = self.client.get(SHOW_SESSION_URL, {"page_size": 100})
+        sessions = ShowSession.objects.order_by("-show_time", "-id")
+        self.assertSameJSON(
+            res, ShowSessionSerializer(sessions, many=True).data
+        )
+
+    def test_ticket_list_matches_serializer(self):
+        res = self.client.get(TICKET_URL, {"page_size": 100})
+        tickets = Ticket.objects.order_by("id")
+        self.assertSameJSON(res, TicketSerializer(tickets, many=True).data)
@@ -1,14 +1,27 @@
+import base64
+import json
+import random
 import tempfile
+import threading
 import os
+from unittest import mock, skipIf, skipUnless
+
+from django.core.cache import cache
+from django.db import connection
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
+from datetime import timedelta
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from planetarium.checks import check_seat_hold_cache
+from planetarium.holds import BaseSeatHoldStore, CacheSeatHoldStore, \
+    get_seat_hold_store
 from planetarium.models import (
     PlanetariumDome,
     ShowTheme,
@@ -25,6 +38,10 @@ from planetarium.serializers import (
     ShowSessionSerializer,
     TicketSerializer
 )
+from planetarium.profiling import RequestProfilingMiddleware, query_shape
+from planetarium.seat_map import SEAT_MAP_CACHE_KEY, find_best_seats, \
+    invalidate_seat_map, mark_held_seats
+from planetarium.tests.query_budget import QueryBudgetMixin
 from user.models import User
 
 PLANETARIUM_DOME_URL = reverse("planetarium:planetariumdome-list")
@@ -33,6 +50,10 @@ SHOW_SESSION_URL = reverse("planetarium:showsession-list")
 SHOW_THEME_URL = reverse("planetarium:showtheme-list")
 RESERVATION_URL = reverse("planetarium:reservation-list")
 TICKET_URL = reverse("planetarium:ticket-list")
+AUTOCOMPLETE_URL = reverse("planetarium:autocomplete")
+TICKET_EXPORT_URL = reverse("planetarium:ticket-export")
+RESERVATION_EXPORT_URL = reverse("planetarium:reservation-export")
+STATS_URL = reverse("planetarium:stats")
 
 def dome_detail_url(dome_id):
     return reverse("planetarium:planetariumdome-detail", args=[dome_id])
@@ -52,6 +73,15 @@ def reservation_detail_url(reservation_id):
 def ticket_detail_url(ticket_id):
     return reverse("planetarium:ticket-detail", args=[ticket_id])
 
+def session_seat_map_url(session_id):
+    return reverse("planetarium:showsession-seat-map", args=[session_id])
+
+def session_holds_url(session_id):
+    return reverse("planetarium:showsession-holds", args=[session_id])
+
+def session_best_seats_url(session_id):
+    return reverse("planetarium:showsession-best-seats", args=[session_id])
+
 def sample_dome(**params):
     defaults = {
         "name": "Andromeda",
@@ -214,8 +244,8 @@ class AdminApiTest(TestCase):
             {"astronomy_shows": str(self.session.astronomy_show.id)}
         )
         self.assertEqual(res_by_show.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res_by_show.data), 1)
-        self.assertEqual(res_by_show.data[0]["astronomy_show"],
+        self.assertEqual(len(res_by_show.data["results"]), 1)
+        self.assertEqual(res_by_show.data["results"][0]["astronomy_show"],
                          self.session.astronomy_show.id)
 
         res_by_dome = self.client.get(
@@ -223,8 +253,8 @@ class AdminApiTest(TestCase):
             {"planetarium_domes": str(self.session.planetarium_dome.id)}
         )
         self.assertEqual(res_by_dome.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res_by_dome.data), 1)
-        self.assertEqual(res_by_dome.data[0]["planetarium_dome"],
+        self.assertEqual(len(res_by_dome.data["results"]), 1)
+        self.assertEqual(res_by_dome.data["results"][0]["planetarium_dome"],
                          self.session.planetarium_dome.id)
 
         res_combined = self.client.get(
@@ -235,8 +265,8 @@ class AdminApiTest(TestCase):
             }
         )
         self.assertEqual(res_combined.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res_combined.data), 1)
-        self.assertEqual(res_combined.data[0]["id"], self.session.id)
+        self.assertEqual(len(res_combined.data["results"]), 1)
+        self.assertEqual(res_combined.data["results"][0]["id"], self.session.id)
 
         res_empty = self.client.get(
             SHOW_SESSION_URL,
@@ -246,7 +276,44 @@ class AdminApiTest(TestCase):
             }
         )
         self.assertEqual(res_empty.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res_empty.data), 0)
+        self.assertEqual(len(res_empty.data["results"]), 0)
+
+    def test_filter_show_sessions_by_time_range_and_themes(self):
+        friday = timezone.make_aware(timezone.datetime(2030, 5, 3, 19, 0))
+        astro = sample_show_theme(name="Astrobiology")
+        alien_show = sample_astronomy_show(title="Alien Life", themes=astro)
+        weekend = [
+            sample_show_session(
+                astronomy_show=alien_show,
+                planetarium_dome=self.dome,
+                show_time=friday + timedelta(days=day),
+            )
+            for day in range(3)
+        ]
+        sample_show_session(show_time=friday + timedelta(days=1))
+        sample_show_session(
+            astronomy_show=alien_show,
+            planetarium_dome=self.dome,
+            show_time=friday + timedelta(days=3),
+        )
+
+        res = self.client.get(
+            SHOW_SESSION_URL,
+            {
+                "show_time_after": "2030-05-03",
+                "show_time_before": "2030-05-05",
+                "themes": str(astro.id),
+                "planetarium_domes": str(self.dome.id),
+            },
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [session["id"] for session in res.data["results"]],
+            [session.id for session in reversed(weekend)],
+        )
+
+        res = self.client.get(SHOW_SESSION_URL, {"show_time_after": "soon"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
     def test_filter_show_themes_by_name(self):
         other_theme = sample_show_theme(name="Astrobiology")
@@ -255,10 +322,86 @@ class AdminApiTest(TestCase):
             {"name": "astro"}
         )
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]["name"],
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertEqual(res.data["results"][0]["name"],
                          other_theme.name)
 
+    @skipIf(connection.vendor == "postgresql", "Non-PostgreSQL fallback")
+    def test_search_astronomy_shows_falls_back_to_title_match(self):
+        sample_astronomy_show(title="Saturn rings", description="Planets")
+        sample_astronomy_show(title="Moons", description="Saturn moons")
+
+        res = self.client.get(ASTRONOMY_SHOW_URL, {"search": "saturn"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [show["title"] for show in res.data["results"]], ["Saturn rings"]
+        )
+
+    @skipUnless(connection.vendor == "postgresql", "Needs PostgreSQL")
+    def test_search_astronomy_shows_ranks_title_above_description(self):
+        in_description = sample_astronomy_show(
+            title="Moons", description="The moons of Saturn"
+        )
+        in_title = sample_astronomy_show(
+            title="Saturn rings", description="Planets"
+        )
+
+        res = self.client.get(ASTRONOMY_SHOW_URL, {"search": "saturn"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [show["id"] for show in res.data["results"]],
+            [in_title.id, in_description.id],
+        )
+
+    def test_filter_domes_by_name(self):
+        sample_dome(name="Orion")
+        res = self.client.get(PLANETARIUM_DOME_URL, {"name": "ori"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [dome["name"] for dome in res.data["results"]], ["Orion"]
+        )
+
+    def test_autocomplete_across_catalog(self):
+        sample_dome(name="Orion")
+        sample_show_theme(name="Orbits")
+        sample_astronomy_show(title="Journey to Oort cloud")
+        sample_astronomy_show(title="Origin of stars")
+
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "or", "limit": 3})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(item["type"], item["label"]) for item in res.data["results"]],
+            [("theme", "Orbits"), ("show", "Origin of stars"),
+             ("dome", "Orion")],
+        )
+
+    def test_catalog_list_is_cached_until_model_changes(self):
+        self.client.get(SHOW_THEME_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(SHOW_THEME_URL)
+        self.assertEqual(res["X-Cache"], "HIT")
+
+        theme = sample_show_theme(name="Exoplanets")
+        res = self.client.get(SHOW_THEME_URL)
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertIn(
+            theme.id, [theme["id"] for theme in res.data["results"]]
+        )
+
+    def test_show_cache_is_invalidated_by_theme_changes(self):
+        url = show_detail_url(self.astronomy_show_for_update.id)
+        theme = sample_show_theme(name="Black holes")
+        self.client.get(url)
+        self.assertEqual(self.client.get(url)["X-Cache"], "HIT")
+
+        self.astronomy_show_for_update.themes.add(theme)
+        res = self.client.get(url)
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertIn(
+            "Black holes", [theme["name"] for theme in res.data["themes"]]
+        )
+
     def test_filter_astronomy_shows_by_title_and_themes(self):
         theme_cosmo = sample_show_theme(name="Cosmogony")
         theme_astro = sample_show_theme(name="Astrobiology")
@@ -280,7 +423,7 @@ class AdminApiTest(TestCase):
         )
         res_by_title = self.client.get(ASTRONOMY_SHOW_URL, {"title": "star"})
         self.assertEqual(res_by_title.status_code, status.HTTP_200_OK)
-        returned_titles = [s["title"].lower() for s in res_by_title.data]
+        returned_titles = [s["title"].lower() for s in res_by_title.data["results"]]
         self.assertIn("star come back".lower(), returned_titles)
         self.assertIn("star and aliens".lower(), returned_titles)
         self.assertNotIn("alien life".lower(), returned_titles)
@@ -288,7 +431,7 @@ class AdminApiTest(TestCase):
         res_by_theme = self.client.get(ASTRONOMY_SHOW_URL,
                                        {"themes": str(theme_astro.id)})
         self.assertEqual(res_by_theme.status_code, status.HTTP_200_OK)
-        returned_ids = [s["id"] for s in res_by_theme.data]
+        returned_ids = [s["id"] for s in res_by_theme.data["results"]]
         self.assertIn(show_alien.id, returned_ids)
         self.assertIn(show_mixed.id, returned_ids)
         self.assertNotIn(show_star.id, returned_ids)
@@ -298,7 +441,7 @@ class AdminApiTest(TestCase):
             {"title": "star", "themes": str(theme_astro.id)}
         )
         self.assertEqual(res_combined.status_code, status.HTTP_200_OK)
-        combined_ids = [s["id"] for s in res_combined.data]
+        combined_ids = [s["id"] for s in res_combined.data["results"]]
         self.assertIn(show_mixed.id, combined_ids)
         self.assertNotIn(show_star.id, combined_ids)
         self.assertNotIn(show_alien.id, combined_ids)
@@ -308,4 +451,631 @@ class AdminApiTest(TestCase):
             {"title": "nonexistent", "themes": str(theme_astro.id)}
         )
         self.assertEqual(res_empty.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res_empty.data), 0)
+        self.assertEqual(len(res_empty.data["results"]), 0)
+
+    def test_show_session_list_annotates_availability(self):
+        for seat in range(1, 4):
+            Ticket.objects.create(row=1, seat=seat, show_session=self.session)
+        sample_show_session(planetarium_dome=self.dome)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(SHOW_SESSION_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        by_id = {session["id"]: session for session in res.data["results"]}
+        session = by_id[self.session.id]
+        self.assertEqual(session["capacity"], 200)
+        self.assertEqual(session["tickets_sold"], 3)
+        self.assertEqual(session["seats_available"], 197)
+        self.session.refresh_from_db()
+        self.assertEqual(session["tickets_sold"], self.session.tickets_sold)
+
+    def test_show_session_list_keyset_pagination(self):
+        show_time = timezone.now()
+        for _ in range(4):
+            sample_show_session(
+                astronomy_show=self.session.astronomy_show,
+                planetarium_dome=self.dome,
+                show_time=show_time,
+            )
+        expected = list(
+            ShowSession.objects.order_by("-show_time", "-id")
+            .values_list("id", flat=True)
+        )
+
+        pages = []
+        url = SHOW_SESSION_URL + "?page_size=2"
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            pages.append([session["id"] for session in res.data["results"]])
+            url = res.data["next"]
+        self.assertEqual(sum(pages, []), expected)
+
+        res = self.client.get(res.data["previous"])
+        self.assertEqual(
+            [session["id"] for session in res.data["results"]], pages[-2]
+        )
+
+    def test_session_seat_map(self):
+        cache.clear()
+        Ticket.objects.create(row=1, seat=1, show_session=self.session)
+        Ticket.objects.create(row=2, seat=20, show_session=self.session)
+        url = session_seat_map_url(self.session.id)
+
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["rows"], 10)
+        self.assertEqual(res.data["seats_in_row"], 20)
+        bitmap = base64.b64decode(res.data["bitmap"])
+        self.assertEqual(len(bitmap), 25)
+        self.assertEqual(bitmap[0], 0b10000000)
+        self.assertEqual(bitmap[4], 0b00000001)
+        self.assertEqual(sum(bin(byte).count("1") for byte in bitmap), 2)
+
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+        Ticket.objects.create(row=1, seat=2, show_session=self.session)
+        res = self.client.get(url, HTTP_ACCEPT="application/octet-stream")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "application/octet-stream")
+        self.assertEqual(res.content[0], 0b11000000)
+
+    def test_seat_map_cached_before_commit_is_dropped(self):
+        cache.clear()
+        url = session_seat_map_url(self.session.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.create(row=3, seat=1, show_session=self.session)
+            # Another request caches the map before the ticket commits.
+            cache.set(
+                SEAT_MAP_CACHE_KEY.format(show_session_id=self.session.id),
+                (10, 20, bytes(25)),
+                timeout=None,
+            )
+
+        res = self.client.get(url)
+        self.assertEqual(base64.b64decode(res.data["bitmap"])[5], 0b10000000)
+
+    def test_stats_report_cache_and_connections(self):
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(res.data["response_cache"]), {"hits", "misses"}
+        )
+        default = res.data["databases"]["default"]
+        self.assertIn("conn_max_age", default)
+        self.assertIn("conn_health_checks", default)
+        self.assertIsInstance(default["connections_opened"], int)
+
+
+class ReservationApiTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="buyer@mail.com",
+            password="buyerpass123",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.session = sample_show_session()
+
+    def test_stats_require_admin(self):
+        res = self.client.get(STATS_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_create_reservation_with_tickets(self):
+        payload = {
+            "tickets": [
+                {"show_session": self.session.id, "row": 1, "seat": seat}
+                for seat in range(1, 7)
+            ]
+        }
+        res = self.client.post(RESERVATION_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        reservation = Reservation.objects.get(id=res.data["id"])
+        self.assertEqual(reservation.user, self.user)
+        self.assertEqual(reservation.tickets.count(), 6)
+        self.assertEqual(len(res.data["tickets"]), 6)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.tickets_sold, 6)
+
+    def test_create_reservation_requires_authentication(self):
+        self.client.force_authenticate(user=None)
+        payload = {
+            "tickets": [{"show_session": self.session.id, "row": 1, "seat": 1}]
+        }
+        res = self.client.post(RESERVATION_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_create_reservation_rejects_seat_outside_dome(self):
+        payload = {
+            "tickets": [
+                {"show_session": self.session.id, "row": 1, "seat": 1},
+                {"show_session": self.session.id, "row": 11, "seat": 1},
+            ]
+        }
+        res = self.client.post(RESERVATION_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Reservation.objects.exists())
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_create_reservation_fails_whole_request_on_taken_seat(self):
+        Ticket.objects.create(row=1, seat=2, show_session=self.session)
+        payload = {
+            "tickets": [
+                {"show_session": self.session.id, "row": 1, "seat": 1},
+                {"show_session": self.session.id, "row": 1, "seat": 2},
+            ]
+        }
+        res = self.client.post(RESERVATION_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Reservation.objects.exists())
+        self.assertEqual(Ticket.objects.count(), 1)
+
+
+@override_settings(SEAT_HOLD_STORE="planetarium.holds.LocMemSeatHoldStore")
+class SeatHoldApiTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        get_seat_hold_store().clear()
+        self.client = APIClient()
+        self.holder = get_user_model().objects.create_user(
+            email="holder@mail.com",
+            password="holderpass123",
+        )
+        self.other = get_user_model().objects.create_user(
+            email="other@mail.com",
+            password="otherpass123",
+        )
+        self.session = sample_show_session()
+        self.client.force_authenticate(user=self.holder)
+
+    def hold(self, *seats):
+        return self.client.post(
+            session_holds_url(self.session.id),
+            {"seats": [{"row": row, "seat": seat} for row, seat in seats]},
+            format="json",
+        )
+
+    def test_held_seats_are_unavailable_to_others(self):
+        res = self.hold((1, 1), (1, 2))
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = self.client.get(session_seat_map_url(self.session.id))
+        self.assertEqual(res.data["seats_held"], 2)
+        self.assertEqual(base64.b64decode(res.data["bitmap"])[0], 0b11000000)
+
+        self.client.force_authenticate(user=self.other)
+        res = self.hold((1, 2), (1, 3))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.client.post(
+            RESERVATION_URL,
+            {"tickets": [
+                {"show_session": self.session.id, "row": 1, "seat": 1}
+            ]},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_reservation_turns_own_holds_into_tickets(self):
+        self.hold((2, 5), (2, 6))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                RESERVATION_URL,
+                {"tickets": [
+                    {"show_session": self.session.id, "row": 2, "seat": 5},
+                    {"show_session": self.session.id, "row": 2, "seat": 6},
+                ]},
+                format="json",
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.session.tickets.count(), 2)
+        res = self.client.get(session_seat_map_url(self.session.id))
+        self.assertEqual(res.data["seats_held"], 0)
+
+    def test_release_holds(self):
+        self.hold((3, 3))
+        res = self.client.delete(session_holds_url(self.session.id))
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+        self.client.force_authenticate(user=self.other)
+        res = self.hold((3, 3))
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    @override_settings(SEAT_HOLD_STORE="planetarium.holds.CacheSeatHoldStore")
+    def test_cache_store_holds_are_exclusive(self):
+        self.hold((4, 4))
+        self.client.force_authenticate(user=self.other)
+        res = self.hold((4, 4))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_session_availability_counts_holds(self):
+        self.hold((5, 1), (5, 2))
+        Ticket.objects.create(
+            show_session=self.session,
+            reservation=Reservation.objects.create(user=self.holder),
+            row=6,
+            seat=1,
+        )
+
+        res = self.client.get(SHOW_SESSION_URL)
+        self.assertEqual(res.data["results"][0]["seats_available"], 197)
+        res = self.client.get(
+            SHOW_SESSION_URL, {"expand": "planetarium_dome"}
+        )
+        self.assertEqual(res.data["results"][0]["seats_available"], 197)
+        res = self.client.get(session_detail_url(self.session.id))
+        self.assertEqual(res.data["seats_available"], 197)
+        res = self.client.get(TICKET_URL)
+        self.assertEqual(
+            res.data["results"][0]["show_session"]["seats_available"], 197
+        )
+
+    def test_nested_sessions_look_up_holds_once_per_list(self):
+        self.hold((5, 1))
+        reservation = Reservation.objects.create(user=self.holder)
+        for row in range(1, 4):
+            Ticket.objects.create(
+                show_session=sample_show_session(),
+                reservation=reservation,
+                row=row,
+                seat=1,
+            )
+        Ticket.objects.create(
+            show_session=self.session, reservation=reservation, row=6, seat=1
+        )
+        store = get_seat_hold_store()
+
+        for url, params in (
+            (TICKET_URL, {}),
+            (TICKET_URL, {"expand": "show_session"}),
+            (RESERVATION_URL, {"expand": "tickets.show_session"}),
+        ):
+            with mock.patch.object(
+                store, "held_counts", wraps=store.held_counts
+            ) as held_counts:
+                res = self.client.get(url, params)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(held_counts.call_count, 1, url)
+
+        seats_available = {
+            ticket["show_session"]["id"]:
+                ticket["show_session"]["seats_available"]
+            for ticket in res.data["results"][0]["tickets"]
+        }
+        self.assertEqual(seats_available[self.session.id], 198)
+
+    def test_cache_store_index_keeps_concurrent_holds(self):
+        store = CacheSeatHoldStore()
+        threads = [
+            threading.Thread(
+                target=store.hold,
+                args=(self.session.id, [(7, seat)], seat),
+            )
+            for seat in range(1, 21)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(store.get_holds(self.session.id)), 20)
+        self.assertEqual(store.held_counts([self.session.id, 0]),
+                         {self.session.id: 20})
+
+    @override_settings(SEAT_HOLD_STORE="planetarium.holds.CacheSeatHoldStore")
+    def test_busy_index_lock_gives_up_the_seats(self):
+        store = get_seat_hold_store()
+        cache.add(
+            store.LOCK_KEY.format(show_session_id=self.session.id), "other"
+        )
+        with mock.patch.object(store, "LOCK_WAIT", 0):
+            res = self.hold((8, 8))
+
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(res["Retry-After"], "1")
+        self.assertEqual(store.owners(self.session.id, [(8, 8)]), {})
+
+    def test_hold_stores_must_implement_every_operation(self):
+        class PartialStore(BaseSeatHoldStore):
+            def get_holds(self, show_session_id):
+                return {}
+
+        with self.assertRaises(TypeError):
+            PartialStore()
+
+    @override_settings(
+        SEAT_HOLD_STORE="planetarium.holds.CacheSeatHoldStore", DEBUG=False
+    )
+    def test_local_memory_cache_store_warns_outside_debug(self):
+        self.assertEqual(
+            [warning.id for warning in check_seat_hold_cache(None)],
+            ["planetarium.W001"],
+        )
+        with override_settings(DEBUG=True):
+            self.assertEqual(check_seat_hold_cache(None), [])
+        with override_settings(
+            SEAT_HOLD_STORE="planetarium.holds.LocMemSeatHoldStore"
+        ):
+            self.assertEqual(check_seat_hold_cache(None), [])
+
+
+@override_settings(SEAT_HOLD_STORE="planetarium.holds.LocMemSeatHoldStore")
+class BestSeatsApiTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        get_seat_hold_store().clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="buyer@mail.com", password="buyerpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.session = sample_show_session()
+
+    def best_seats(self, count):
+        res = self.client.get(
+            session_best_seats_url(self.session.id), {"count": count}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [(seat["row"], seat["seat"]) for seat in res.data["seats"]]
+
+    def test_empty_dome_gets_centre_block(self):
+        res = self.client.get(
+            session_best_seats_url(self.session.id), {"count": 4}
+        )
+
+        self.assertEqual(res.data["distance"], 0.5)
+        self.assertEqual(
+            [(seat["row"], seat["seat"]) for seat in res.data["seats"]],
+            [(5, 9), (5, 10), (5, 11), (5, 12)],
+        )
+
+    def test_skips_sold_and_other_buyers_held_seats(self):
+        Ticket.objects.create(show_session=self.session, row=5, seat=10)
+        self.assertEqual(self.best_seats(4)[0], (6, 9))
+
+        get_seat_hold_store().hold(self.session.id, [(6, 10)], owner=0)
+        self.assertEqual(self.best_seats(4)[0], (4, 9))
+
+        get_seat_hold_store().hold(
+            self.session.id, [(4, 10)], owner=self.user.id
+        )
+        self.assertEqual(
+            self.best_seats(4), [(4, 9), (4, 10), (4, 11), (4, 12)]
+        )
+
+    def test_no_block_available(self):
+        Ticket.objects.bulk_create(
+            Ticket(show_session=self.session, row=row, seat=seat)
+            for row in range(1, 11)
+            for seat in range(2, 21, 2)
+        )
+        invalidate_seat_map(self.session.id)
+
+        self.assertEqual(len(self.best_seats(1)), 1)
+        self.assertEqual(self.best_seats(2), [])
+
+    def test_count_is_validated(self):
+        url = session_best_seats_url(self.session.id)
+
+        for params in ({}, {"count": 0}, {"count": 21}):
+            res = self.client.get(url, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_matches_exhaustive_search(self):
+        rng = random.Random(0)
+        for _ in range(300):
+            rows, seats_in_row = rng.randint(1, 6), rng.randint(1, 70)
+            count = rng.randint(1, seats_in_row)
+            taken = {
+                (row, seat)
+                for row in range(1, rows + 1)
+                for seat in range(1, seats_in_row + 1)
+                if rng.random() < 0.6
+            }
+            bitmap = bytearray((rows * seats_in_row + 7) // 8)
+            seat_map = mark_held_seats((rows, seats_in_row, bytes(bitmap)),
+                                       taken)
+
+            blocks = [
+                (
+                    (2 * row - rows - 1) ** 2
+                    + (2 * first + count - seats_in_row - 2) ** 2,
+                    row,
+                    first,
+                )
+                for row in range(1, rows + 1)
+                for first in range(1, seats_in_row - count + 2)
+                if not taken & {
+                    (row, seat) for seat in range(first, first + count)
+                }
+            ]
+            expected = None
+            if blocks:
+                score, row, first = min(blocks)
+                expected = (row, first, score ** 0.5 / 2)
+            self.assertEqual(find_best_seats(seat_map, count), expected)
+
+
+class ExportApiTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            email="finance@mail.com", password="financepass123", is_staff=True
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.reservation = sample_reservation()
+        self.session = sample_show_session()
+        for seat in (1, 2):
+            Ticket.objects.create(
+                show_session=self.session,
+                reservation=self.reservation,
+                row=3,
+                seat=seat,
+            )
+
+    def test_export_tickets_as_csv(self):
+        res = self.client.get(TICKET_EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "text/csv")
+        lines = b"".join(res.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith("id,row,seat,reservation_id"))
+        self.assertIn("Star come back,", lines[1])
+        self.assertIn(",Andromeda", lines[1])
+
+    def test_export_reservations_as_ndjson(self):
+        res = self.client.get(
+            RESERVATION_EXPORT_URL, {"export_format": "ndjson"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        rows = [
+            json.loads(line)
+            for line in b"".join(res.streaming_content).splitlines()
+        ]
+        self.assertEqual([row["seat"] for row in rows], [1, 2])
+        self.assertEqual(rows[0]["user_email"], "testuser")
+        self.assertEqual(rows[0]["show_session_id"], self.session.id)
+
+    def test_csv_export_escapes_formulas(self):
+        AstronomyShow.objects.update(title="=HYPERLINK(\"x\")")
+        PlanetariumDome.objects.update(name="@SUM(1)")
+
+        res = self.client.get(TICKET_EXPORT_URL)
+        lines = b"".join(res.streaming_content).decode().splitlines()
+        self.assertIn(',"\'=HYPERLINK(""x"")",', lines[1])
+        self.assertTrue(lines[1].endswith(",'@SUM(1)"))
+
+        res = self.client.get(
+            RESERVATION_EXPORT_URL, {"export_format": "ndjson"}
+        )
+        row = json.loads(b"".join(res.streaming_content).splitlines()[0])
+        self.assertEqual(row["planetarium_dome_name"], "@SUM(1)")
+
+    def test_export_requires_admin(self):
+        self.client.force_authenticate(user=self.reservation.user)
+        res = self.client.get(TICKET_EXPORT_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class QueryBudgetTest(QueryBudgetMixin, TestCase):
+    """SQL per endpoint must not grow with the number of rows returned."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.reservation = sample_reservation()
+        self.client.force_authenticate(user=self.reservation.user)
+        self.sessions = [sample_show_session() for _ in range(5)]
+        for seat, session in enumerate(self.sessions, 1):
+            Ticket.objects.create(
+                show_session=session,
+                reservation=self.reservation,
+                row=1,
+                seat=seat,
+            )
+
+    def test_endpoint_query_budgets(self):
+        budgets = (
+            (PLANETARIUM_DOME_URL, 1),
+            (SHOW_THEME_URL, 1),
+            (ASTRONOMY_SHOW_URL, 2),
+            (show_detail_url(self.sessions[0].astronomy_show_id), 2),
+            (SHOW_SESSION_URL, 1),
+            (session_detail_url(self.sessions[0].id), 1),
+            (session_seat_map_url(self.sessions[0].id), 2),
+            (RESERVATION_URL, 2),
+            (reservation_detail_url(self.reservation.id), 2),
+            (TICKET_URL, 1),
+        )
+        for url, budget in budgets:
+            with self.subTest(url=url), \
+                    self.assertQueryBudget(budget):
+                res = self.client.get(url)
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class RequestProfilingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="profile@mail.com", password="profilepass123"
+            )
+        )
+        sample_show_session()
+
+    def test_server_timing_header(self):
+        res = self.client.get(SHOW_SESSION_URL)
+
+        timings = dict(
+            metric.strip().split(";", 1)
+            for metric in res["Server-Timing"].split(",")
+        )
+        self.assertEqual(set(timings), {"db", "serialize", "total"})
+        self.assertIn('desc="1 queries"', timings["db"])
+
+    def test_logs_request_profile(self):
+        with self.assertLogs("planetarium.profiling", "INFO") as logs:
+            self.client.get(SHOW_SESSION_URL)
+
+        record = logs.records[0].profile
+        self.assertEqual(record["path"], SHOW_SESSION_URL)
+        self.assertEqual(record["status"], status.HTTP_200_OK)
+        self.assertEqual(record["queries"], 1)
+
+    def test_streamed_export_is_logged_after_the_body(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="export@mail.com", password="exportpass123",
+                is_staff=True,
+            )
+        )
+        sample_reservation()
+        with self.assertLogs("planetarium.profiling", "INFO") as logs:
+            res = self.client.get(TICKET_EXPORT_URL)
+            self.assertEqual(logs.records, [])
+            b"".join(res.streaming_content)
+            self.assertEqual(len(logs.records), 1)
+
+        record = logs.records[0].profile
+        self.assertEqual(record["path"], TICKET_EXPORT_URL)
+        self.assertEqual(record["queries"], 1)
+
+    @override_settings(QUERY_REPEAT_THRESHOLD=3)
+    def test_warns_about_repeated_queries(self):
+        for _ in range(2):
+            sample_show_session()
+
+        def n_plus_one(request):
+            for session in ShowSession.objects.all():
+                session.astronomy_show.title
+            return HttpResponse()
+
+        middleware = RequestProfilingMiddleware(n_plus_one)
+        with self.assertLogs("planetarium.profiling", "WARNING") as logs:
+            middleware(RequestFactory().get(SHOW_SESSION_URL))
+
+        repeated = logs.records[0].profile["repeated_queries"]
+        self.assertEqual(len(repeated), 1)
+        self.assertEqual(repeated[0]["count"], 3)
+        self.assertIn("planetarium_astronomyshow", repeated[0]["sql"])
+
+    def test_query_shape_collapses_literals(self):
+        self.assertEqual(
+            query_shape("SELECT * FROM t WHERE id IN (1, 2, 3) AND x = 'a'"),
+            query_shape("SELECT * FROM t WHERE id IN (4, 5) AND x = 'b'"),
+        )
@@ -0,0 +1,171 @@
+import re
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from planetarium.models import (
+    PlanetariumDome,
+    ShowTheme,
+    AstronomyShow,
+    Reservation,
+    ShowSession,
+    Ticket
+)
+
+LARGE_TABLES = (
+    "planetarium_astronomyshow",
+    "planetarium_astronomyshow_themes",
+    "planetarium_reservation",
+    "planetarium_showsession",
+    "planetarium_ticket",
+)
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN {sql}")
+        return [row[0] for row in cursor.fetchall()]
+
+
+def sequential_scans(plan):
+    return {
+        match.group(1)
+        for line in plan
+        for match in [re.search(r"Seq Scan on (\w+)", line)] if match
+    }
+
+
+@skipUnless(
+    connection.vendor == "postgresql",
+    "Query plans are checked against PostgreSQL only"
+)
+class ListEndpointQueryPlanTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        domes = PlanetariumDome.objects.bulk_create(
+            PlanetariumDome(name=f"Dome {i}", rows=20, seats_in_row=25)
+            for i in range(50)
+        )
+        themes = ShowTheme.objects.bulk_create(
+            ShowTheme(name=f"Theme {i}") for i in range(50)
+        )
+        shows = AstronomyShow.objects.bulk_create(
+            AstronomyShow(title=f"Show {i}", description="Description")
+            for i in range(2000)
+        )
+        AstronomyShow.themes.through.objects.bulk_create(
+            AstronomyShow.themes.through(
+                astronomyshow_id=show.id,
+                showtheme_id=themes[i % len(themes)].id,
+            )
+            for i, show in enumerate(shows)
+        )
+
+        start = timezone.now()
+        sessions = ShowSession.objects.bulk_create(
+            ShowSession(
+                astronomy_show=shows[i % len(shows)],
+                planetarium_dome=domes[i % len(domes)],
+                show_time=start + timedelta(hours=i),
+            )
+            for i in range(20000)
+        )
+
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(email=f"user{i}@mail.com") for i in range(200)
+        )
+        reservations = Reservation.objects.bulk_create(
+            Reservation(user=users[i % len(users)]) for i in range(5000)
+        )
+        Ticket.objects.bulk_create(
+            Ticket(
+                show_session=sessions[i % 1000],
+                reservation=reservations[i % len(reservations)],
+                row=i // 1000 // 25 + 1,
+                seat=i // 1000 % 25 + 1,
+            )
+            for i in range(40000)
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        cls.dome = domes[0]
+        cls.theme = themes[0]
+        cls.show = shows[0]
+        cls.session = sessions[0]
+        cls.user = users[0]
+
+    def setUp(self):
+        self.client = APIClient()
+        admin = get_user_model().objects.create_user(
+            email="admin@mail.com", password="adminpass123", is_staff=True
+        )
+        self.client.force_authenticate(user=admin)
+
+    def assertNoSequentialScans(self, url, params=None):
+        with self.subTest(url=url, params=params):
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.get(url, params)
+            self.assertEqual(res.status_code, 200)
+
+            for query in queries.captured_queries:
+                if not query["sql"].lstrip().upper().startswith("SELECT"):
+                    continue
+                plan = explain(query["sql"])
+                scanned = sequential_scans(plan).intersection(LARGE_TABLES)
+                self.assertFalse(
+                    scanned,
+                    f"Sequential scan on {sorted(scanned)} for {url} "
+                    f"{params}:\n{query['sql']}\n" + "\n".join(plan),
+                )
+
+    def test_catalog_lists_use_indexes(self):
+        self.assertNoSequentialScans(
+            reverse("planetarium:planetariumdome-list")
+        )
+        self.assertNoSequentialScans(reverse("planetarium:showtheme-list"))
+        self.assertNoSequentialScans(
+            reverse("planetarium:astronomyshow-list")
+        )
+        self.assertNoSequentialScans(
+            reverse("planetarium:astronomyshow-list"),
+            {"themes": str(self.theme.id)},
+        )
+
+    def test_show_session_lists_use_indexes(self):
+        url = reverse("planetarium:showsession-list")
+        self.assertNoSequentialScans(url)
+        self.assertNoSequentialScans(
+            url, {"planetarium_domes": str(self.dome.id)}
+        )
+        self.assertNoSequentialScans(
+            url, {"astronomy_shows": str(self.show.id)}
+        )
+        self.assertNoSequentialScans(
+            url,
+            {
+                "planetarium_domes": str(self.dome.id),
+                "themes": str(self.theme.id),
+                "show_time_after": self.session.show_time.date().isoformat(),
+                "show_time_before": (
+                    self.session.show_time + timedelta(days=3)
+                ).date().isoformat(),
+            },
+        )
+
+    def test_reservation_and_ticket_lists_use_indexes(self):
+        self.assertNoSequentialScans(
+            reverse("planetarium:reservation-list"), {"user": self.user.id}
+        )
+        self.assertNoSequentialScans(
+            reverse("planetarium:ticket-list"),
+            {"show_sessions": str(self.session.id)},
+        )
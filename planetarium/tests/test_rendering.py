@@ -0,0 +1,148 @@
+import gzip
+import json
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock, skipIf
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from planetarium import renderers
+from planetarium.compression import accepted_encodings, brotli
+from planetarium.models import ShowSession
+from planetarium.renderers import FastJSONParser, FastJSONRenderer
+from planetarium.tests.test_planetarium_api import (
+    PLANETARIUM_DOME_URL,
+    SHOW_SESSION_URL,
+    TICKET_EXPORT_URL,
+    sample_astronomy_show,
+    sample_dome,
+)
+
+
+class FastJSONRendererTest(TestCase):
+    data = {
+        "id": 1,
+        "name": "Ganymede \u2028 Callisto",
+        "when": datetime(2030, 1, 2, 3, 4, 5, 678901, tzinfo=dt_timezone.utc),
+        "price": Decimal("12.50"),
+        "label": gettext_lazy("Planetarium"),
+        "seats": [(1, 2), (3, 4)],
+        7: None,
+    }
+
+    def test_matches_stdlib_renderer(self):
+        self.assertEqual(
+            FastJSONRenderer().render(self.data),
+            JSONRenderer().render(self.data),
+        )
+
+    def test_stdlib_fallback(self):
+        with mock.patch.object(renderers, "orjson", None):
+            self.assertEqual(
+                FastJSONRenderer().render(self.data),
+                JSONRenderer().render(self.data),
+            )
+
+    def test_indent_uses_stdlib(self):
+        self.assertEqual(
+            FastJSONRenderer().render(
+                self.data, "application/json; indent=2"
+            ),
+            JSONRenderer().render(self.data, "application/json; indent=2"),
+        )
+
+    def test_parser(self):
+        for orjson in (renderers.orjson, None):
+            with self.subTest(orjson=bool(orjson)), \
+                    mock.patch.object(renderers, "orjson", orjson):
+                self.assertEqual(
+                    FastJSONParser().parse(BytesIO(b'{"rows": [1, 2]}')),
+                    {"rows": [1, 2]},
+                )
+                with self.assertRaises(ParseError):
+                    FastJSONParser().parse(BytesIO(b'{"rows": NaN}'))
+
+
+class CompressionMiddlewareTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        user = get_user_model().objects.create_user(
+            email="gzip@mail.com", password="gzippass123", is_staff=True
+        )
+        self.client.force_authenticate(user=user)
+        show = sample_astronomy_show()
+        dome = sample_dome()
+        ShowSession.objects.bulk_create(
+            ShowSession(
+                astronomy_show=show,
+                planetarium_dome=dome,
+                show_time=datetime(2030, 1, 1, hour, tzinfo=dt_timezone.utc),
+            )
+            for hour in range(20)
+        )
+
+    def test_accepted_encodings(self):
+        self.assertEqual(accepted_encodings(""), [])
+        self.assertEqual(accepted_encodings("gzip;q=0, deflate"), [])
+        self.assertEqual(accepted_encodings("GZIP;q=0.5"), ["gzip"])
+        self.assertEqual(
+            accepted_encodings("*"), ["br", "gzip"] if brotli else ["gzip"]
+        )
+        self.assertEqual(
+            accepted_encodings("br;q=0.4, gzip;q=0.8"),
+            ["gzip", "br"] if brotli else ["gzip"],
+        )
+
+    def test_large_responses_are_gzipped(self):
+        plain = self.client.get(SHOW_SESSION_URL)
+        res = self.client.get(SHOW_SESSION_URL, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertNotIn("Content-Encoding", plain)
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", res["Vary"])
+        self.assertIn("compress;dur=", res["Server-Timing"])
+        self.assertEqual(int(res["Content-Length"]), len(res.content))
+        self.assertLess(len(res.content), len(plain.content))
+        self.assertEqual(gzip.decompress(res.content), plain.content)
+
+    @override_settings(RESPONSE_COMPRESSION_MIN_SIZE=10 ** 6)
+    def test_small_responses_are_not_compressed(self):
+        res = self.client.get(SHOW_SESSION_URL, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertNotIn("Content-Encoding", res)
+        self.assertIn("Accept-Encoding", res["Vary"])
+        json.loads(res.content)
+
+    def test_streaming_responses_are_gzipped(self):
+        res = self.client.get(TICKET_EXPORT_URL, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        body = gzip.decompress(b"".join(res.streaming_content))
+        self.assertTrue(body.startswith(b"id,"))
+
+    def test_json_request_bodies_are_parsed(self):
+        res = self.client.post(
+            PLANETARIUM_DOME_URL,
+            {"name": "Vega", "rows": 2, "seats_in_row": 3},
+            format="json",
+        )
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.json()["capacity"], 6)
+
+    @skipIf(brotli is None, "brotli is not installed")
+    def test_brotli_is_preferred(self):
+        res = self.client.get(
+            SHOW_SESSION_URL, HTTP_ACCEPT_ENCODING="gzip, deflate, br"
+        )
+
+        self.assertEqual(res["Content-Encoding"], "br")
+        self.assertEqual(
+            json.loads(brotli.decompress(res.content))["results"][0]["id"],
+            ShowSession.objects.order_by("-show_time", "-id")[0].id,
+        )
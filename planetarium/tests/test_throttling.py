@@ -0,0 +1,154 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.tests.test_planetarium_api import (
+    RESERVATION_URL,
+    TICKET_URL,
+    sample_show_session,
+)
+from planetarium.throttling import CatalogReadThrottle, \
+    SlidingWindowAnonRateThrottle, SlidingWindowUserRateThrottle, \
+    TicketWriteThrottle
+from planetarium.views import TicketViewSet
+
+
+class FiveAMinuteThrottle(SlidingWindowUserRateThrottle):
+    rate = "5/min"
+
+
+def one_per_minute(throttle_class):
+    return mock.patch.object(throttle_class, "rate", "1/min", create=True)
+
+
+def fake_request(method="GET", user_id=1):
+    return SimpleNamespace(
+        method=method,
+        user=SimpleNamespace(is_authenticated=True, pk=user_id),
+        META={},
+    )
+
+
+class SlidingWindowThrottleTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.now = 600.0
+
+    def allow(self, throttle_class=FiveAMinuteThrottle, **kwargs):
+        throttle = throttle_class()
+        throttle.timer = lambda: self.now
+        return throttle.allow_request(fake_request(**kwargs), None), throttle
+
+    def test_limits_requests_within_window(self):
+        results = [self.allow()[0] for _ in range(6)]
+
+        self.assertEqual(results, [True] * 5 + [False])
+        self.assertTrue(self.allow(user_id=2)[0])
+
+    def test_stores_one_counter_per_window(self):
+        for _ in range(7):
+            allowed, throttle = self.allow()
+
+        self.assertEqual(cache.get(f"{throttle.key}:10"), 5)
+        self.assertIsNone(cache.get(f"{throttle.key}:9"))
+
+    def test_previous_window_decays(self):
+        for _ in range(5):
+            self.allow()
+
+        self.now = 660.0 + 30
+        allowed, throttle = self.allow()
+        self.assertTrue(allowed)
+        self.assertEqual(throttle._count(throttle.elapsed), 3.5)
+
+        self.assertEqual(
+            [self.allow()[0] for _ in range(3)], [True, False, False]
+        )
+
+    def test_wait_until_next_request_fits(self):
+        for _ in range(5):
+            self.allow()
+
+        allowed, throttle = self.allow()
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(throttle.wait(), 60 + 12)
+
+        self.now = 660.0 + 6
+        allowed, throttle = self.allow()
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(throttle.wait(), 6)
+
+    def test_scopes_only_apply_to_their_methods(self):
+        with one_per_minute(CatalogReadThrottle), \
+                one_per_minute(TicketWriteThrottle):
+            self.assertTrue(self.allow(CatalogReadThrottle)[0])
+            self.assertFalse(self.allow(CatalogReadThrottle)[0])
+            self.assertTrue(self.allow(CatalogReadThrottle, method="POST")[0])
+
+            self.assertTrue(self.allow(TicketWriteThrottle, method="POST")[0])
+            self.assertFalse(
+                self.allow(TicketWriteThrottle, method="POST")[0]
+            )
+            self.assertTrue(self.allow(TicketWriteThrottle)[0])
+
+    @one_per_minute(TicketWriteThrottle)
+    def test_ticket_writes_are_throttled(self):
+        session = sample_show_session()
+        client = APIClient()
+        client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="throttle@mail.com", password="throttlepass123"
+            )
+        )
+
+        def reserve(seat):
+            return client.post(
+                RESERVATION_URL,
+                {"tickets": [
+                    {"show_session": session.id, "row": 1, "seat": seat}
+                ]},
+                format="json",
+            )
+
+        self.assertEqual(reserve(1).status_code, status.HTTP_201_CREATED)
+        res = reserve(2)
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", res)
+        self.assertEqual(
+            client.get(RESERVATION_URL).status_code, status.HTTP_200_OK
+        )
+
+    @one_per_minute(TicketWriteThrottle)
+    def test_ticket_creates_are_throttled(self):
+        client = APIClient()
+        client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="tickets@mail.com", password="ticketspass123"
+            )
+        )
+
+        res = client.post(TICKET_URL, {}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = client.post(TICKET_URL, {}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_default_throttles_follow_settings(self):
+        def throttle_types():
+            return [type(throttle) for throttle in
+                    TicketViewSet().get_throttles()]
+
+        self.assertEqual(
+            throttle_types(),
+            [SlidingWindowAnonRateThrottle, SlidingWindowUserRateThrottle,
+             TicketWriteThrottle],
+        )
+        with override_settings(REST_FRAMEWORK={
+            "DEFAULT_THROTTLE_CLASSES": [],
+            "DEFAULT_THROTTLE_RATES": {"tickets": "1/min"},
+        }):
+            self.assertEqual(throttle_types(), [TicketWriteThrottle])
@@ -0,0 +1,116 @@
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
+
+
+def scoped_throttles(*throttle_classes):
+    """Default throttles from the current settings plus ``throttle_classes``."""
+    return [
+        throttle_class()
+        for throttle_class in (
+            *api_settings.DEFAULT_THROTTLE_CLASSES, *throttle_classes
+        )
+    ]
+
+
+class ScopedThrottleMixin:
+    """Throttle with the defaults plus ``scope_throttle_classes``.
+
+    Unlike ``throttle_classes`` the defaults are resolved per request, so
+    they follow settings changes.
+    """
+
+    scope_throttle_classes = ()
+
+    def get_throttles(self):
+        return scoped_throttles(*self.scope_throttle_classes)
+
+
+class SlidingWindowMixin:
+    """Sliding-window counter in place of SimpleRateThrottle's history.
+
+    Each key keeps one integer per fixed window; the request count is the
+    current window plus the previous one weighted by how much of it still
+    overlaps the sliding window. Counters are bumped with ``cache.incr``,
+    which is atomic on Redis, Memcached and the local-memory cache.
+    Rejected requests are taken back out so they do not extend a lockout.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window, self.elapsed = divmod(self.now / self.duration, 1)
+        current_key = f"{self.key}:{int(window)}"
+        self.previous = self.cache.get(f"{self.key}:{int(window) - 1}", 0)
+
+        self.cache.add(current_key, 0, self.duration * 2)
+        try:
+            self.current = self.cache.incr(current_key)
+        except ValueError:
+            # Evicted between add() and incr().
+            self.current = 1
+            self.cache.set(current_key, 1, self.duration * 2)
+
+        if self._count(self.elapsed) > self.num_requests:
+            self.current -= 1
+            try:
+                self.cache.decr(current_key)
+            except ValueError:
+                pass
+            return self.throttle_failure()
+        return True
+
+    def _count(self, elapsed):
+        return self.previous * (1 - elapsed) + self.current
+
+    def wait(self):
+        # Time until one more request fits, first within the current window
+        # as the previous one decays, otherwise in the next window.
+        free = self.num_requests - self.current - 1
+        if self.previous and free >= 0:
+            elapsed = 1 - free / self.previous
+            if elapsed < 1:
+                return max(elapsed - self.elapsed, 0) * self.duration
+
+        next_window = (1 - self.elapsed) * self.duration
+        if self.current <= self.num_requests - 1:
+            return next_window
+        return next_window + (
+            1 - (self.num_requests - 1) / self.current
+        ) * self.duration
+
+
+class SlidingWindowAnonRateThrottle(SlidingWindowMixin, AnonRateThrottle):
+    pass
+
+
+class SlidingWindowUserRateThrottle(SlidingWindowMixin, UserRateThrottle):
+    pass
+
+
+class CatalogReadThrottle(SlidingWindowUserRateThrottle):
+    """Per-user limit on catalog and schedule reads."""
+
+    scope = "catalog"
+
+    def allow_request(self, request, view):
+        if request.method not in SAFE_METHODS:
+            return True
+        return super().allow_request(request, view)
+
+
+class TicketWriteThrottle(SlidingWindowUserRateThrottle):
+    """Per-user limit on requests that sell or hold seats."""
+
+    scope = "tickets"
+
+    def allow_request(self, request, view):
+        if request.method in SAFE_METHODS:
+            return True
+        return super().allow_request(request, view)
@@ -1,8 +1,10 @@
 from django.urls import path, include
 from rest_framework import routers
 
+from planetarium import async_views
 from planetarium.views import PlanetariumDomeViewSet, ShowThemeViewSet, \
-    AstronomyShowViewSet, ReservationViewSet, ShowSessionViewSet, TicketViewSet
+    AstronomyShowViewSet, ReservationViewSet, ShowSessionViewSet, \
+    TicketViewSet, AutocompleteView, StatsView
 
 router = routers.DefaultRouter()
 router.register("domes", viewset=PlanetariumDomeViewSet)
@@ -12,6 +14,25 @@ router.register(prefix="reservations", viewset=ReservationViewSet)
 router.register(prefix="sessions", viewset=ShowSessionViewSet)
 router.register(prefix="tickets", viewset=TicketViewSet)
 
-urlpatterns = [path("", include(router.urls))]
+urlpatterns = [
+    path("autocomplete/", AutocompleteView.as_view(), name="autocomplete"),
+    path("stats/", StatsView.as_view(), name="stats"),
+    path(
+        "async/sessions/",
+        async_views.show_session_list,
+        name="async-showsession-list",
+    ),
+    path(
+        "async/sessions/<int:pk>/",
+        async_views.show_session_detail,
+        name="async-showsession-detail",
+    ),
+    path(
+        "async/sessions/<int:pk>/seat-map/",
+        async_views.show_session_seat_map,
+        name="async-showsession-seat-map",
+    ),
+    path("", include(router.urls)),
+]
 
 app_name = "planetarium"
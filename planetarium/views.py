@@ -1,19 +1,134 @@
+from datetime import datetime, time, timedelta
+
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from drf_spectacular.utils import extend_schema, OpenApiParameter
-from rest_framework import mixins
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework import mixins, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, \
+    IsAuthenticatedOrReadOnly
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet, ModelViewSet
 
+from planetarium.autocomplete import autocomplete
+from planetarium.db_routers import ReplicaReadMixin
+from planetarium.db_stats import get_connection_stats
+from planetarium.exports import RESERVATION_EXPORT_COLUMNS, \
+    TICKET_EXPORT_COLUMNS, stream_export
+from planetarium.fieldsets import FIELD_PARAMETERS, SparseFieldsViewMixin
+from planetarium.holds import SeatHoldBusy, SeatHoldConflict, \
+    get_seat_hold_store
 from planetarium.models import PlanetariumDome, ShowTheme, AstronomyShow, \
     Reservation, ShowSession, Ticket
 from planetarium.permissions import \
     IsAdminUpdateCreateOrIfAuthenticatedReadOnly, \
     IsAdminOrAuthenticatedReadOnly, IsOwnerOrAdmin
+from planetarium.readers import ShowSessionReader, TicketReader, \
+    ValuesListMixin
+from planetarium.renderers import OctetStreamRenderer
+from planetarium.response_cache import CatalogCacheMixin, get_stats
+from planetarium.seat_map import encode_seat_map, find_best_seats, \
+    get_seat_map, mark_held_seats
 from planetarium.serializers import PlanetariumDomeSerializer, \
     ShowThemeSerializer, AstronomyShowSerializer, ReservationSerializer, \
-    ShowSessionSerializer, TicketSerializer
+    ShowSessionSerializer, TicketSerializer, SeatHoldSerializer, \
+    BestSeatsSerializer
+from planetarium.throttling import CatalogReadThrottle, \
+    ScopedThrottleMixin, TicketWriteThrottle
+
+
+EXPORT_PARAMETERS = [
+    OpenApiParameter(
+        "export_format",
+        type=str,
+        enum=["csv", "ndjson"],
+        description="Export file format (default csv)",
+        required=False,
+    ),
+]
+
+
+def _parse_show_time(param, value, end_of_day=False):
+    """Parse an ISO datetime or date query parameter into an aware datetime.
+
+    A bare date means the start of that day, or the start of the next day
+    when ``end_of_day`` is set, so "before=Sunday" includes all of Sunday.
+    """
+    try:
+        day = parse_date(value)
+        if day is not None:
+            if end_of_day:
+                day += timedelta(days=1)
+            moment = datetime.combine(day, time.min)
+        else:
+            moment = parse_datetime(value)
+            if moment is None:
+                raise ValueError
+    except ValueError:
+        raise ValidationError(
+            {param: "Expected an ISO 8601 date or datetime."}
+        )
+
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def filter_show_sessions(queryset, query_params):
+    """Filters shared by ShowSessionViewSet and the async session views."""
+    astronomy_shows = query_params.get("astronomy_shows")
+    planetarium_domes = query_params.get("planetarium_domes")
+    themes = query_params.get("themes")
+    show_time_after = query_params.get("show_time_after")
+    show_time_before = query_params.get("show_time_before")
+
+    if astronomy_shows:
+        astronomy_shows_ids = [
+            int(str_id) for str_id in astronomy_shows.split(",")]
+        queryset = queryset.filter(astronomy_show__id__in=astronomy_shows_ids)
+
+    if planetarium_domes:
+        planetarium_domes_ids = [
+            int(str_id) for str_id in planetarium_domes.split(",")]
+        queryset = queryset.filter(planetarium_dome_id__in=planetarium_domes_ids)
+
+    if themes:
+        themes_ids = [int(str_id) for str_id in themes.split(",")]
+        queryset = queryset.filter(
+            Exists(
+                AstronomyShow.themes.through.objects.filter(
+                    astronomyshow_id=OuterRef("astronomy_show_id"),
+                    showtheme_id__in=themes_ids,
+                )
+            )
+        )
+
+    if show_time_after:
+        queryset = queryset.filter(
+            show_time__gte=_parse_show_time(
+                "show_time_after", show_time_after
+            )
+        )
+
+    if show_time_before:
+        queryset = queryset.filter(
+            show_time__lt=_parse_show_time(
+                "show_time_before", show_time_before, end_of_day=True
+            )
+        )
+
+    return queryset
 
 
 class PlanetariumDomeViewSet(
+    ScopedThrottleMixin,
+    ReplicaReadMixin,
+    CatalogCacheMixin,
+    SparseFieldsViewMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.UpdateModelMixin,
@@ -21,16 +136,21 @@ class PlanetariumDomeViewSet(
 ):
     queryset = PlanetariumDome.objects.all()
     serializer_class = PlanetariumDomeSerializer
+    scope_throttle_classes = (CatalogReadThrottle, )
     permission_classes = (IsAdminUpdateCreateOrIfAuthenticatedReadOnly, )
+    cache_models = (PlanetariumDome, )
 
     def get_queryset(self):
         name = self.request.query_params.get("name")
         queryset = PlanetariumDome.objects.all()
 
+        if self.action == "list":
+            queryset = self.shape_queryset(queryset)
+
         if name:
-            queryset = queryset.filter(title__icontains=name)
+            queryset = queryset.filter(name__icontains=name)
 
-        return queryset.distinct()
+        return queryset
 
     @extend_schema(
         parameters=[
@@ -40,6 +160,7 @@ class PlanetariumDomeViewSet(
                 description="Filter domes by name (partial match)",
                 required=False,
             ),
+            *FIELD_PARAMETERS,
         ]
     )
     def list(self, request, *args, **kwargs):
@@ -47,6 +168,10 @@ class PlanetariumDomeViewSet(
 
 
 class ShowThemeViewSet(
+    ScopedThrottleMixin,
+    ReplicaReadMixin,
+    CatalogCacheMixin,
+    SparseFieldsViewMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.UpdateModelMixin,
@@ -54,16 +179,21 @@ class ShowThemeViewSet(
 ):
     queryset = ShowTheme.objects.all()
     serializer_class = ShowThemeSerializer
+    scope_throttle_classes = (CatalogReadThrottle, )
     permission_classes = (IsAdminUpdateCreateOrIfAuthenticatedReadOnly, )
+    cache_models = (ShowTheme, )
 
     def get_queryset(self):
         name = self.request.query_params.get("name")
         queryset = ShowTheme.objects.all()
 
+        if self.action == "list":
+            queryset = self.shape_queryset(queryset)
+
         if name:
             queryset = queryset.filter(name__icontains=name)
 
-        return queryset.distinct()
+        return queryset
 
     @extend_schema(
         parameters=[
@@ -73,33 +203,55 @@ class ShowThemeViewSet(
                 description="Filter show themes by name (partial match)",
                 required=False,
             ),
+            *FIELD_PARAMETERS,
         ]
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
 
-class AstronomyShowViewSet(ModelViewSet):
+class AstronomyShowViewSet(
+    ScopedThrottleMixin,
+    ReplicaReadMixin,
+    CatalogCacheMixin,
+    SparseFieldsViewMixin,
+    ModelViewSet,
+):
     serializer_class = AstronomyShowSerializer
+    scope_throttle_classes = (CatalogReadThrottle, )
     queryset = AstronomyShow.objects.all()
     permission_classes = (IsAdminOrAuthenticatedReadOnly, )
+    cache_models = (AstronomyShow, ShowTheme)
 
     def get_queryset(self):
         title = self.request.query_params.get("title")
         themes = self.request.query_params.get("themes")
+        search = self.request.query_params.get("search")
         queryset = AstronomyShow.objects.all()
 
         if self.action in ("list", "retrieve"):
-            queryset = AstronomyShow.objects.prefetch_related("themes")
+            queryset = self.shape_queryset(
+                queryset.defer("search_vector")
+            )
 
         if themes:
             themes_ids = [int(str_id) for str_id in themes.split(",")]
-            queryset = queryset.filter(themes__id__in=themes_ids)
+            queryset = queryset.filter(
+                Exists(
+                    AstronomyShow.themes.through.objects.filter(
+                        astronomyshow_id=OuterRef("pk"),
+                        showtheme_id__in=themes_ids,
+                    )
+                )
+            )
 
         if title:
             queryset = queryset.filter(title__icontains=title)
 
-        return queryset.distinct()
+        if search:
+            queryset = queryset.search(search)
+
+        return queryset
 
     @extend_schema(
         parameters=[
@@ -113,14 +265,33 @@ class AstronomyShowViewSet(ModelViewSet):
                 "themes",
                 type={"type": "list", "items": {"type": "number"}},
                 description="Comma-separated list of theme IDs"
-            )
+            ),
+            OpenApiParameter(
+                "search",
+                type=str,
+                description=(
+                    "Full-text search over title and description, "
+                    "ordered by relevance"
+                ),
+                required=False,
+            ),
+            *FIELD_PARAMETERS,
         ]
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @extend_schema(parameters=FIELD_PARAMETERS)
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
 
 class ReservationViewSet(
+    ScopedThrottleMixin,
+    ReplicaReadMixin,
+    SparseFieldsViewMixin,
     mixins.RetrieveModelMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
@@ -128,16 +299,39 @@ class ReservationViewSet(
 ):
     queryset = Reservation.objects.all()
     serializer_class = ReservationSerializer
+    scope_throttle_classes = (TicketWriteThrottle, )
     permission_classes = (IsOwnerOrAdmin, )
 
     def get_queryset(self):
         user_id = self.request.query_params.get("user")
         queryset = Reservation.objects.all()
 
+        if self.action in ("list", "retrieve"):
+            queryset = self.shape_queryset(queryset)
+
         if user_id:
             queryset = queryset.filter(user_id__exact=user_id)
 
-        return queryset.distinct()
+        return queryset
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    @extend_schema(parameters=EXPORT_PARAMETERS)
+    @action(
+        detail=False,
+        methods=["GET"],
+        permission_classes=[IsAdminUser],
+    )
+    def export(self, request):
+        return stream_export(
+            self.filter_queryset(self.get_queryset()).order_by(
+                "id", "tickets__id"
+            ),
+            RESERVATION_EXPORT_COLUMNS,
+            request.query_params.get("export_format", "csv"),
+            filename="reservations",
+        )
 
     @extend_schema(
         parameters=[
@@ -148,39 +342,38 @@ class ReservationViewSet(
                 description="Filter reservations by user id",
                 required=False,
             ),
+            *FIELD_PARAMETERS,
         ]
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @extend_schema(parameters=FIELD_PARAMETERS)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
-class ShowSessionViewSet(ModelViewSet):
+
+class ShowSessionViewSet(
+    ScopedThrottleMixin, ReplicaReadMixin, ValuesListMixin, ModelViewSet
+):
     queryset = ShowSession.objects.all()
     serializer_class = ShowSessionSerializer
+    scope_throttle_classes = (CatalogReadThrottle, )
+    list_reader_class = ShowSessionReader
     permission_classes = (IsAdminOrAuthenticatedReadOnly,)
 
     def get_queryset(self):
-        astronomy_shows = self.request.query_params.get("astronomy_shows")
-        planetarium_domes = self.request.query_params.get("planetarium_domes")
         queryset = ShowSession.objects.all()
 
-        if self.action in ("list", "retrieve"):
-            queryset = ShowSession.objects.select_related(
-                "astronomy_show",
-                "planetarium_dome"
-            )
-
-        if astronomy_shows:
-            astronomy_shows_ids = [
-                int(str_id) for str_id in astronomy_shows.split(",")]
-            queryset = queryset.filter(astronomy_show__id__in=astronomy_shows_ids)
+        if self.action == "retrieve" or (
+            self.action == "list" and self.get_list_reader() is None
+        ):
+            queryset = self.shape_queryset(queryset)
 
-        if planetarium_domes:
-            planetarium_domes_ids = [
-                int(str_id) for str_id in planetarium_domes.split(",")]
-            queryset = queryset.filter(planetarium_dome_id__in=planetarium_domes_ids)
+        if self.action in ("seat_map", "best_seats", "holds"):
+            queryset = ShowSession.objects.select_related("planetarium_dome")
 
-        return queryset.distinct()
+        return filter_show_sessions(queryset, self.request.query_params)
 
     @extend_schema(
         parameters=[
@@ -196,34 +389,218 @@ class ShowSessionViewSet(ModelViewSet):
                 type={"type": "array", "items": {"type": "integer"}},
                 location=OpenApiParameter.QUERY,
                 description="Filter show sessions by domes ids"
-            )
+            ),
+            OpenApiParameter(
+                "themes",
+                type={"type": "array", "items": {"type": "integer"}},
+                location=OpenApiParameter.QUERY,
+                description="Filter show sessions by show theme ids",
+                required=False,
+            ),
+            OpenApiParameter(
+                "show_time_after",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description=(
+                    "Sessions starting at or after this ISO date or datetime"
+                ),
+                required=False,
+            ),
+            OpenApiParameter(
+                "show_time_before",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description=(
+                    "Sessions starting before this ISO datetime, or on or "
+                    "before this ISO date"
+                ),
+                required=False,
+            ),
+            *FIELD_PARAMETERS,
         ]
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @extend_schema(parameters=FIELD_PARAMETERS)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @extend_schema(
+        description=(
+            "Seat occupancy as a bitmap of rows x seats_in_row, one bit per "
+            "seat (row-major, most significant bit first, 1 = taken). "
+            "Returned as base64 in JSON or as raw bytes when "
+            "application/octet-stream is requested."
+        )
+    )
+    @action(
+        detail=True,
+        methods=["GET"],
+        url_path="seat-map",
+        renderer_classes=[
+            *api_settings.DEFAULT_RENDERER_CLASSES,
+            OctetStreamRenderer,
+        ],
+    )
+    def seat_map(self, request, pk=None):
+        show_session = self.get_object()
+        held_seats = get_seat_hold_store().get_holds(show_session.id)
+        seat_map = mark_held_seats(get_seat_map(show_session), held_seats)
+
+        if request.accepted_renderer.format == OctetStreamRenderer.format:
+            rows, seats_in_row, bitmap = seat_map
+            return Response(
+                bitmap,
+                headers={
+                    "X-Seat-Map-Rows": rows,
+                    "X-Seat-Map-Seats-In-Row": seats_in_row,
+                },
+            )
+
+        return Response(
+            encode_seat_map(show_session, seat_map, len(held_seats))
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "count",
+                type=int,
+                location=OpenApiParameter.QUERY,
+                description="Number of adjacent seats wanted",
+                required=True,
+            ),
+        ],
+        description=(
+            "The block of `count` adjacent free seats in one row closest to "
+            "the dome centre. Seats held by other buyers count as taken. "
+            "`seats` is empty when no row has such a block."
+        ),
+    )
+    @action(detail=True, methods=["GET"], url_path="best-seats")
+    def best_seats(self, request, pk=None):
+        show_session = self.get_object()
+        serializer = BestSeatsSerializer(
+            data=request.query_params, context={"show_session": show_session}
+        )
+        serializer.is_valid(raise_exception=True)
+        count = serializer.validated_data["count"]
+
+        held_seats = [
+            seat for seat, owner in get_seat_hold_store().get_holds(
+                show_session.id
+            ).items()
+            if owner != request.user.id
+        ]
+        seat_map = mark_held_seats(get_seat_map(show_session), held_seats)
+        best = find_best_seats(seat_map, count)
+        if best is None:
+            return Response({
+                "show_session": show_session.id,
+                "count": count,
+                "seats": [],
+                "distance": None,
+            })
+
+        row, first_seat, distance = best
+        return Response({
+            "show_session": show_session.id,
+            "count": count,
+            "seats": [
+                {"row": row, "seat": seat}
+                for seat in range(first_seat, first_seat + count)
+            ],
+            "distance": round(distance, 2),
+        })
+
+    @extend_schema(
+        request=SeatHoldSerializer,
+        description=(
+            "POST holds the listed seats for the current user for "
+            "SEAT_HOLD_TTL seconds; DELETE releases all of the user's holds "
+            "for the session."
+        ),
+    )
+    @action(
+        detail=True,
+        methods=["POST", "DELETE"],
+        url_path="holds",
+        permission_classes=[IsAuthenticated],
+        scope_throttle_classes=(TicketWriteThrottle, ),
+    )
+    def holds(self, request, pk=None):
+        show_session = self.get_object()
+        store = get_seat_hold_store()
+
+        if request.method == "DELETE":
+            own_seats = [
+                seat for seat, owner in store.get_holds(
+                    show_session.id
+                ).items()
+                if owner == request.user.id
+            ]
+            store.release(show_session.id, own_seats, request.user.id)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        serializer = SeatHoldSerializer(
+            data=request.data, context={"show_session": show_session}
+        )
+        serializer.is_valid(raise_exception=True)
+        seats = serializer.validated_data["seats"]
+
+        try:
+            store.hold(show_session.id, seats, request.user.id)
+        except SeatHoldConflict as exc:
+            raise ValidationError({
+                "seats": [
+                    f"Seat {seat} in row {row} is held by another buyer."
+                    for row, seat in sorted(exc.seats)
+                ]
+            })
+        except SeatHoldBusy:
+            return Response(
+                {"detail": "Too many holds on this session, retry shortly."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "1"},
+            )
+
+        return Response(
+            {
+                "show_session": show_session.id,
+                "seats": [{"row": row, "seat": seat} for row, seat in seats],
+                "expires_in": store.ttl,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
 
 class TicketViewSet(
+    ScopedThrottleMixin,
+    ReplicaReadMixin,
+    ValuesListMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     GenericViewSet,
 ):
     queryset = Ticket.objects.all()
     serializer_class = TicketSerializer
+    list_reader_class = TicketReader
+    scope_throttle_classes = (TicketWriteThrottle, )
     permission_classes = (IsAuthenticatedOrReadOnly, )
 
     def get_queryset(self):
         show_sessions = self.request.query_params.get("show_sessions")
         queryset = Ticket.objects.all()
 
-        if self.action in ("list", "retrieve"):
-            queryset = Ticket.objects.select_related("show_session")
+        if self.action == "list" and self.get_list_reader() is None:
+            queryset = self.shape_queryset(queryset)
 
         if show_sessions:
             show_session_ids = [int(sid) for sid in show_sessions.split(",")]
             queryset = queryset.filter(show_session__id__in=show_session_ids)
 
-        return queryset.distinct()
+        return queryset
 
     @extend_schema(
         parameters=[
@@ -233,8 +610,71 @@ class TicketViewSet(
                 location=OpenApiParameter.QUERY,
                 description="Filter tickets by show session ids",
                 required=False,
-            )
+            ),
+            *FIELD_PARAMETERS,
         ]
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
+
+    @extend_schema(parameters=EXPORT_PARAMETERS)
+    @action(
+        detail=False,
+        methods=["GET"],
+        permission_classes=[IsAdminUser],
+    )
+    def export(self, request):
+        return stream_export(
+            self.filter_queryset(self.get_queryset()).order_by("id"),
+            TICKET_EXPORT_COLUMNS,
+            request.query_params.get("export_format", "csv"),
+            filename="tickets",
+        )
+
+
+class AutocompleteView(ScopedThrottleMixin, ReplicaReadMixin, APIView):
+    scope_throttle_classes = (CatalogReadThrottle, )
+    default_limit = 10
+    max_limit = 50
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "q",
+                type=str,
+                description="Prefix or fuzzy text to complete",
+                required=True,
+            ),
+            OpenApiParameter(
+                "limit",
+                type=int,
+                description="Maximum number of results (default 10)",
+                required=False,
+            ),
+        ]
+    )
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get("limit", self.default_limit))
+        except ValueError:
+            raise ValidationError({"limit": "A valid integer is required."})
+        limit = max(1, min(limit, self.max_limit))
+
+        text = request.query_params.get("q", "")
+        return Response({"results": autocomplete(text, limit)})
+
+
+class StatsView(APIView):
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(
+        description=(
+            "Per-process response cache hit/miss counters and database "
+            "connection reuse statistics, for monitoring."
+        )
+    )
+    def get(self, request):
+        return Response({
+            "response_cache": get_stats(),
+            "databases": get_connection_stats(),
+        })
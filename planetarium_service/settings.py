@@ -37,6 +37,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'planetarium',
     'user',
@@ -45,6 +46,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'planetarium.compression.CompressionMiddleware',
+    'planetarium.profiling.RequestProfilingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -84,9 +87,49 @@ DATABASES = {
         "PASSWORD": os.environ["POSTGRES_PASSWORD"],
         "HOST": os.environ["POSTGRES_HOST"],
         "PORT": int(os.environ["POSTGRES_DB_PORT"]),
+        # Seconds to keep a connection open between requests ("none" keeps
+        # it forever, 0 closes it after every request).
+        "CONN_MAX_AGE": (
+            None if os.getenv("POSTGRES_CONN_MAX_AGE", "").lower() == "none"
+            else int(os.getenv("POSTGRES_CONN_MAX_AGE", 60))
+        ),
+        "CONN_HEALTH_CHECKS": os.getenv(
+            "POSTGRES_CONN_HEALTH_CHECKS", "true"
+        ).lower() in ("1", "true", "yes"),
     }
 }
 
+# Use a psycopg 3 connection pool (needs `psycopg[pool]`) instead of
+# persistent connections; Django requires CONN_MAX_AGE = 0 with a pool.
+if os.getenv("POSTGRES_POOL", "").lower() in ("1", "true", "yes"):
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.getenv("POSTGRES_POOL_MIN_SIZE", 2)),
+            "max_size": int(os.getenv("POSTGRES_POOL_MAX_SIZE", 10)),
+            "timeout": float(os.getenv("POSTGRES_POOL_TIMEOUT", 10)),
+        },
+    }
+
+# Read replicas of the default database, as a comma-separated host list.
+# Safe-method planetarium API requests read from them; see
+# planetarium.db_routers.
+for index, host in enumerate(
+    filter(None, os.environ.get("POSTGRES_REPLICA_HOSTS", "").split(",")),
+    start=1,
+):
+    DATABASES[f"replica_{index}"] = {
+        **DATABASES["default"],
+        "HOST": host.strip(),
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["planetarium.db_routers.ReplicaRouter"]
+
+# Seconds a user's reads stay on the primary after they write.
+REPLICA_STICKY_WINDOW = int(os.environ.get("REPLICA_STICKY_WINDOW", 10))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -131,16 +174,33 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "planetarium.throttling.SlidingWindowAnonRateThrottle",
+        "planetarium.throttling.SlidingWindowUserRateThrottle",
     ],
-    "DEFAULT_THROTTLE_RATES": {"anon": "1000/day", "user": "1000/day"},
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": "1000/day",
+        "user": "1000/day",
+        "catalog": "120/min",
+        "tickets": "30/min",
+    },
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.ClaimsJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
-    ]
+    ],
+    "DEFAULT_PAGINATION_CLASS": "planetarium.pagination.KeysetPagination",
+    "PAGE_SIZE": 20,
+    # orjson when installed, the stdlib json module otherwise.
+    "DEFAULT_RENDERER_CLASSES": [
+        "planetarium.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "planetarium.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
 }
 
 SPECTACULAR_SETTINGS = {
@@ -156,8 +216,54 @@ SPECTACULAR_SETTINGS = {
     },
 }
 
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+
+SEAT_HOLD_STORE = os.getenv(
+    "SEAT_HOLD_STORE", "planetarium.holds.CacheSeatHoldStore"
+)
+SEAT_HOLD_TTL = int(os.getenv("SEAT_HOLD_TTL", 600))
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=5),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "ROTATE_REFRESH_TOKENS": False,
+    "TOKEN_OBTAIN_SERIALIZER":
+        "user.serializers.ClaimsTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER":
+        "user.serializers.ClaimsTokenRefreshSerializer",
+}
+
+# Request profiling (planetarium.profiling): identical query shapes run at
+# least this many times in one request are logged as a possible N+1.
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", 5))
+
+# Response compression (planetarium.compression): smaller bodies are sent
+# uncompressed.
+RESPONSE_COMPRESSION_MIN_SIZE = int(
+    os.getenv("RESPONSE_COMPRESSION_MIN_SIZE", 1024)
+)
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "planetarium.profiling": {
+            "handlers": ["console"],
+            "level": os.getenv("PROFILING_LOG_LEVEL", "WARNING"),
+            "propagate": False,
+        },
+    },
 }
+
+# In-process cache of users loaded by ClaimsJWTAuthentication.
+USER_CACHE_SIZE = 1024
+USER_CACHE_TTL = 60
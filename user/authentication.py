@@ -0,0 +1,134 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.functional import SimpleLazyObject
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, \
+    InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from planetarium.lru import LRUCache
+
+STAFF_CLAIM = "is_staff"
+
+users = LRUCache(
+    maxsize=getattr(settings, "USER_CACHE_SIZE", 1024),
+    ttl=getattr(settings, "USER_CACHE_TTL", 60),
+)
+
+
+def get_cached_user(user_id):
+    user = users.get(user_id)
+    if user is None:
+        try:
+            user = get_user_model().objects.get(
+                **{api_settings.USER_ID_FIELD: user_id}
+            )
+        except get_user_model().DoesNotExist:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        if not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        users.set(user_id, user)
+    return user
+
+
+def forget_user(user_id):
+    users.delete(user_id)
+
+
+class ClaimsUser(SimpleLazyObject):
+    """User answered from token claims, loaded only when really needed.
+
+    ``pk``, ``is_authenticated`` and ``is_staff`` come from the token; any
+    other attribute (or using it as a model instance) loads the user
+    through the in-process cache.
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, user_id, is_staff):
+        self.__dict__["_user_id"] = user_id
+        self.__dict__["_is_staff"] = is_staff
+        super().__init__(lambda: get_cached_user(user_id))
+
+    @property
+    def pk(self):
+        return self._user_id
+
+    id = pk
+
+    @property
+    def is_staff(self):
+        return self._is_staff
+
+    def __bool__(self):
+        return True
+
+
+def get_claims_user(validated_token):
+    try:
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken(
+            "Token contained no recognizable user identification"
+        )
+    if STAFF_CLAIM not in validated_token:
+        # Issued before the claim existed; load the user to be safe.
+        return get_cached_user(user_id)
+    return ClaimsUser(user_id, bool(validated_token[STAFF_CLAIM]))
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """Refresh token that puts the user's current claims on access tokens.
+
+    Refresh tokens outlive access tokens by far, so the claims are not
+    stored in them: every access token is minted from the user row, and a
+    demoted or deactivated user loses the old rights within one access
+    token lifetime.
+    """
+
+    no_copy_claims = (*RefreshToken.no_copy_claims, STAFF_CLAIM)
+    user = None
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.user = user
+        return token
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        access[STAFF_CLAIM] = self.get_user().is_staff
+        return access
+
+    def get_user(self):
+        if self.user is None:
+            try:
+                self.user = get_user_model().objects.get(
+                    **{api_settings.USER_ID_FIELD:
+                       self[api_settings.USER_ID_CLAIM]}
+                )
+            except (KeyError, get_user_model().DoesNotExist):
+                raise AuthenticationFailed(
+                    "No active account found for the given token.",
+                    code="no_active_account",
+                )
+        if not api_settings.USER_AUTHENTICATION_RULE(self.user):
+            raise AuthenticationFailed(
+                "No active account found for the given token.",
+                code="no_active_account",
+            )
+        return self.user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWT authentication that trusts the signed user claims.
+
+    Unlike ``JWTAuthentication`` it does not query the user table on every
+    request; see ``user.serializers.ClaimsTokenObtainPairSerializer``.
+    """
+
+    def get_user(self, validated_token):
+        return get_claims_user(validated_token)
@@ -1,3 +1,147 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 
-# Create your tests here.
+from planetarium.models import Reservation
+from planetarium.tests.test_planetarium_api import sample_show_session
+from user.authentication import ClaimsUser, get_cached_user, users
+
+TOKEN_URL = reverse("user:token_obtain_pair")
+TOKEN_REFRESH_URL = reverse("user:token_refresh")
+ME_URL = reverse("user:manage")
+SHOW_SESSION_URL = reverse("planetarium:showsession-list")
+RESERVATION_URL = reverse("planetarium:reservation-list")
+STATS_URL = reverse("planetarium:stats")
+
+
+class ClaimsAuthenticationTest(TestCase):
+    def setUp(self):
+        users.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="claims@mail.com", password="claimspass123"
+        )
+
+    def authenticate(self, email="claims@mail.com", password="claimspass123"):
+        res = self.client.post(
+            TOKEN_URL, {"email": email, "password": password}
+        )
+        self.assertEqual(res.status_code, 200)
+        token = res.data["access"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        return AccessToken(token)
+
+    def obtain_refresh_token(self):
+        res = self.client.post(TOKEN_URL, {
+            "email": "claims@mail.com", "password": "claimspass123"
+        })
+        return res.data["refresh"]
+
+    def get_without_user_query(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url)
+        self.assertNotIn(
+            get_user_model()._meta.db_table,
+            " ".join(query["sql"] for query in queries),
+        )
+        return res
+
+    def test_token_carries_staff_claim(self):
+        token = self.authenticate()
+
+        self.assertIs(token["is_staff"], False)
+
+    def test_refresh_token_does_not_carry_staff_claim(self):
+        refresh = self.obtain_refresh_token()
+
+        self.assertNotIn("is_staff", RefreshToken(refresh))
+
+    def test_refresh_rereads_staff_claim(self):
+        self.user.is_staff = True
+        self.user.save()
+        refresh = self.obtain_refresh_token()
+        self.user.is_staff = False
+        self.user.save()
+
+        res = self.client.post(TOKEN_REFRESH_URL, {"refresh": refresh})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIs(AccessToken(res.data["access"])["is_staff"], False)
+
+    def test_refresh_rejects_inactive_or_deleted_user(self):
+        refresh = self.obtain_refresh_token()
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.post(TOKEN_REFRESH_URL, {"refresh": refresh})
+        self.assertEqual(res.status_code, 401)
+
+        self.user.delete()
+        res = self.client.post(TOKEN_REFRESH_URL, {"refresh": refresh})
+        self.assertEqual(res.status_code, 401)
+
+    def test_reads_do_not_load_user(self):
+        self.authenticate()
+
+        res = self.get_without_user_query(SHOW_SESSION_URL)
+        self.assertEqual(res.status_code, 200)
+        res = self.get_without_user_query(STATS_URL)
+        self.assertEqual(res.status_code, 403)
+
+    def test_staff_claim_grants_admin_access(self):
+        get_user_model().objects.create_user(
+            email="staff@mail.com", password="staffpass123", is_staff=True
+        )
+        self.authenticate("staff@mail.com", "staffpass123")
+
+        res = self.get_without_user_query(STATS_URL)
+        self.assertEqual(res.status_code, 200)
+
+    def test_claims_user_loads_full_user_once(self):
+        user = ClaimsUser(self.user.pk, is_staff=False)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, "claims@mail.com")
+            self.assertIsInstance(user, get_user_model())
+            self.assertEqual(
+                ClaimsUser(self.user.pk, is_staff=False).email,
+                "claims@mail.com",
+            )
+
+    def test_claims_user_can_create_reservation(self):
+        session = sample_show_session()
+        self.authenticate()
+
+        res = self.client.post(
+            RESERVATION_URL,
+            {"tickets": [{"show_session": session.id, "row": 1, "seat": 1}]},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(
+            Reservation.objects.get(pk=res.data["id"]).user, self.user
+        )
+
+    def test_token_without_claim_falls_back_to_user(self):
+        token = AccessToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        res = self.client.get(RESERVATION_URL)
+        self.assertEqual(res.status_code, 200)
+
+    def test_manage_user_update_invalidates_cache(self):
+        self.authenticate()
+        get_cached_user(self.user.pk)
+
+        res = self.client.patch(ME_URL, {"email": "renamed@mail.com"})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIsNone(users.get(self.user.pk))
+        self.assertEqual(
+            get_cached_user(self.user.pk).email, "renamed@mail.com"
+        )